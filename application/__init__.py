@@ -38,6 +38,8 @@ CELL_DEFAULT = ' '
 CELL_NEW = CELL_DEFAULT
 CELL_EMPTY = CELL_DEFAULT
 CELL_ERASE = 0x00
+# CELL_ERASE in a row of characters (string)
+CELL_ERASE_CHAR = chr(CELL_ERASE)
 
 # selection action
 REMOVE = 'remove'
@@ -70,5 +72,16 @@ ARROW = 'arrw'
 LINE = 'line'
 MAG_LINE = 'magl'
 DIR_LINE = 'dirl'
+# a rectangle of characters, e.g. imported ASCII art
+BLOCK = 'blck'
 
 MARK_CHAR = 'X'
+
+# paper sizes (width, height) in points (1/72 inch), portrait
+PAPER_SIZES = {
+    'A3': (842, 1191),
+    'A4': (595, 842),
+    'A5': (420, 595),
+    'Letter': (612, 792),
+    'Legal': (612, 1008),
+    'Tabloid': (792, 1224)}
@@ -0,0 +1,92 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import threading
+from pubsub import pub
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib  # noqa: E402
+
+from application import ERROR  # noqa: E402
+
+# minimal change in progress (fraction) to be reported
+PROGRESS_STEP = 0.05
+
+
+class BackgroundTask(object):
+    """
+    Run a (long) task, e.g. writing a file, on a worker thread so the UI stays responsive and the drawing editable.
+    The task works on a snapshot of the data, taken before it is started, and must not touch the UI or send messages:
+    its progress, result and errors are reported on the main loop, by GLib.idle_add.
+    Without a running (Gtk) main loop, e.g. when run from a test, the task is run to completion right away.
+
+    :param work: the task, called with a progress callback to report the progress (fraction 0..1), returns the result
+    :param on_done: called on the main loop with the result of the task
+    :param on_error: called on the main loop with the exception raised by the task, default a status message
+    :param label: the progress is shown in the status bar with this label, e.g. "Saving"
+    """
+
+    def __init__(self, work, on_done=None, on_error=None, label=None):
+        self._work = work
+        self._on_done = on_done
+        self._on_error = on_error
+        self._label = label
+        self._reported = 0.0
+        self._failed = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def failed(self):
+        """True if the task has raised an exception (so far)."""
+        return self._failed
+
+    def start(self):
+        if Gtk.main_level() == 0:
+            self._run(self._call)
+        else:
+            self._thread = threading.Thread(target=self._run, args=(GLib.idle_add,), daemon=True)
+            self._thread.start()
+
+    def wait(self):
+        """Wait for the task to finish, the completion is reported on the main loop nevertheless."""
+        if self._thread is not None:
+            self._thread.join()
+
+    @staticmethod
+    def _call(function, *args):
+        function(*args)
+
+    def _run(self, report):
+        def progress(fraction):
+            if self._label is not None and fraction - self._reported >= PROGRESS_STEP:
+                self._reported = fraction
+                report(self._show_progress, fraction)
+
+        try:
+            result = self._work(progress)
+        except Exception as e:
+            self._failed = True
+            report(self._error, e)
+        else:
+            if self._on_done is not None:
+                report(self._on_done, result)
+
+    def _show_progress(self, fraction):
+        msg = "{0}... {1:.0%}".format(self._label, fraction)
+        pub.sendMessage('STATUS_MESSAGE', msg=msg)
+        # called by GLib.idle_add: don't repeat
+        return False
+
+    def _error(self, e):
+        if self._on_error is not None:
+            self._on_error(e)
+        else:
+            pub.sendMessage('STATUS_MESSAGE', msg=str(e), type=ERROR)
+        return False
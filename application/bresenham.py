@@ -0,0 +1,72 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# below this number of points the pure Python version is faster than the NumPy one
+NUMPY_MIN_POINTS = 256
+
+
+def line(x0, y0, x1, y1):
+    """
+    Return the coordinates of a straight line from (x0, y0) to (x1, y1), both end points included.
+    The points are identical to those of the integer Bresenham algorithm (as in the bresenham package)
+    but they are computed directly: step i along the major axis is offset floor((2*i*minor + major) / (2*major)) along the minor axis.
+    :returns (cols, rows) lists of coordinates
+    """
+    dx = x1 - x0
+    dy = y1 - y0
+    xsign = 1 if dx > 0 else -1
+    ysign = 1 if dy > 0 else -1
+    dx = abs(dx)
+    dy = abs(dy)
+    if dx > dy:
+        major = range(x0, x1 + xsign, xsign)
+        twice = 2 * dx
+        minor = [y0 + ysign * ((2 * i * dy + dx) // twice) for i in range(dx + 1)]
+        return list(major), minor
+    if dy == 0:
+        return [x0], [y0]
+    major = range(y0, y1 + ysign, ysign)
+    twice = 2 * dy
+    minor = [x0 + xsign * ((2 * i * dx + dy) // twice) for i in range(dy + 1)]
+    return minor, list(major)
+
+
+def lines(segments):
+    """
+    Return the coordinates of a batch of straight lines, see line().
+    The coordinates are computed in one go with NumPy, if it is available and the lines are long enough.
+    :param segments: sequence of (x0, y0, x1, y1) tuples
+    :returns list of (cols, rows) coordinate arrays, one per segment
+    """
+    segments = list(segments)
+    if np is None or len(segments) == 0:
+        return [line(*segment) for segment in segments]
+    seg = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x0, y0, x1, y1 = seg.T
+    dx = x1 - x0
+    dy = y1 - y0
+    adx = np.abs(dx)
+    ady = np.abs(dy)
+    n = np.maximum(adx, ady)
+    counts = n + 1
+    if counts.sum() < NUMPY_MIN_POINTS:
+        return [line(*segment) for segment in segments]
+
+    # per point: the segment parameters and the step along the major axis
+    starts = np.cumsum(counts) - counts
+    step = np.arange(counts.sum()) - np.repeat(starts, counts)
+    major = np.repeat(n, counts)
+    minor = (2 * step * np.repeat(np.minimum(adx, ady), counts) + major) // np.maximum(2 * major, 1)
+    x_major = np.repeat(adx > ady, counts)
+    cols = np.repeat(x0, counts) + np.repeat(np.where(dx > 0, 1, -1), counts) * np.where(x_major, step, minor)
+    rows = np.repeat(y0, counts) + np.repeat(np.where(dy > 0, 1, -1), counts) * np.where(x_major, minor, step)
+    ends = np.cumsum(counts)[:-1]
+    return list(zip(np.split(cols, ends), np.split(rows, ends)))
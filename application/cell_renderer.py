@@ -0,0 +1,62 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import cairo
+
+from application import CELL_EMPTY
+
+import gi
+gi.require_version('PangoCairo', '1.0')
+from gi.repository import Pango, PangoCairo  # noqa: E402
+
+
+def draw_cells(ctx, rows, cells=None, geometry=None):
+    """
+    Draw the characters of a range of cells, on screen or on any other (PDF, image) surface.
+    :param ctx: the Cairo context, in canvas coordinates (the upper-left cell of the grid at the origin)
+    :param rows: the rows of (single character) cells
+    :param cells: the range (start and end column and row) of cells to draw, None draws all cells
+    :param geometry: the cell dimensions and font (Geometry) to draw with
+    """
+    if len(rows) == 0:
+        return
+    if cells is None:
+        c_start, r_start, c_end, r_end = (0, 0, len(rows[0]), len(rows))
+    else:
+        c_start, r_start, c_end, r_end = cells
+    c_start = max(0, c_start)
+    r_start = max(0, r_start)
+    width = geometry.cell_width
+    height = geometry.cell_height
+    ctx.set_source_rgb(0.1, 0.1, 0.1)
+    use_pango_font = geometry.pango_font
+    if use_pango_font:
+        # https://sites.google.com/site/randomcodecollections/home/python-gtk-3-pango-cairo-example
+        # https://developer.gnome.org/pango/stable/pango-Cairo-Rendering.html
+        layout = PangoCairo.create_layout(ctx)
+        desc = Pango.font_description_from_string(geometry.font)
+        layout.set_font_description(desc)
+        # the Pango layout origin is its left-top corner
+        baseline = 0
+    else:
+        ctx.set_font_size(geometry.font_size)
+        ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+        # the Cairo text glyph origin is its left-bottom corner
+        baseline = geometry.font_size
+    x_start = c_start * width
+    y = r_start * height + baseline
+    for r in rows[r_start:r_end]:
+        x = x_start
+        for c in r[c_start:c_end]:
+            # an empty cell shows nothing
+            if c != CELL_EMPTY:
+                ctx.move_to(x, y)
+                if use_pango_font:
+                    layout.set_text(str(c), -1)
+                    PangoCairo.show_layout(ctx, layout)
+                else:
+                    ctx.show_text(str(c))
+            x += width
+        y += height
@@ -0,0 +1,59 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+from application.background import BackgroundTask
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, Gdk  # noqa: E402
+
+
+class Clipboard(object):
+    """
+    Exchange text with the system clipboard without blocking the UI.
+    On copying, the text is composed from the lines on a worker thread and then handed to GTK, which serves it
+    to the application that pastes it from the main loop. Pasting requests the text, which is passed to a callback
+    once it has been transferred.
+
+    :param selection: the clipboard, default the one used by the Edit menu copy/paste (Ctrl-C/Ctrl-V)
+    """
+
+    def __init__(self, selection=Gdk.SELECTION_CLIPBOARD):
+        self._selection = selection
+        # number of the latest copy, a copy that finishes after a later one doesn't replace its text
+        self._copies = 0
+
+    @property
+    def clipboard(self):
+        return Gtk.Clipboard.get(self._selection)
+
+    def copy(self, lines, on_done=None):
+        """
+        Copy lines of text to the clipboard.
+        :param lines: the lines (without line ending), a snapshot that isn't changed meanwhile
+        :param on_done: called with the number of characters on the clipboard, once the text has been copied
+        """
+        self._copies += 1
+        number = self._copies
+
+        def done(text):
+            if number != self._copies:
+                return
+            self.clipboard.set_text(text, -1)
+            if on_done is not None:
+                on_done(len(text))
+
+        task = BackgroundTask(lambda progress: "\n".join(lines), on_done=done)
+        task.start()
+
+    def paste(self, on_text):
+        """
+        Request the text on the clipboard.
+        :param on_text: called with the lines of text, or None if the clipboard contains no text
+        """
+        def received(clipboard, text, *args):
+            on_text(None if text is None else text.splitlines())
+
+        self.clipboard.request_text(received)
@@ -4,6 +4,7 @@ component_library.py
 2020-03-02 JvO
 """
 
+import hashlib
 import json
 import locale
 from pubsub import pub
@@ -67,6 +68,8 @@ class ComponentLibrary(object):
                     ids.add(id)
         # order by id
         self._components = OrderedDict(sorted(self._components.items(), key=lambda t: t[1]['id']))
+        # identifies the content of the loaded libraries, e.g. for the export cache
+        self._version = hashlib.sha256(json.dumps(self._components).encode('utf-8')).hexdigest()
 
         self._key = None
         self._dir = None
@@ -75,6 +78,10 @@ class ComponentLibrary(object):
     def components(self):
         return self._components
 
+    @property
+    def version(self):
+        return self._version
+
     def get_id(self, key):
         """
         return the symbol identifier for the given component name.
@@ -6,23 +6,30 @@ AACircuit.py
 import os
 import re
 import json
-import xerox
 import collections
 from pubsub import pub
 
 from application import gettext as _
 from application import ERROR, WARNING
 from application import REMOVE, INSERT
-from application import ERASER, COMPONENT, CHARACTER, TEXT, COL, ROW, DRAW_RECT, ARROW, LINE, MAG_LINE, DIR_LINE
+from application import ERASER, COMPONENT, CHARACTER, TEXT, COL, ROW, DRAW_RECT, ARROW, LINE, MAG_LINE, DIR_LINE, BLOCK
 from application.pos import Pos
 from application.grid import Grid
+from application.dependency_index import DependencyIndex
 from application.magic_line_settings import MagicLineSettings
 from application.preferences import Preferences
 from application.main_window import MainWindow
 from application.memo_editing import MemoEditingDialog
 from application.component_library import ComponentLibrary
-from application.file import InputFileChooser, InputFileAscii, OutputFileChooser, OutputFileAscii, OutputFilePDF, PrintOperation
-from application.symbol import Eraser, Character, Text, Line, MagLine, MagLineOld, DirLine, Rect, Arrow, Row, Column
+from application.file import InputFileChooser, InputFileAscii, OutputFileChooser, OutputFileAscii, OutputFilePDF, OutputFileImage, PrintOperation
+from application.symbol import Eraser, Character, Text, Block, Line, MagLine, MagLineOld, DirLine, Rect, Arrow, Row, Column
+from application import memo_file
+from application.background import BackgroundTask
+from application import journal
+from application.journal import Journal
+from application import export_cache
+from application.export_cache import ExportCache
+from application.clipboard import Clipboard
 
 SelectedObjects = collections.namedtuple('SelectedObjects', ['startpos', 'symbol'])
 Action = collections.namedtuple('Action', ['action', 'symbol'])
@@ -36,6 +43,13 @@ class Controller(object):
         self.gui = MainWindow()
         self.complib = ComponentLibrary()
         self.filename = None
+        # the journal of the unsaved changes, once the drawing has been saved in (or opened from) a file
+        self.journal = None
+        # the file being written in the background
+        self._writing = None
+        # exports of unchanged drawings are served from the cache
+        self.export_cache = ExportCache()
+        self.clipboard = Clipboard()
 
         self.init_stack()
         self.init_grid()
@@ -100,6 +114,7 @@ class Controller(object):
         pub.subscribe(self.on_save_as, 'SAVE_AS_FILE')
         pub.subscribe(self.on_import_aacircuit, 'IMPORT_AACIRCUIT')
         pub.subscribe(self.on_export_as_pdf, 'EXPORT_AS_PDF')
+        pub.subscribe(self.on_export_as_image, 'EXPORT_AS_IMAGE')
         pub.subscribe(self.on_export_as_ascii, 'EXPORT_AS_ASCII')
 
         # pub.subscribe(self.on_begin_print, 'BEGIN_PRINT')
@@ -110,6 +125,9 @@ class Controller(object):
         pub.subscribe(self.on_read_from_file, 'READ_FROM_FILE')
         pub.subscribe(self.on_write_to_file, 'WRITE_TO_FILE')
         pub.subscribe(self.on_write_to_ascii_file, 'WRITE_TO_ASCII_FILE')
+        pub.subscribe(self.on_write_to_pdf_file, 'WRITE_TO_PDF_FILE')
+        pub.subscribe(self.on_write_to_image_file, 'WRITE_TO_IMAGE_FILE')
+        pub.subscribe(self.on_closing_application, 'CLOSING_APPLICATION')
 
         # grid
         pub.subscribe(self.on_grid_size, 'GRID_SIZE')
@@ -131,6 +149,8 @@ class Controller(object):
         # all objects on the grid
         self.objects = []
         self.selected_objects = []
+        # the magic lines by the grid cells they depend on
+        self.dependencies = DependencyIndex()
 
     def init_grid(self, cols=None, rows=None):
         if cols is None:
@@ -149,6 +169,9 @@ class Controller(object):
         # FIXME better solution (than that this controller needs to know about a grid method)?
         return self.grid.cell(pos)
 
+    def neighbourhood_callback(self, pos):
+        return self.grid.neighbourhood(pos)
+
     def show_all(self):
         # DEBUG
         # self._import_legacy = True
@@ -161,10 +184,12 @@ class Controller(object):
         def cut_symbol():
             self.remove_from_objects(symbol)
             symbol.remove(self.grid)
+            self.update_dependents(symbol, removed=True)
 
         def paste_symbol():
-            self.objects.append(symbol)
+            self.add_to_objects(symbol)
             symbol.paste(self.grid)
+            self.update_dependents(symbol)
 
         action = None
         symbol = None
@@ -209,6 +234,54 @@ class Controller(object):
         self.undone_action.append(act)
         pub.sendMessage('REDO_CHANGED', redo=True)
 
+    def update_dependents(self, symbol, removed=False):
+        """
+        Keep the magic lines up to date after a symbol has been pasted or removed.
+        The magic lines that depend on the changed cells are re-evaluated, which may change cells that other lines depend on.
+        NB inserting or removing rows/columns is not tracked.
+        :param symbol: the pasted or removed symbol
+        :param removed: True if the symbol has been removed
+        """
+        if isinstance(symbol, (Row, Column)):
+            return
+        if removed:
+            self.dependencies.remove(symbol)
+        elif isinstance(symbol, MagLine):
+            self.dependencies.add(symbol)
+        if len(self.dependencies) == 0:
+            # no magic lines to re-evaluate, e.g. for a large imported block the cells needn't be collected
+            return
+        cells = symbol.cells()
+        # each line is re-evaluated once, to prevent endless re-evaluation of lines that depend on each other
+        evaluated = {symbol}
+        pending = self.dependencies.dependents(cells)
+        while len(pending) > 0:
+            line = pending.pop(0)
+            if line in evaluated:
+                continue
+            evaluated.add(line)
+            changed = line.reevaluate(self.grid)
+            self.dependencies.add(line)
+            if len(changed) > 0:
+                pending += self.dependencies.dependents(changed)
+
+    def start_journal(self, filename):
+        """Record the changes to the drawing, which has been saved in the file, in a journal."""
+        self.stop_journal()
+        self.journal = Journal(filename, lambda: self.objects)
+
+    def stop_journal(self):
+        """Stop recording the changes and remove the journal: the changes have been saved or are abandoned."""
+        if self.journal is not None:
+            self.journal.discard()
+            self.journal = None
+
+    def on_closing_application(self):
+        # a file that is still being written is finished, the worker thread doesn't survive the application
+        if self._writing is not None:
+            self._writing.wait()
+        self.stop_journal()
+
     def add_selected_object(self, symbol):
         obj = SelectedObjects(symbol.startpos, symbol)
         self.selected_objects.append(obj)
@@ -216,6 +289,7 @@ class Controller(object):
     # File menu
 
     def on_new(self):
+        self.stop_journal()
         self.init_grid()
         self.init_stack()
         self.filename = None
@@ -244,6 +318,14 @@ class Controller(object):
                 filename = os.path.splitext(os.path.basename(self.filename))[0] + '.pdf'
         dialog = OutputFilePDF(filename)  # noqa: F841
 
+    def on_export_as_image(self, filename=None):
+        if filename is None:
+            if self.filename is None:
+                filename = _("Untitled.png")
+            else:
+                filename = os.path.splitext(os.path.basename(self.filename))[0] + '.png'
+        dialog = OutputFileImage(filename)  # noqa: F841
+
     def on_export_as_ascii(self, filename=None):
         if filename is None:
             if self.filename is None:
@@ -262,13 +344,23 @@ class Controller(object):
 
     # Edit menu
 
+    def add_to_objects(self, symbol):
+        """Add the symbol to the objects list."""
+        self.objects.append(symbol)
+        if self.journal is not None:
+            self.journal.inserted(symbol)
+
     def remove_from_objects(self, symbol):
+        """Remove the symbol from the objects list, and return the removed (original) instance or None."""
         for idx, sym in enumerate(self.objects):
             # the id's differ as instances are copied before being added to the selection list
             # if id(sym) == id(symbol):
             if sym.startpos == symbol.startpos and sym.id == symbol.id:
                 del self.objects[idx]
-                break
+                if self.journal is not None:
+                    self.journal.removed(sym)
+                return sym
+        return None
 
     def find_selected(self, rect):
         """Find all symbols that are located within the selection rectangle."""
@@ -318,8 +410,12 @@ class Controller(object):
         for obj in self.selected_objects:
             act = Action(action=REMOVE, symbol=obj.symbol)
             action.append(act)
-            obj.symbol.remove(self.grid)
-            self.remove_from_objects(obj.symbol)
+            # remove the original instance, a (copied) magic line may not know the cells it covers
+            symbol = self.remove_from_objects(obj.symbol)
+            if symbol is None:
+                symbol = obj.symbol
+            symbol.remove(self.grid)
+            self.update_dependents(symbol, removed=True)
         self.latest_action += action
         pub.sendMessage('UNDO_CHANGED', undo=True)
         pub.sendMessage('OBJECTS_SELECTED', objects=self.selected_objects)
@@ -346,6 +442,8 @@ class Controller(object):
     def on_rerun_memo(self, str):
         self.init_stack()
         self.init_grid()
+        if self.journal is not None:
+            self.journal.reset()
         memo = []
         str = str.splitlines()
         for line in str:
@@ -369,14 +467,14 @@ class Controller(object):
     def on_grid_col(self, col, action):
         # don't mistake the symbol action for the edit action
         symbol = Column(col, action)
-        self.objects.append(symbol)
+        self.add_to_objects(symbol)
         symbol.paste(self.grid)
         self.push_latest_action(symbol)
 
     def on_grid_row(self, row, action):
         # don't mistake the symbol action for the edit action
         symbol = Row(row, action)
-        self.objects.append(symbol)
+        self.add_to_objects(symbol)
         symbol.paste(self.grid)
         self.push_latest_action(symbol)
 
@@ -427,16 +525,18 @@ class Controller(object):
             symbol.endpos += offset
             act = Action(action=INSERT, symbol=symbol)
             action.append(act)
-            self.objects.append(symbol)
+            self.add_to_objects(symbol)
             symbol.paste(self.grid)
+            self.update_dependents(symbol)
         self.latest_action += action
         pub.sendMessage('UNDO_CHANGED', undo=True)
 
     def paste_symbol(self, symbol):
         self.selected_objects = []
         self.add_selected_object(symbol)
-        self.objects.append(symbol)
+        self.add_to_objects(symbol)
         symbol.paste(self.grid)
+        self.update_dependents(symbol)
         self.push_latest_action(symbol)
 
     # lines
@@ -450,14 +550,14 @@ class Controller(object):
         self.paste_symbol(symbol)
 
     def on_paste_mag_line(self, startpos, endpos):
-        symbol = MagLine(startpos, endpos, self.cell_callback)
+        symbol = MagLine(startpos, endpos, self.cell_callback, neighbourhood_callback=self.neighbourhood_callback)
         # symbol = MagLineOld(startpos, endpos, self.cell_callback)
         self.paste_symbol(symbol)
 
     def on_paste_mag_line_w_type(self, startpos, endpos, type):
         # backward compatibility
         if type == 1:
-            symbol = MagLine(startpos, endpos, self.cell_callback)
+            symbol = MagLine(startpos, endpos, self.cell_callback, neighbourhood_callback=self.neighbourhood_callback)
         else:
             symbol = MagLineOld(startpos, endpos, self.cell_callback)
         self.paste_symbol(symbol)
@@ -473,23 +573,30 @@ class Controller(object):
     # clipboard
 
     def on_copy_grid(self):
-        self.grid.copy_to_clipboard()
+        """Copy the content of the grid to the clipboard, the rows as ASCII lines."""
+        self.clipboard.copy(self.grid.content_as_lines(), on_done=self.on_copied)
+
+    def on_copied(self, nr_chars):
+        msg = _("{} characters copied to the clipboard").format(nr_chars)
+        pub.sendMessage('STATUS_MESSAGE', msg=msg)
 
     def on_paste_grid(self):
         """
         Copy the content of the clipboard to the grid.
         ASCII lines, terminated by CR, are interpreted as rows.
         """
-        selected = []
+        # the text is received when it has been transferred
+        self.clipboard.paste(self.on_clipboard_text)
+
+    def on_clipboard_text(self, lines):
+        if lines is None:
+            msg = _("The clipboard contains no text")
+            pub.sendMessage('STATUS_MESSAGE', msg=msg, type=WARNING)
+            return
         pos = Pos(0, 0)
-        relative_pos = Pos(0, 0)
-        content = xerox.paste().splitlines()
-        for line in content:
-            symbol = Text(relative_pos, line)
-            selection = SelectedObjects(startpos=pos, symbol=symbol)
-            selected.append(selection)
-            relative_pos += Pos(0, 1)
-        self.selected_objects = selected
+        # the lines are pasted as one block
+        symbol = Block(pos, lines)
+        self.selected_objects = [SelectedObjects(startpos=pos, symbol=symbol)]
         pub.sendMessage('OBJECTS_SELECTED', objects=self.selected_objects)
 
     def on_load_and_paste_grid(self):
@@ -498,18 +605,12 @@ class Controller(object):
 
     def on_load_ascii_from_file(self, filename):
         try:
-            file = open(filename, 'r')
-            str = file.readlines()
-            startpos = Pos(0, 0)
+            with open(filename, 'r') as file:
+                lines = file.readlines()
+            # the lines are pasted as one block
             pos = Pos(0, 0)
-            for line in str:
-                # create a TEXT instance for each line
-                # fill selected_objects...
-                symbol = Text(pos, line)
-                selection = SelectedObjects(startpos=startpos, symbol=symbol)
-                pos += Pos(0, 1)
-                self.selected_objects.append(selection)
-            file.close()
+            symbol = Block(pos, lines)
+            self.selected_objects = [SelectedObjects(startpos=pos, symbol=symbol)]
             pub.sendMessage('OBJECTS_SELECTED', objects=self.selected_objects)
             return True
 
@@ -530,8 +631,9 @@ class Controller(object):
         symbol = Eraser(size, startpos)
         self.selected_objects = []
         self.add_selected_object(symbol)
-        self.objects.append(symbol)
+        self.add_to_objects(symbol)
         symbol.paste(self.grid)
+        self.update_dependents(symbol)
         self.push_latest_action(symbol)
         pub.sendMessage('UNDO_CHANGED', undo=True)
 
@@ -566,59 +668,110 @@ class Controller(object):
 
     # TODO naar eigen file of class zetten
 
+    def write_in_background(self, work, on_done, filename, label):
+        """
+        Write a file on a worker thread, so the drawing can be edited meanwhile.
+        :param work: writes the file (from a snapshot of the drawing), see BackgroundTask
+        :param on_done: called when the file has been written
+        :param filename: the file to be written
+        :param label: shown with the progress in the status bar
+        :returns False if writing the file failed, True otherwise. This is only the outcome when the file is
+            written right away (without a running main loop, e.g. in the tests); on a worker thread the writing
+            has just been started, True is returned and a failure is reported by a status message.
+        """
+        def on_error(e):
+            msg = _("Unable to open file for writing: {}").format(filename)
+            pub.sendMessage('STATUS_MESSAGE', msg=msg, type=ERROR)
+
+        # a file that is still being written by a previous save finishes first, the last save should win
+        if self._writing is not None:
+            self._writing.wait()
+        self._writing = BackgroundTask(work, on_done=on_done, on_error=on_error, label=label)
+        self._writing.start()
+        return not self._writing.failed
+
     def on_write_to_file(self, filename):
-        try:
-            fout = open(filename, 'w')
-            str = ""
-            for symbol in self.objects:
-                str += symbol.memo() + "\n"
-            fout.write(str)
-            fout.close()
+        # the objects aren't changed once they have been added, a copy of the list is a snapshot of the drawing
+        objects = list(self.objects)
+
+        def work(progress):
+            memo = (symbol.memo() for symbol in objects)
+            memo_file.write_lines(filename, memo, progress=lambda nr_lines: progress(nr_lines / len(objects)))
+
+        def on_done(result):
             self.filename = filename
+            # the changes have been saved, a new journal records the changes from now on
+            self.start_journal(filename)
+            if len(self.objects) != len(objects) or any(new is not old for new, old in zip(self.objects, objects)):
+                # the drawing has been changed during the save
+                self.journal.compact()
             msg = _("Schema has been saved in: {}").format(filename)
             pub.sendMessage('STATUS_MESSAGE', msg=msg)
             # in case we have saved a new file, we now have an opened file
             pub.sendMessage('FILE_OPENED')
-            return True
 
-        except IOError:
-            msg = _("Unable to open file for writing: {}").format(filename)
-            pub.sendMessage('STATUS_MESSAGE', msg=msg, type=ERROR)
-            return False
+        return self.write_in_background(work, on_done, filename, _("Saving"))
+
+    def export_key(self, filename):
+        """
+        Return the export cache key of the drawing, exported to the file.
+        The key covers everything the export depends on: the format, the memo, the grid dimensions,
+        the component library, the magic line settings and the (line character, font and page) preferences.
+        """
+        memo = [symbol.memo() for symbol in self.objects]
+        format = os.path.splitext(filename)[1].lower()
+        return export_cache.key(format, memo, (self.grid.nr_cols, self.grid.nr_rows), self.complib.version,
+                                MagicLineSettings.LMD, Preferences.values)
 
     def on_write_to_ascii_file(self, filename):
-        try:
-            fout = open(filename, 'w')
-            str = self.grid.content_as_str()
-            fout.write(str)
-            fout.close()
+        lines = self.grid.content_as_lines()
+        cache = self.export_cache
+        key = self.export_key(filename)
+
+        def work(progress):
+            if cache.fetch(key, filename):
+                return
+            memo_file.write_lines(filename, lines, progress=lambda nr_lines: progress(nr_lines / len(lines)))
+            cache.store(key, filename)
+
+        def on_done(result):
             self.filename = filename
             msg = _("ASCII Schema has been saved in: {}").format(filename)
             pub.sendMessage('STATUS_MESSAGE', msg=msg)
-            return True
 
-        except IOError:
-            msg = _("Unable to open file for writing: %s" % filename)
-            pub.sendMessage('STATUS_MESSAGE', msg=msg, type=ERROR)
-            return False
+        return self.write_in_background(work, on_done, filename, _("Saving"))
+
+    def on_write_to_pdf_file(self, filename):
+        pub.sendMessage('DRAW_PDF', filename=filename, cache=self.export_cache, key=self.export_key(filename))
+
+    def on_write_to_image_file(self, filename):
+        pub.sendMessage('DRAW_IMAGE', filename=filename, cache=self.export_cache, key=self.export_key(filename))
 
     def on_read_from_file(self, filename):
         self.filename = filename
+        # the unsaved changes of the current drawing are abandoned
+        self.stop_journal()
         try:
-            file = open(filename, 'r')
-            str = file.readlines()
-            # start with a fresh grid
-            self.init_stack()
-            self.init_grid()
-            memo = []
-            for line in str:
-                memo.append(line)
-            file.close()
-
-            if self._import_legacy:
-                skipped = self.play_memo_original_aac(memo)
-            else:
-                skipped = self.play_memo(memo)
+            # the memo is parsed while it is being read (and decompressed)
+            with memo_file.open_text(filename) as file:
+                # start with a fresh grid
+                self.init_stack()
+                self.init_grid()
+
+                recovered = None
+                if self._import_legacy:
+                    skipped = self.play_memo_original_aac(file)
+                else:
+                    # changes that haven't been saved, e.g. due to a crash
+                    recovered = journal.recover(filename, file)
+                    if recovered is not None:
+                        skipped = self.play_memo(recovered)
+                    else:
+                        skipped = self.play_memo(file)
+                    self.start_journal(filename)
+                    if recovered is not None:
+                        # keep the recovered changes until they are saved
+                        self.journal.compact()
 
             # empty the undo stack (from the played memo actions)
             # self.latest_action = []
@@ -628,6 +781,8 @@ class Controller(object):
             base = os.path.basename(filename)
             if skipped > 0:
                 msg = _("{0} lines skipped in: {1}").format(skipped, base)
+            elif recovered is not None:
+                msg = _("File: {} (unsaved changes have been recovered)").format(base)
             else:
                 msg = _("File: {}").format(base)
 
@@ -636,6 +791,11 @@ class Controller(object):
             pub.sendMessage('NOTHING_SELECTED')
             return True
 
+        except memo_file.DECOMPRESSION_ERRORS as e:
+            msg = _("Unable to decompress file: {} error: {}").format(filename, e)
+            pub.sendMessage('STATUS_MESSAGE', msg=msg, type=ERROR)
+            return False
+
         except IOError as e:
             msg = _("Unable to open file for reading: {} error({}): {}").format(filename, e.errno, e.strerror)
             pub.sendMessage('STATUS_MESSAGE', msg=msg, type=ERROR)
@@ -759,6 +919,16 @@ class Controller(object):
                 skip = 1
             return skip
 
+        def play_m4(m):
+            x, y = m.group(2, 3)
+            pos = Pos(x, y)
+            lines = json.loads(m.group(4))
+            symbol = Block(pos, lines)
+            self.selected_objects = []
+            self.add_selected_object(symbol)
+            self.on_paste_objects(pos)
+            return 0
+
         skipped = 0
         linenr = 0
         for item in memo:
@@ -766,12 +936,15 @@ class Controller(object):
             m1 = re.search('(^eras|^comp|^char|^rect|^line|^magl|^dirl|^arrw):(\d+),(\d+),(\d+),?(\d*),?(\d*),?(\d*)', item)  # noqa W605
             m2 = re.search('(^d|^i)(row|col):(\d+)', item)  # noqa W605
             m3 = re.search('(^text):(\d+),(\d+),(\d+),(.*)', item)  # noqa W605
+            m4 = re.search('(^' + BLOCK + '):(\d+),(\d+),(.*)', item)  # noqa W605
             if m1 is not None:
                 skipped += play_m1(m1)
             elif m2 is not None:
                 skipped += play_m2(m2)
             elif m3 is not None:
                 skipped += play_m3(m3)
+            elif m4 is not None:
+                skipped += play_m4(m4)
             else:
                 msg = _("skipped linenr: {}").format(linenr)
                 pub.sendMessage('STATUS_MESSAGE', msg=msg, type=WARNING)
@@ -0,0 +1,63 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+
+class DependencyIndex(object):
+    """
+    Reverse index from grid cells to the symbols (magic lines) whose representation depends on their content.
+    A symbol provides its dependencies as a set of (col, row) coordinates.
+    """
+
+    def __init__(self):
+        # cell (col, row) -> symbols, in the order they were added
+        self._symbols = dict()
+        # symbol -> cells
+        self._cells = dict()
+        # symbol -> sequence number, to return the dependent symbols in the order they were added
+        self._order = dict()
+        self._count = 0
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __contains__(self, symbol):
+        return symbol in self._cells
+
+    def add(self, symbol):
+        """Add the symbol, or update its dependencies if it has been added before."""
+        if symbol in self._cells:
+            self._drop(symbol)
+        else:
+            self._order[symbol] = self._count
+            self._count += 1
+        cells = symbol.dependencies
+        self._cells[symbol] = cells
+        for cell in cells:
+            self._symbols.setdefault(cell, dict())[symbol] = None
+
+    def remove(self, symbol):
+        if symbol in self._cells:
+            self._drop(symbol)
+            del self._order[symbol]
+
+    def _drop(self, symbol):
+        cells = self._cells.pop(symbol)
+        for cell in cells:
+            symbols = self._symbols[cell]
+            del symbols[symbol]
+            if len(symbols) == 0:
+                del self._symbols[cell]
+
+    def dependents(self, cells):
+        """
+        Return the symbols that depend on any of the cells.
+        :param cells: iterable of (col, row) coordinates
+        :returns a list of symbols, in the order they were added
+        """
+        found = dict()
+        for cell in cells:
+            for symbol in self._symbols.get(cell, ()):
+                found[symbol] = None
+        return sorted(found.keys(), key=self._order.get)
@@ -0,0 +1,138 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from application.memo_file import file_mode
+
+# the cache is shared by all drawings, in the user's cache directory
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                         'aacircuit', 'exports')
+
+# maximum total size (in bytes) of the cached files, the least recently used ones are removed beyond it
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def key(format, memo, *settings):
+    """
+    Return the cache key of an exported drawing: the hash of its content and of everything its rendering depends on.
+
+    :param format: the export format, e.g. the file extension
+    :param memo: the memo entries of the drawing
+    :param settings: the (JSON serializable) settings the export depends on, e.g. the preferences
+    :returns the key (hexadecimal string)
+    """
+    digest = hashlib.sha256()
+    digest.update(format.encode('utf-8') + b'\n')
+    # normalized memo: no surrounding white space and no empty entries
+    for entry in memo:
+        entry = entry.strip()
+        if entry:
+            digest.update(entry.encode('utf-8') + b'\n')
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _copy(source, target):
+    """Copy a file, the target file is replaced once the copy is complete."""
+    directory = os.path.dirname(os.path.abspath(target))
+    fd, tmp_name = tempfile.mkstemp(prefix='.' + os.path.basename(target) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as fout, open(source, 'rb') as fin:
+            shutil.copyfileobj(fin, fout)
+        os.chmod(tmp_name, file_mode(target))
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class ExportCache(object):
+    """
+    On-disk cache of exported (ASCII, PDF, image) files, so an unchanged drawing isn't rendered again.
+    The files are stored by key, see key(); when the cache exceeds its maximum size the least recently used
+    files are removed. The cache is used from the worker threads of the exports.
+
+    :param directory: the cache directory, created when the first file is stored
+    :param max_bytes: maximum total size of the cached files
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self._directory, key)
+
+    def fetch(self, key, filename):
+        """
+        Write the cached export to the file.
+
+        :param key: the cache key of the export
+        :param filename: the file to be written
+        :returns True if the file has been written from the cache, False if it isn't cached
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                # the access time isn't reliable (noatime), the modification time marks the recent use
+                os.utime(path)
+            except OSError:
+                self.misses += 1
+                return False
+            self.hits += 1
+            # (while locked, the file isn't evicted meanwhile)
+            _copy(path, filename)
+        return True
+
+    def store(self, key, filename):
+        """
+        Add the exported file to the cache, a failure to do so is ignored.
+
+        :param key: the cache key of the export
+        :param filename: the exported file
+        """
+        with self._lock:
+            try:
+                os.makedirs(self._directory, exist_ok=True)
+                _copy(filename, self._path(key))
+            except OSError:
+                return
+            self._evict()
+
+    def _evict(self):
+        """Remove the least recently used files, until the cache doesn't exceed its maximum size."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self._directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove all cached files."""
+        with self._lock:
+            shutil.rmtree(self._directory, ignore_errors=True)
@@ -6,6 +6,9 @@ AACircuit.py
 from pubsub import pub
 from gettext import gettext as _
 
+from application.memo_file import EXTENSIONS
+from application.image_export import FORMATS as IMAGE_FORMATS
+
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk  # noqa: E402
@@ -34,6 +37,9 @@ class InputFileChooser():
         filter_aac = Gtk.FileFilter()
         filter_aac.set_name(_("Circuit files"))
         filter_aac.add_pattern('*.aac')
+        # compressed
+        for extension in EXTENSIONS:
+            filter_aac.add_pattern('*.aac' + extension)
         dialog.add_filter(filter_aac)
 
         filter_text = Gtk.FileFilter()
@@ -73,6 +79,9 @@ class OutputFileChooser():
         filter_aac = Gtk.FileFilter()
         filter_aac.set_name(_("Circuit files"))
         filter_aac.add_pattern('*.aac')
+        # compressed
+        for extension in EXTENSIONS:
+            filter_aac.add_pattern('*.aac' + extension)
         dialog.add_filter(filter_aac)
 
         filter_text = Gtk.FileFilter()
@@ -93,7 +102,7 @@ class OutputFilePDF(OutputFileChooser):
         super(OutputFilePDF, self).__init__(filename)
 
     def action(self):
-        pub.sendMessage('DRAW_PDF', filename=self.filename)
+        pub.sendMessage('WRITE_TO_PDF_FILE', filename=self.filename)
 
     def add_filters(self, dialog):
         filter_aac = Gtk.FileFilter()
@@ -102,6 +111,22 @@ class OutputFilePDF(OutputFileChooser):
         dialog.add_filter(filter_aac)
 
 
+class OutputFileImage(OutputFileChooser):
+
+    def __init__(self, filename):
+        super(OutputFileImage, self).__init__(filename)
+
+    def action(self):
+        pub.sendMessage('WRITE_TO_IMAGE_FILE', filename=self.filename)
+
+    def add_filters(self, dialog):
+        filter_image = Gtk.FileFilter()
+        filter_image.set_name(_("Images (PNG, SVG)"))
+        for extension in IMAGE_FORMATS:
+            filter_image.add_pattern('*' + extension)
+        dialog.add_filter(filter_image)
+
+
 class OutputFileAscii(OutputFileChooser):
 
     def __init__(self, filename):
@@ -155,12 +180,15 @@ class PrintOperation(object):
 
         # w/o async closing the app stalls
         self.printop.set_allow_async(False)
-        self.printop.set_n_pages(1)  # TODO set nr pages
+        # the number of pages is set on begin-print, once the printable area is known
+        self.printop.set_n_pages(1)
+        # the print context dimensions and drawing in points, as a PDF export
+        self.printop.set_unit(Gtk.Unit.POINTS)
 
         self.printop.set_embed_page_setup(True)
         self.printop.set_print_settings(self.settings)
 
-        # self.printop.connect('begin-print', self.on_begin_print)
+        self.printop.connect('begin-print', self.on_begin_print)
         self.printop.connect('draw-page', self.on_draw_page)
         self.printop.connect('end-print', self.on_end_print)
 
@@ -173,7 +201,8 @@ class PrintOperation(object):
             self.settings = self.printop.get_print_settings()
 
     def on_begin_print(self, operation, print_ctx):
-        pub.sendMessage('BEGIN_PRINT')
+        parms = (operation, print_ctx)
+        pub.sendMessage('BEGIN_PRINT', parms=parms)
 
     def on_draw_page(self, operation, print_ctx, page_num):
         parms = (operation, print_ctx, page_num)
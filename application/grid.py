@@ -5,16 +5,20 @@ AACircuit
 2020-03-02 JvO
 """
 
-import xerox
+import re
 
 from gettext import gettext as _
-from application import CELL_DEFAULT, CELL_EMPTY, CELL_NEW, CELL_ERASE
+from application import CELL_DEFAULT, CELL_EMPTY, CELL_NEW, CELL_ERASE, CELL_ERASE_CHAR
 
 
 class Grid(object):
 
     def __init__(self, cols=5, rows=5):
         self._grid = [[CELL_DEFAULT] * cols for i in range(rows)]
+        # the range of cells that changed since the last clean(), a new grid is dirty all over
+        self._dirty = (0, 0, cols, rows)
+        # the content as ASCII lines, kept until the grid is changed, see content_as_lines()
+        self._lines = None
 
     def __str__(self):
         str = _("number of rows: {0} columns: {1}\n").format(self.nr_rows, self.nr_cols)
@@ -34,6 +38,27 @@ class Grid(object):
     def nr_cols(self):
         return len(self._grid[0])
 
+    @property
+    def dirty(self):
+        """
+        Return the range of cells that has been changed since the last call to clean().
+        :returns the start and end (exclusive) column and row, or None if nothing has been changed
+        """
+        return self._dirty
+
+    def mark_dirty(self, c_start, r_start, c_end, r_end):
+        """Add the range of cells to the changed (dirty) region."""
+        self._lines = None
+        if self._dirty is None:
+            self._dirty = (c_start, r_start, c_end, r_end)
+        else:
+            dc_start, dr_start, dc_end, dr_end = self._dirty
+            self._dirty = (min(c_start, dc_start), min(r_start, dr_start), max(c_end, dc_end), max(r_end, dr_end))
+
+    def clean(self):
+        """Reset the changed (dirty) region."""
+        self._dirty = None
+
     def row(self, row):
         return self._grid[row]
 
@@ -46,46 +71,17 @@ class Grid(object):
     # clipboard
 
     def content_as_str(self):
-        content = ""
-        for r in self._grid:
-            line = ""
-            for c in r:
-                line += c
-            content += (line + "\n")
-        content += _("(created by AACircuit.py © 2020 JvO)")
-        return content
+        return "\n".join(self.content_as_lines())
 
-    def copy_to_clipboard(self):
-        """
-        Copy the content of the grid to the clipboard.
-        The rows are copied as ASCII lines, terminated by CR.
-        """
-        xerox.copy(self.content_as_str())
-
-    def paste_from_clipboard(self):
-        """
-        Copy the content of the clipboard to the grid.
-        ASCII lines, terminated by CR, are interpreted as rows.
-        """
-        print("Deprecated method")
-        grid = []
-        first_line = True
-        content = xerox.paste().splitlines()
-        for line in content:
-            dict = []
-            for char in line:
-                dict.append(char)
-            # the first line determines the number of columns in the new grid
-            if first_line:
-                first_line = False
-                row_length = len(dict)
-            elif len(dict) < row_length:
-                for i in range(len(dict), row_length):
-                    dict.append(" ")
-            elif len(dict) < row_length:
-                dict = dict[:row_length]
-            grid.append(dict)
-        self._grid = grid
+    def content_as_lines(self):
+        """
+        Return the rows as ASCII lines, followed by the credits line.
+        The lines are kept until the grid is changed, the returned list should not be changed.
+        """
+        if self._lines is None:
+            self._lines = ["".join(r) for r in self._grid]
+            self._lines.append(_("(created by AACircuit.py © 2020 JvO)"))
+        return self._lines
 
     def load_and_paste_from_clipboard(self):
         print("Not yet implemented")
@@ -100,6 +96,24 @@ class Grid(object):
         else:
             return ' '
 
+    def neighbourhood(self, pos):
+        """
+        Return the 3x3 cells around (and including) the position, row by row.
+        The cells are the same as returned by cell(), this saves eight calls.
+        """
+        col, row = pos.xy
+        nr_rows = self.nr_rows
+        nr_cols = self.nr_cols
+        cells = []
+        for r in (row - 1, row, row + 1):
+            if r < nr_rows:
+                grid_row = self._grid[r]
+                for c in (col - 1, col, col + 1):
+                    cells.append(grid_row[c] if c < nr_cols else ' ')
+            else:
+                cells.extend((' ', ' ', ' '))
+        return tuple(cells)
+
     def set_cell(self, pos, value):
         row = pos.y
         col = pos.x
@@ -110,6 +124,66 @@ class Grid(object):
             # space character is 'transparent'
             elif value != ' ':
                 self._grid[row][col] = value
+            else:
+                return
+            self.mark_dirty(col, row, col + 1, row + 1)
+
+    def set_span(self, col, row, dcol, drow, values):
+        """
+        Set a run of cells, with the same result as calling set_cell() for each cell.
+        :param col, row: the first cell
+        :param dcol, drow: step to the next cell
+        :param values: the cell values, e.g. a string
+        """
+        nr_rows = self.nr_rows
+        nr_cols = self.nr_cols
+        grid = self._grid
+        written = False
+        c, r = (col, row)
+        for value in values:
+            if r < nr_rows and c < nr_cols:
+                # hex zero 'erases' content
+                if value == CELL_ERASE:
+                    grid[r][c] = CELL_EMPTY
+                    written = True
+                # space character is 'transparent'
+                elif value != ' ':
+                    grid[r][c] = value
+                    written = True
+            c += dcol
+            r += drow
+        if written:
+            n = len(values) - 1
+            col_end = col + n * dcol
+            row_end = row + n * drow
+            self.mark_dirty(min(col, col_end), min(row, row_end), max(col, col_end) + 1, max(row, row_end) + 1)
+
+    def set_block(self, col, row, lines, erase=False):
+        """
+        Set a rectangle of cells at once, with the same result as calling set_cell() for each character.
+        :param col, row: the upper-left cell
+        :param lines: the rows of characters (strings), spaces are transparent and CELL_ERASE_CHAR erases the cell
+        :param erase: erase the cells of the (non-space) characters instead
+        """
+        nr_cols = self.nr_cols
+        grid = self._grid
+        written = False
+        col_end = col
+        row_end = row
+        for r, line in enumerate(lines[:max(0, self.nr_rows - row)], row):
+            grid_row = grid[r]
+            # the runs of non-space characters are written as slices
+            for m in re.finditer('[^ ]+', line[:max(0, nr_cols - col)]):
+                start, end = m.span()
+                if erase:
+                    grid_row[col + start:col + end] = [CELL_EMPTY] * (end - start)
+                else:
+                    grid_row[col + start:col + end] = m.group().replace(CELL_ERASE_CHAR, CELL_EMPTY)
+                written = True
+                col_end = max(col_end, col + end)
+                row_end = r + 1
+        if written:
+            self.mark_dirty(col, row, col_end, row_end)
 
     def rect_to_rc(self, rect):
         """Convert the rect to colum and row start/end values.
@@ -128,6 +202,7 @@ class Grid(object):
         rows = self.nr_rows
         cols = self.nr_cols
         self._grid = [[CELL_DEFAULT] * cols for i in range(rows)]
+        self.mark_dirty(0, 0, cols, rows)
 
     def rect(self, rect):
         """
@@ -166,6 +241,7 @@ class Grid(object):
         for r in range(r_start, r_end):
             for c in range(c_start, c_end):
                 self._grid[r][c] = CELL_EMPTY
+        self.mark_dirty(c_start, r_start, c_end, r_end)
 
     def fill_rect(self, pos, content):
         """
@@ -195,24 +271,31 @@ class Grid(object):
             y += 1
             if y >= y_max:
                 break
+        self.mark_dirty(c_start, r_start, x_max, y)
 
     def _remove_row(self, row):
         # assert row >= 0 and row < self.nr_rows
         if row >= 0 and row < self.nr_rows:
             del self._grid[row]
+            # the rows below have moved up
+            self.mark_dirty(0, row, self.nr_cols, self.nr_rows + 1)
 
     def _remove_col(self, col):
         # assert col >= 0 and col < self.nr_cols
         if col >= 0 and col < self.nr_cols:
             for r in self._grid:
                 del r[col]
+            # the columns to the right have moved left
+            self.mark_dirty(col, 0, self.nr_cols + 1, self.nr_rows)
 
     def _insert_row(self, row):
         self._grid.insert(row, [CELL_NEW] * self.nr_cols)
+        self.mark_dirty(0, row, self.nr_cols, self.nr_rows)
 
     def _insert_col(self, col):
         for r in self._grid:
             r.insert(col, CELL_NEW)
+        self.mark_dirty(col, 0, self.nr_cols, self.nr_rows)
 
     def remove_row(self, row):
         """Remove a row from the grid, without changing its dimensions."""
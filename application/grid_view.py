@@ -4,6 +4,7 @@ AACircuit
 """
 
 import cairo
+import math
 import time
 from pubsub import pub
 
@@ -13,9 +14,15 @@ from application import IDLE, SELECTING, SELECTED
 from application import CHARACTER, COMPONENT, LINE, MAG_LINE, DIR_LINE, OBJECT, OBJECTS, COL, ROW, RECT, DRAW_RECT, ERASER, ARROW
 from application import MARK_CHAR
 from application import TEXT, TEXT_BLOCK
-from application.pos import Pos
+from application.pos import Pos, grid_size
 from application.symbol import Text, Line, MagLine, DirLine, Rect, Arrow
 from application.preferences import Preferences
+from application.tile_cache import TileCache
+from application.redraw_scheduler import RedrawScheduler
+from application.background import BackgroundTask
+from application.page_layout import PageLayout, content_bbox
+from application.cell_renderer import draw_cells
+from application.image_export import ImageExport
 from application.selection import Selection, SelectionCol, SelectionRow, SelectionRect, SelectionArrow, SelectionObject, SelectionEraser
 
 import gi
@@ -23,18 +30,27 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GLib  # noqa: E402
 
-gi.require_version('PangoCairo', '1.0')
-from gi.repository import Pango, PangoCairo  # noqa: E402
-
 
 class GridView(Gtk.DrawingArea):
 
     def __init__(self):
         super(GridView, self).__init__()
 
-        self.surface = None
+        # back buffer with the background, grid lines and grid content
+        self._tiles = TileCache(self.draw_tile)
+        # repeating cell pattern with background and grid lines
+        self._grid_pattern = None
+        self._grid_pattern_key = None
+        # coalesce the redraw requests, at most one redraw per frame
+        self._redraw = RedrawScheduler(self)
         self._grid = None
         self._objects = None
+        # rasterized multiple objects selection, see draw_selected_objects()
+        self._objects_sprite = None
+        # the grid content and page layout of the print operation in progress, see on_begin_print()
+        self._print_job = None
+        # the PDF and image exports in progress, finished before the application is closed
+        self._exports = []
         self._hover_pos = Pos(0, 0)
         self._hover_previous_pos = Pos(0, 0)
 
@@ -78,13 +94,17 @@ class GridView(Gtk.DrawingArea):
         self.connect('motion-notify-event', self.on_hover)
 
         # https://developer.gnome.org/gtk3/stable/GtkWidget.html#gtk-widget-add-tick-callback
+        # blink the cursor and pick up grid changes
         self.start_time = time.time()
+        # the changed region of the grid for which a redraw has been requested, until it has been drawn
+        self._dirty_requested = None
         self.cursor_callback = self.add_tick_callback(self.toggle_cursor)
         # self.remove_tick_callback(self.cursor_callback)
 
         # subscriptions
 
         pub.subscribe(self.set_grid, 'NEW_GRID')
+        pub.subscribe(self.on_preferences_changed, 'SAVE_PREFERENCES')
 
         pub.subscribe(self.on_add_text, 'ADD_TEXT')
         pub.subscribe(self.on_add_textblock, 'ADD_TEXTBLOCK')
@@ -92,6 +112,8 @@ class GridView(Gtk.DrawingArea):
         pub.subscribe(self.on_character_selected, 'CHARACTER_SELECTED')
         pub.subscribe(self.on_symbol_selected, 'SYMBOL_SELECTED')
         pub.subscribe(self.on_objects_selected, 'OBJECTS_SELECTED')
+        pub.subscribe(self.on_objects_changed, 'ROTATE_SYMBOL')
+        pub.subscribe(self.on_objects_changed, 'MIRROR_SYMBOL')
 
         pub.subscribe(self.on_selecting_eraser, 'SELECTING_ERASER')
         pub.subscribe(self.on_selecting_rect, 'SELECTING_RECT')
@@ -113,7 +135,10 @@ class GridView(Gtk.DrawingArea):
         # printing
         pub.subscribe(self.on_begin_print, 'BEGIN_PRINT')
         pub.subscribe(self.on_draw_page, 'DRAW_PAGE')
+        pub.subscribe(self.on_end_print, 'END_PRINT')
         pub.subscribe(self.on_draw_pdf, 'DRAW_PDF')
+        pub.subscribe(self.on_draw_image, 'DRAW_IMAGE')
+        pub.subscribe(self.on_closing_application, 'CLOSING_APPLICATION')
 
         # pickpoints
         pub.subscribe(self.on_show_symbol_pickpoints, 'SHOW_SYMBOL_PICKPOINTS')
@@ -122,24 +147,42 @@ class GridView(Gtk.DrawingArea):
 
     def set_grid(self, grid):
         self._grid = grid
+        self._tiles.invalidate()
         self.set_viewport_size()
+        self.redraw()
+
+    def on_preferences_changed(self):
+        # cell dimensions or font may have been changed
+        self._tiles.invalidate()
+        if self._grid is not None:
+            self.set_viewport_size()
+        self.redraw()
+
+    def redraw(self, rect=None):
+        """
+        Request a redraw of the grid view, requests are performed once per frame.
+        :param rect: the (x, y, width, height) rectangle to be redrawn, None redraws the whole view
+        """
+        self._redraw.request(rect)
 
     def set_viewport_size(self):
         # https://stackoverflow.com/questions/11546395/how-to-put-gtk-drawingarea-into-gtk-layout
-        width = self._grid.nr_cols * Preferences.values['GRIDSIZE_W']
-        height = self._grid.nr_rows * Preferences.values['GRIDSIZE_H']
+        geometry = Preferences.geometry
+        width = self._grid.nr_cols * geometry.cell_width
+        height = self._grid.nr_rows * geometry.cell_height
         self.set_size_request(width, height)
 
     @property
     def max_pos(self):
-        x_max = self.surface.get_width()
-        y_max = self.surface.get_height()
+        x_max = self.get_allocated_width()
+        y_max = self.get_allocated_height()
         return Pos(x_max, y_max)
 
     @property
     def max_pos_grid(self):
-        x_max = self._grid.nr_cols * Preferences.values['GRIDSIZE_W']
-        y_max = self._grid.nr_rows * Preferences.values['GRIDSIZE_H']
+        geometry = Preferences.geometry
+        x_max = self._grid.nr_cols * geometry.cell_width
+        y_max = self._grid.nr_rows * geometry.cell_height
         return Pos(x_max, y_max)
 
     @property
@@ -155,77 +198,230 @@ class GridView(Gtk.DrawingArea):
         br = br.grid_cr()
         return ul, br
 
-    def init_surface(self, area):
-        """Initialize Cairo surface."""
-        if self.surface is not None:
-            # destroy previous buffer
-            self.surface.finish()
-            self.surface = None
-        # create a new buffer
-        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, area.get_allocated_width(), area.get_allocated_height())
-
     def on_configure(self, area, event, data=None):
-        self.init_surface(self)
-        context = cairo.Context(self.surface)
-        self.do_drawing(context)
-        self.surface.flush()
+        # the tiles don't depend on the allocated size, so they stay valid
         return False
 
     def on_draw(self, area, ctx):
-        if self.surface is not None:
-            ctx.set_source_surface(self.surface, 0.0, 0.0)
-            ctx.paint()
-        else:
-            print(_("Invalid surface"))
+        if self._grid is None:
+            return False
+        dirty = self._grid.dirty
+        if dirty is not None:
+            # discard the tiles with changed cells, with a margin for glyphs that exceed their cell
+            c_start, r_start, c_end, r_end = dirty
+            self._tiles.invalidate(self.cells_rect((c_start - 1, r_start - 1, c_end + 1, r_end + 1)))
+            self._grid.clean()
+            self._dirty_requested = None
+        self._tiles.paint(ctx)
+        # the selection (and the sprite of the selected objects) is drawn in the font of the grid content
+        ctx.set_font_size(Preferences.geometry.font_size)
+        ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+        self.draw_selection(ctx, self.clip_cells(ctx, 1))
         return False
 
+    def draw_tile(self, ctx, rect):
+        """
+        Draw the background with grid lines and the grid content of a back buffer tile.
+        :param ctx: the Cairo context
+        :param rect: the (x, y, width, height) rectangle of the tile
+        """
+        x, y, width, height = rect
+        ctx.rectangle(x, y, width, height)
+        ctx.clip()
+        # include the surrounding cells, as their glyphs may exceed the tile border
+        cells = self.rect_cells(x, y, x + width, y + height, 1)
+        self.draw_background(ctx, cells)
+        self.draw_content(ctx, cells)
+
+    def rect_cells(self, x1, y1, x2, y2, margin=0):
+        """
+        Return the range of cells that intersects the given rectangle.
+        :param x1, y1: upper-left corner canvas (x,y) coordinates
+        :param x2, y2: bottom-right corner canvas (x,y) coordinates
+        :param margin: number of extra cells around the rectangle
+        :returns the start and end (exclusive) column and row
+        """
+        width, height = grid_size()
+        c_start = max(0, int(x1 // width) - margin)
+        r_start = max(0, int(y1 // height) - margin)
+        c_end = int(x2 // width) + 1 + margin
+        r_end = int(y2 // height) + 1 + margin
+        return (c_start, r_start, c_end, r_end)
+
+    def clip_cells(self, ctx, margin=0):
+        """Return the range of cells that intersects the clip region (i.e. the visible part) of the context."""
+        x1, y1, x2, y2 = ctx.clip_extents()
+        return self.rect_cells(x1, y1, x2, y2, margin)
+
+    def cells_rect(self, cells):
+        """Return the canvas (x, y, width, height) rectangle of the given range of cells."""
+        c_start, r_start, c_end, r_end = cells
+        width, height = grid_size()
+        return (c_start * width, r_start * height, (c_end - c_start) * width, (r_end - r_start) * height)
+
     # (don't) show pickpoints
 
     def on_show_symbol_pickpoints(self, state):
         self._show_symbol_pickpoints = state
+        self.redraw()
 
     def on_show_line_pickpoints(self, state):
         self._show_line_pickpoints = state
+        self.redraw()
 
     def on_show_text_pickpoints(self, state):
         self._show_text_pickpoints = state
+        self.redraw()
 
     # printing
 
     def on_begin_print(self, parms):
         operation, print_ctx = parms
-        operation.set_n_pages(1)
+        # the layout is computed once, from a copy of the grid content, and used for all pages;
+        # the printable area (in points) is within the printer margins already
+        rows = [list(r) for r in self._grid.grid]
+        geometry = Preferences.geometry
+        layout = PageLayout.from_preferences(size=(print_ctx.get_width(), print_ctx.get_height()), margin=0)
+        scale, pages = layout.layout(content_bbox(rows), geometry.cell_width, geometry.cell_height)
+        self._print_job = (rows, geometry, layout, scale, pages)
+        operation.set_n_pages(max(1, len(pages)))
 
     def on_draw_page(self, parms):
         operation, print_ctx, page_num = parms
-        # w = print_ctx.get_width()
-        # h = print_ctx.get_height()
-        # print("width: {} height:{})".format(w, h))
-        ctx = print_ctx.get_cairo_context()
-        # self.draw_border(ctx, w, h)
-        ctx.scale(0.5, 0.5)
-        self.draw_content(ctx)
-
-    def on_draw_pdf(self, filename):
+        if self._print_job is None:
+            self.on_begin_print((operation, print_ctx))
+        rows, geometry, layout, scale, pages = self._print_job
+        if page_num < len(pages):
+            ctx = print_ctx.get_cairo_context()
+            self.draw_page(ctx, pages[page_num].cells, scale, layout.margin, geometry, rows)
+
+    def on_end_print(self):
+        self._print_job = None
+
+    def on_draw_pdf(self, filename, cache=None, key=None):
+        """
+        Export the grid content as PDF file.
+        :param filename: the PDF file
+        :param cache: the export cache (ExportCache) the PDF is served from, or stored in once it has been drawn
+        :param key: the export cache key of the drawing
+        """
+        # the PDF is rendered in the background from a copy of the grid content, the drawing can be edited meanwhile
+        rows = [list(r) for r in self._grid.grid]
+        geometry = Preferences.geometry
+        layout = PageLayout.from_preferences()
+
+        def work(progress):
+            if cache is not None and cache.fetch(key, filename):
+                return None
+            nr_pages = self.draw_pdf(filename, rows, geometry, layout, progress)
+            if cache is not None:
+                cache.store(key, filename)
+            return nr_pages
+
+        def on_done(nr_pages):
+            if nr_pages is None:
+                msg = _("PDF Exported to {} (unchanged)").format(filename)
+            else:
+                msg = _("PDF Exported to {} ({} pages)").format(filename, nr_pages)
+            pub.sendMessage('STATUS_MESSAGE', msg=msg)
+
+        self.export_in_background(work, on_done, _("Exporting PDF"))
+
+    def on_draw_image(self, filename, cache=None, key=None):
+        """
+        Export the grid content as PNG or SVG image, see on_draw_pdf().
+        """
+        # as the PDF, the image is rendered in the background from a copy of the grid content
+        export = ImageExport([list(r) for r in self._grid.grid], Preferences.geometry)
+        zoom = Preferences.values['IMAGE_ZOOM'] / 100
+
+        def work(progress):
+            if cache is not None and cache.fetch(key, filename):
+                return None
+            size = export.write(filename, zoom)
+            if cache is not None:
+                cache.store(key, filename)
+            return size
+
+        def on_done(size):
+            if size is None:
+                msg = _("Image Exported to {} (unchanged)").format(filename)
+            else:
+                msg = _("Image Exported to {} ({} x {})").format(filename, *size)
+            pub.sendMessage('STATUS_MESSAGE', msg=msg)
+
+        self.export_in_background(work, on_done, _("Exporting image"))
+
+    def export_in_background(self, work, on_done, label):
+        """
+        Write an export on a worker thread, see BackgroundTask.
+        :param work: writes the file (from a copy of the grid content)
+        :param on_done: called with the result of work when the file has been written
+        :param label: shown with the progress in the status bar
+        """
+        self._exports = [task for task in self._exports if task.running]
+        task = BackgroundTask(work, on_done=on_done, label=label)
+        task.start()
+        self._exports.append(task)
+
+    def on_closing_application(self):
+        # the worker threads don't survive the application, a file that is still being written is finished
+        for task in self._exports:
+            task.wait()
+        self._exports = []
+
+    def draw_pdf(self, filename, rows, geometry, layout, progress=None):
+        """
+        Draw the rows of characters in a PDF file, on as many pages as the layout requires.
+        :param filename: the PDF file
+        :param rows: the rows of characters, e.g. a copy of the grid content
+        :param geometry: the cell dimensions and font (Geometry) to draw with
+        :param layout: the paper size and the division of the content over the pages (PageLayout)
+        :param progress: called with the fraction of the pages that has been drawn
+        :returns the number of pages
+        """
         # don't use the drawing_area, so that this method can be run from (nose) test method (w/o GUI)
-        # w = self.get_allocated_width()
-        # h = self.get_allocated_height()
-        # FIXME Set Portrait or Landscape dimensions based upon prefs or printer settings
-        w, h = (560, 784)
-        surface = cairo.PDFSurface(filename, w, h)
+        scale, pages = layout.layout(content_bbox(rows), geometry.cell_width, geometry.cell_height)
+        surface = cairo.PDFSurface(filename, layout.paper_width, layout.paper_height)
         ctx = cairo.Context(surface)
-        # self.draw_border(ctx, w, h)
-        ctx.scale(0.5, 0.5)
-        self.draw_content(ctx)
+        for page in pages:
+            self.draw_page(ctx, page.cells, scale, layout.margin, geometry, rows)
+            ctx.show_page()
+            if progress is not None:
+                progress((page.number + 1) / len(pages))
+        if len(pages) == 0:
+            # nothing to draw, an empty page
+            ctx.show_page()
         surface.finish()
-        msg = _("PDF Exported to {}").format(filename)
-        pub.sendMessage('STATUS_MESSAGE', msg=msg)
+        return len(pages)
+
+    def draw_page(self, ctx, cells, scale, margin, geometry, rows=None):
+        """
+        Draw the cells of one page, only these cells are drawn and the drawing is clipped to them.
+        :param ctx: the Cairo context of the page
+        :param cells: the range (start and end column and row) of cells on the page
+        :param scale: the scale of the grid (canvas) dimensions on the page
+        :param margin: the position of the upper-left cell (in points)
+        :param geometry: the cell dimensions and font (Geometry) to draw with
+        :param rows: the rows of characters to draw, default the rows of the grid
+        """
+        c_start, r_start, c_end, r_end = cells
+        width = geometry.cell_width
+        height = geometry.cell_height
+        ctx.save()
+        ctx.translate(margin, margin)
+        ctx.scale(scale, scale)
+        ctx.translate(-c_start * width, -r_start * height)
+        ctx.rectangle(c_start * width, r_start * height, (c_end - c_start) * width, (r_end - r_start) * height)
+        ctx.clip()
+        self.draw_content(ctx, cells, geometry, rows)
+        ctx.restore()
 
     # SELECTIONs
 
     def on_nothing_selected(self):
         self._selection = Selection(None)
-        self.queue_resize()
+        self.redraw()
 
     def on_add_text(self):
         self._selection = Selection(item=TEXT, state=SELECTING)
@@ -252,11 +448,19 @@ class GridView(Gtk.DrawingArea):
         self._selection = Selection(item=OBJECTS)
         self._selection.state = SELECTED
         self._objects = objects
+        self._objects_sprite = None
+        self.redraw()
+
+    def on_objects_changed(self):
+        # the selected objects have been rotated or mirrored
+        self._objects_sprite = None
+        self.redraw()
 
     def on_selecting_object(self, objects):
         # select a single object
         self._selection = SelectionObject()
         self._objects = objects
+        self.redraw()
 
     def on_selecting_eraser(self):
         self._selection = SelectionEraser()
@@ -264,10 +468,12 @@ class GridView(Gtk.DrawingArea):
     def on_selecting_rect(self, objects):
         self._selection = SelectionRect()
         self._objects = objects
+        self.redraw()
 
     def on_selecting_arrow(self, objects):
         self._selection = SelectionArrow()
         self._objects = objects
+        self.redraw()
 
     def on_selecting_row(self, action):
         self._selection = SelectionRow(action)
@@ -281,7 +487,7 @@ class GridView(Gtk.DrawingArea):
 
     def on_draw_mag_line(self):
         self._selection = Selection(item=MAG_LINE)
-        self._symbol = MagLine(Pos(0, 0), Pos(1, 1), self._grid.cell)
+        self._symbol = MagLine(Pos(0, 0), Pos(1, 1), self._grid.cell, neighbourhood_callback=self._grid.neighbourhood)
 
     def on_draw_dir_line(self, type):
         self._selection = Selection(item=DIR_LINE)
@@ -317,6 +523,7 @@ class GridView(Gtk.DrawingArea):
         # modifier = event.state
         # name = Gdk.keyval_name(event.keyval)
         value = event.keyval
+        self.redraw()
 
         if value == Gdk.KEY_Escape:
             # exit drawing
@@ -355,12 +562,6 @@ class GridView(Gtk.DrawingArea):
 
     # DRAWING
 
-    def do_drawing(self, ctx):
-        self.draw_background(ctx)
-        self.draw_gridlines(ctx)
-        self.draw_content(ctx)
-        self.draw_selection(ctx)
-
     def draw_border(self, ctx, w, h):
         """draw a border at 1% of the page-size."""
         ctx.save()
@@ -370,89 +571,88 @@ class GridView(Gtk.DrawingArea):
         ctx.stroke()
         ctx.restore()
 
-    def draw_background(self, ctx):
-        """Draw a background with the size of the grid."""
-        ctx.set_source_rgb(0.95, 0.95, 0.85)
-        ctx.set_line_width(0.5)
-        ctx.set_tolerance(0.1)
-        ctx.set_line_join(cairo.LINE_JOIN_ROUND)
+    def grid_pattern(self, ctx):
+        """
+        Return a repeating pattern of one cell with background and grid lines.
+        The pattern is cached for the cell dimensions and the zoom level of the context.
+        :param ctx: the Cairo context the pattern will be painted on
+        """
+        width, height = grid_size()
+        x_scale, y_scale = (abs(v) for v in ctx.user_to_device_distance(1, 1))
+        key = (width, height, x_scale, y_scale)
+        if self._grid_pattern_key != key:
+            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32,
+                                         max(1, round(width * x_scale)), max(1, round(height * y_scale)))
+            surface.set_device_scale(x_scale, y_scale)
+            tile_ctx = cairo.Context(surface)
+            # TODO use CSS for uniform colors?
+            tile_ctx.set_source_rgb(0.95, 0.95, 0.85)
+            tile_ctx.paint()
+            # grid lines on the cell borders, each border shows half of the line (which is completed by the next cell)
+            tile_ctx.set_source_rgb(0.75, 0.75, 0.75)
+            tile_ctx.set_line_width(0.5)
+            tile_ctx.rectangle(0, 0, width, height)
+            tile_ctx.stroke()
+            surface.flush()
+            self._grid_pattern = cairo.SurfacePattern(surface)
+            self._grid_pattern.set_extend(cairo.EXTEND_REPEAT)
+            self._grid_pattern_key = key
+        return self._grid_pattern
+
+    def draw_background(self, ctx, cells=None):
+        """
+        Draw the background and grid lines with the size of the grid.
+        :param ctx: the Cairo context
+        :param cells: the range (start and end column and row) of cells to draw, None draws all cells
+        """
         x_max, y_max = self.max_pos_grid.xy
-        ctx.new_path()
-        ctx.rectangle(0, 0, x_max, y_max)
-        ctx.fill()
-
-    def draw_gridlines(self, ctx):
-        # TODO use CSS for uniform colors?
-        ctx.set_source_rgb(0.75, 0.75, 0.75)
-        ctx.set_line_width(0.5)
-        ctx.set_tolerance(0.1)
-        ctx.set_line_join(cairo.LINE_JOIN_ROUND)
+        x_start, y_start = (0, 0)
+        if cells is not None:
+            c_start, r_start, c_end, r_end = cells
+            width, height = grid_size()
+            x_start = c_start * width
+            y_start = r_start * height
+            x_max = min(x_max, c_end * width)
+            y_max = min(y_max, r_end * height)
+            if x_start >= x_max or y_start >= y_max:
+                # outside the grid
+                return
+        ctx.save()
+        ctx.rectangle(x_start, y_start, x_max - x_start, y_max - y_start)
+        ctx.clip()
+        ctx.set_source(self.grid_pattern(ctx))
+        ctx.paint()
+        ctx.restore()
 
-        x_max, y_max = self.max_pos.xy
-        x_incr = Preferences.values['GRIDSIZE_W']
-        y_incr = Preferences.values['GRIDSIZE_H']
-
-        # horizontal lines
-        y = Preferences.values['GRIDSIZE_H']
-        while y <= y_max:
-            ctx.new_path()
-            ctx.move_to(0, y)
-            ctx.line_to(x_max, y)
-            ctx.stroke()
-            y += y_incr
-        # vertical lines
-        x = 0
-        while x <= x_max:
-            ctx.new_path()
-            ctx.move_to(x, 0)
-            ctx.line_to(x, y_max)
-            ctx.stroke()
-            x += x_incr
-
-    def draw_content(self, ctx):
-        if self._grid is None:
-            return
-        ctx.set_source_rgb(0.1, 0.1, 0.1)
-        use_pango_font = Preferences.values['PANGO_FONT']
-        if use_pango_font:
-            # https://sites.google.com/site/randomcodecollections/home/python-gtk-3-pango-cairo-example
-            # https://developer.gnome.org/pango/stable/pango-Cairo-Rendering.html
-            layout = PangoCairo.create_layout(ctx)
-            desc = Pango.font_description_from_string(Preferences.values['FONT'])
-            layout.set_font_description(desc)
-        else:
-            ctx.set_font_size(Preferences.values['FONTSIZE'])
-            ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-        y = 0
-        for r in self._grid.grid:
-            x = 0
-            for c in r:
-                if use_pango_font:
-                    ctx.move_to(x, y)
-                    layout.set_text(str(c), -1)
-                    PangoCairo.show_layout(ctx, layout)
-                else:
-                    # the Cairo text glyph origin is its left-bottom corner
-                    ctx.move_to(x, y + Preferences.values['FONTSIZE'])
-                    ctx.show_text(str(c))
-                x += Preferences.values['GRIDSIZE_W']
-            y += Preferences.values['GRIDSIZE_H']
-            # no reference to surface dimension, to allow to be run from (nose) test (w/o GUI)
-            # if y >= self.surface.get_height():
-            #     break
-
-    def draw_selection(self, ctx):
+    def draw_content(self, ctx, cells=None, geometry=None, rows=None):
+        """
+        Draw the grid content.
+        :param ctx: the Cairo context
+        :param cells: the range (start and end column and row) of cells to draw, None draws all cells
+        :param geometry: the cell dimensions and font (Geometry) to draw with, default the current preferences
+        :param rows: the rows of characters to draw, default the rows of the grid
+        """
+        if rows is None:
+            if self._grid is None:
+                return
+            rows = self._grid.grid
+        if geometry is None:
+            geometry = Preferences.geometry
+        # no reference to surface dimension, to allow to be run from (nose) test (w/o GUI)
+        draw_cells(ctx, rows, cells, geometry)
+
+    def draw_selection(self, ctx, cells=None):
         ctx.save()
         if self._selection.state == IDLE:
             if self._selection.item == RECT:
-                self.mark_all_objects(ctx)
+                self.mark_all_objects(ctx, cells)
         elif self._selection.state == SELECTING:
-            self.draw_selecting_state(ctx)
+            self.draw_selecting_state(ctx, cells)
         elif self._selection.state == SELECTED:
-            self.draw_selected_state(ctx)
+            self.draw_selected_state(ctx, cells)
         ctx.restore()
 
-    def draw_selected_state(self, ctx):
+    def draw_selected_state(self, ctx, cells=None):
         if self._selection.item in (CHARACTER, COMPONENT):
             self._symbol.draw(ctx, self._hover_pos)
         elif self._selection.item in (OBJECT, RECT):
@@ -461,14 +661,14 @@ class GridView(Gtk.DrawingArea):
             self._selection.endpos = self._drag_endpos
             self._selection.maxpos = self.max_pos_grid
             self._selection.draw(ctx)
-            self.mark_all_objects(ctx)
+            self.mark_all_objects(ctx, cells)
         elif self._selection.item == OBJECTS:
-            self.mark_all_objects(ctx)
+            self.mark_all_objects(ctx, cells)
             self.draw_selected_objects(ctx)
 
-    def draw_selecting_state(self, ctx):
+    def draw_selecting_state(self, ctx, cells=None):
         if self._selection.item == OBJECT:
-            self.mark_all_objects(ctx)
+            self.mark_all_objects(ctx, cells)
             self.draw_cursor(ctx)
         elif self._selection.item in (TEXT, TEXT_BLOCK):
             self.draw_cursor(ctx)
@@ -487,7 +687,7 @@ class GridView(Gtk.DrawingArea):
             self._selection.maxpos = self.max_pos_grid
 
             if self._selection.item == RECT:
-                self.mark_all_objects(ctx)
+                self.mark_all_objects(ctx, cells)
                 self._selection.draw(ctx)
             elif self._selection.item in (MAG_LINE, LINE, DIR_LINE, DRAW_RECT, ARROW):
                 self._symbol.startpos = self._selection.startpos.grid_cr()
@@ -506,7 +706,8 @@ class GridView(Gtk.DrawingArea):
         else:
             ctx.set_source_rgb(0.5, 0.5, 0.5)
         x, y = self._hover_pos.xy  # TODO meelopen met de tekst (blijft nu aan 't begin staan)
-        ctx.rectangle(x, y, Preferences.values['GRIDSIZE_W'], Preferences.values['GRIDSIZE_H'])
+        width, height = grid_size()
+        ctx.rectangle(x, y, width, height)
         ctx.stroke()
         ctx.restore()
 
@@ -516,41 +717,95 @@ class GridView(Gtk.DrawingArea):
         if elapsed > 0.5:
             self.start_time = now
             self._cursor_on = not self._cursor_on
-            self.queue_resize()
-        elif elapsed > 0.25:
-            self.queue_resize()
+            if self.cursor_shown:
+                self.redraw(self.cursor_rect)
+        dirty = self._grid.dirty if self._grid is not None else None
+        if dirty is not None and dirty != self._dirty_requested:
+            # the grid has been changed, e.g. by the controller, request a redraw once per change
+            self._dirty_requested = dirty
+            c_start, r_start, c_end, r_end = dirty
+            self.redraw(self.cells_rect((c_start - 1, r_start - 1, c_end + 1, r_end + 1)))
         return GLib.SOURCE_CONTINUE
 
-    def mark_all_objects(self, ctx):
-        """Mark all objects on the grid canvas."""
+    @property
+    def cursor_shown(self):
+        """Return True if the (blinking) cursor is displayed, i.e. while selecting an object or entering text."""
+        return self._selection.state == SELECTING and self._selection.item in (OBJECT, TEXT, TEXT_BLOCK)
+
+    @property
+    def cursor_rect(self):
+        """Return the (x, y, width, height) rectangle of the cursor, including its line width."""
+        x, y = self._hover_pos.xy
+        width, height = grid_size()
+        return (x - 1, y - 1, width + 2, height + 2)
+
+    def mark_all_objects(self, ctx, cells=None):
+        """
+        Mark all objects on the grid canvas.
+        :param ctx: the Cairo context
+        :param cells: only mark the objects within this range (start and end column and row) of cells
+        """
+        if cells is not None:
+            c_start, r_start, c_end, r_end = cells
+            rect = (Pos(c_start, r_start), Pos(c_end, r_end))
+        width, height = grid_size()
+        # the text glyph origin is its left-bottom corner
+        baseline = Preferences.geometry.font_size
         ctx.save()
+        ctx.set_source_rgb(1, 0, 0)
+        ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
         for ref in self._objects:
             if ref.symbol.has_pickpoint:
+                if cells is not None and not ref.symbol.pickpoint_pos.in_rect(rect):
+                    continue
                 if (self._show_symbol_pickpoints and ref.symbol.is_symbol) or \
                         (self._show_line_pickpoints and ref.symbol.is_line) or \
                         (self._show_text_pickpoints and ref.symbol.is_text):
-                    ctx.set_source_rgb(1, 0, 0)
-                    ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
                     # FIXME the pickpoint of a mostleft position (x=0) will not show as it falls of the grid
-                    pos = ref.symbol.pickpoint_pos.view_xy()
-                    # the text glyph origin is its left-bottom corner
-                    y_xbase = pos.y + Preferences.values['FONTSIZE']
-                    ctx.move_to(pos.x, y_xbase)
+                    col, row = ref.symbol.pickpoint_pos
+                    ctx.move_to(col * width, row * height + baseline)
                     ctx.show_text(MARK_CHAR)  # mark the upper-left corner
         ctx.restore()
 
     def draw_selected_objects(self, ctx):
         """Draw multiple objects selection."""
+        if self._objects_sprite is None:
+            self._objects_sprite = self.objects_sprite(ctx)
+        surface, x, y = self._objects_sprite
+        if surface is None:
+            return
         ctx.save()
-        for ref in self._objects:
-            ctx.set_source_rgb(1, 0, 0)
-            ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-            # offset between the current position and the ul position of the original selection rectangle
-            offset = self._hover_pos - ref.startpos.view_xy()
-            pos = ref.symbol.startpos.view_xy() + offset
-            ref.symbol.draw(ctx, pos)
+        ctx.set_source_surface(surface, self._hover_pos.x + x, self._hover_pos.y + y)
+        ctx.paint()
         ctx.restore()
 
+    def objects_sprite(self, ctx):
+        """
+        Rasterize the multiple objects selection, so it can be moved without redrawing each object.
+        :param ctx: the Cairo context the sprite will be painted on
+        :returns the sprite surface and its offset to the ul position of the original selection rectangle
+        """
+        recording = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None)
+        rec_ctx = cairo.Context(recording)
+        rec_ctx.set_font_matrix(ctx.get_font_matrix())
+        rec_ctx.set_source_rgb(1, 0, 0)
+        rec_ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+        for ref in self._objects:
+            # offset between the object and the ul position of the original selection rectangle
+            pos = ref.symbol.startpos.view_xy() - ref.startpos.view_xy()
+            ref.symbol.draw(rec_ctx, pos)
+        x, y, width, height = recording.ink_extents()
+        if width <= 0 or height <= 0:
+            return (None, 0, 0)
+        x, y = (math.floor(x), math.floor(y))
+        width, height = (math.ceil(width) + 1, math.ceil(height) + 1)
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        sprite_ctx = cairo.Context(surface)
+        sprite_ctx.set_source_surface(recording, -x, -y)
+        sprite_ctx.paint()
+        surface.flush()
+        return (surface, x, y)
+
     def on_button_press(self, widget, event):
         pos = self.calc_position(event.x, event.y)
         pub.sendMessage('POINTER_MOVED', pos=pos.grid_cr())
@@ -567,7 +822,7 @@ class GridView(Gtk.DrawingArea):
 
         elif self._selection.state == SELECTED:
             self.selected_state(event)
-        widget.queue_resize()
+        self.redraw()
 
     def selected_state(self, event):
         pos = self._hover_pos
@@ -608,7 +863,7 @@ class GridView(Gtk.DrawingArea):
             self._selection.state = SELECTED
             # select the object within the cursor rect
             ul = pos
-            br = ul + Pos(Preferences.values['GRIDSIZE_W'], Preferences.values['GRIDSIZE_H'])
+            br = ul + Pos(*grid_size())
             self._drag_startpos = ul
             self._drag_endpos = br
             self._selection.startpos = ul
@@ -618,9 +873,7 @@ class GridView(Gtk.DrawingArea):
 
     def calc_position(self, x, y):
         """Calculate the grid view position."""
-        pos = Pos(x, y)
-        pos.snap_to_grid()
-        return pos
+        return Pos(x, y).snap_to_grid()
 
     def on_drag_begin(self, widget, x_start, y_start):
         if self._selection.state == IDLE and self._selection.item in (DRAW_RECT, ARROW, RECT, ERASER, LINE, MAG_LINE, DIR_LINE):
@@ -634,6 +887,10 @@ class GridView(Gtk.DrawingArea):
         self._drag_prevpos = []
         self._drag_prevpos.append(pos)
         self._selection.state = SELECTING
+        if self._selection.item == MAG_LINE:
+            # the grid doesn't change while dragging the magic line preview
+            self._symbol.freeze_matches()
+        self.redraw()
 
     def on_drag_end(self, widget, x_offset, y_offset):
         if self._selection.state == SELECTING and self._selection.item in (DRAW_RECT, ARROW, RECT, ERASER, LINE, MAG_LINE, DIR_LINE):
@@ -646,6 +903,7 @@ class GridView(Gtk.DrawingArea):
         startpos = self._drag_startpos.grid_cr()
         endpos = self._drag_endpos.grid_cr()
         self._selection.state = SELECTED
+        self.redraw()
 
         if self._selection.item == DRAW_RECT:
             pub.sendMessage('PASTE_RECT', startpos=startpos, endpos=endpos)
@@ -662,9 +920,9 @@ class GridView(Gtk.DrawingArea):
 
         elif self._selection.item == LINE:
             if self._drag_dir == HORIZONTAL:
-                endpos.y = startpos.y
+                endpos = Pos(endpos.x, startpos.y)
             elif self._drag_dir == VERTICAL:
-                endpos.x = startpos.x
+                endpos = Pos(startpos.x, endpos.y)
             pub.sendMessage("PASTE_LINE", startpos=startpos, endpos=endpos, type=self._symbol.type)
 
         elif self._selection.item == MAG_LINE:
@@ -679,8 +937,9 @@ class GridView(Gtk.DrawingArea):
         else:
             return
         offset = self.calc_position(x_offset, y_offset)
-        pos = self._drag_startpos + offset
-        pos.snap_to_grid()
+        pos = (self._drag_startpos + offset).snap_to_grid()
+        if pos != self._drag_currentpos:
+            self.redraw()
 
         if self._selection.item in (DRAW_RECT, ARROW, RECT, ERASER, DIR_LINE, MAG_LINE):
             self._drag_currentpos = pos
@@ -730,8 +989,7 @@ class GridView(Gtk.DrawingArea):
     def on_hover(self, widget, event):
         if not self.has_focus():
             self.grab_focus()
-        width = Preferences.values['GRIDSIZE_W']
-        height = Preferences.values['GRIDSIZE_H']
+        width, height = grid_size()
         self._hover_pos = self.calc_position(event.x, event.y)
         delta = self._hover_previous_pos - self._hover_pos
         if abs(delta.x) > width / 2 or abs(delta.y) > height / 2:
@@ -743,6 +1001,7 @@ class GridView(Gtk.DrawingArea):
 
         if moved_enough:
             pub.sendMessage('POINTER_MOVED', pos=self._hover_pos.grid_cr())
+            self.redraw()
 
         if self._selection.state == SELECTING and \
                 self._selection.item == OBJECT:
@@ -0,0 +1,155 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import os
+from math import ceil
+
+import cairo
+
+from application import export_cache
+from application.cell_renderer import draw_cells
+from application.page_layout import content_bbox
+
+# image formats
+PNG = 'png'
+SVG = 'svg'
+
+# images are written according to their extension
+FORMATS = {'.png': PNG, '.svg': SVG}
+
+
+def image_format(filename):
+    """Return the image format for the file name, or None if it isn't an image format."""
+    return FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+class ImageExport(object):
+    """
+    Export (a region of) the grid content as PNG (raster) or SVG (vector) image.
+    The cells are laid out once, on a recording surface, which is then rendered at any zoom level,
+    e.g. a full size image and several thumbnails.
+
+    :param rows: the rows of (single character) cells, e.g. a copy of the grid content
+    :param geometry: the cell dimensions and font (Geometry) to draw with
+    :param cells: the region (start and end column and row) of cells to export, default the content (bounding box)
+    :param padding: number of empty cells around the region
+    :param background: the RGB background color, None for a transparent background
+    """
+
+    def __init__(self, rows, geometry, cells=None, padding=1, background=(1, 1, 1)):
+        if cells is None:
+            # an empty drawing results in an image of (the padding around) one empty cell
+            cells = content_bbox(rows) or (0, 0, 1, 1)
+        self._rows = rows
+        self._geometry = geometry
+        self._cells = cells
+        self._padding = padding
+        self._background = background
+        self._recording = None
+
+        c_start, r_start, c_end, r_end = cells
+        # image dimensions at zoom 1, in canvas coordinates
+        self.width = (c_end - c_start + 2 * padding) * geometry.cell_width
+        self.height = (r_end - r_start + 2 * padding) * geometry.cell_height
+
+    @property
+    def recording(self):
+        """The cells drawn on a recording surface, the layout that is rendered at each zoom level."""
+        if self._recording is None:
+            c_start, r_start, c_end, r_end = self._cells
+            self._recording = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA,
+                                                     cairo.Rectangle(0, 0, self.width, self.height))
+            ctx = cairo.Context(self._recording)
+            ctx.translate((self._padding - c_start) * self._geometry.cell_width,
+                          (self._padding - r_start) * self._geometry.cell_height)
+            draw_cells(ctx, self._rows, self._cells, self._geometry)
+        return self._recording
+
+    def size(self, zoom=1.0):
+        """Return the width and height of the image (pixels for PNG, points for SVG) at the zoom level."""
+        return max(1, ceil(self.width * zoom)), max(1, ceil(self.height * zoom))
+
+    def fit(self, max_width, max_height=None):
+        """Return the zoom level at which the image fits within the dimensions, e.g. those of a thumbnail."""
+        zoom = max_width / self.width
+        if max_height is not None:
+            zoom = min(zoom, max_height / self.height)
+        return zoom
+
+    def render(self, ctx, zoom=1.0):
+        """Render the image on the Cairo context, at the zoom level."""
+        ctx.save()
+        if self._background is not None:
+            ctx.set_source_rgb(*self._background)
+            ctx.paint()
+        ctx.scale(zoom, zoom)
+        ctx.set_source_surface(self.recording, 0, 0)
+        ctx.paint()
+        ctx.restore()
+
+    def write_png(self, filename, zoom=1.0):
+        """
+        Write the image as PNG file.
+        :param filename: the PNG file
+        :param zoom: the zoom level, at zoom 1 one (canvas) unit is one pixel
+        :returns the width and height of the image in pixels
+        """
+        width, height = self.size(zoom)
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        self.render(cairo.Context(surface), zoom)
+        surface.write_to_png(filename)
+        surface.finish()
+        return width, height
+
+    def write_svg(self, filename, zoom=1.0):
+        """
+        Write the image as SVG file.
+        :param filename: the SVG file
+        :param zoom: the zoom level, at zoom 1 one (canvas) unit is one point
+        :returns the width and height of the image in points
+        """
+        width, height = self.size(zoom)
+        surface = cairo.SVGSurface(filename, width, height)
+        self.render(cairo.Context(surface), zoom)
+        surface.finish()
+        return width, height
+
+    def write(self, filename, zoom=1.0):
+        """
+        Write the image in the format according to the extension of the file name, see FORMATS.
+        :returns the width and height of the image
+        :raises ValueError: if the extension isn't an image format
+        """
+        format = image_format(filename)
+        if format == PNG:
+            return self.write_png(filename, zoom)
+        if format == SVG:
+            return self.write_svg(filename, zoom)
+        raise ValueError("Unknown image format: {0}".format(filename))
+
+    def write_batch(self, images, progress=None, cache=None, key=None):
+        """
+        Write several images of the same content, e.g. in different formats and sizes, from one layout.
+        :param images: list of file name and zoom level pairs
+        :param progress: called with the fraction of the images that has been written
+        :param cache: the export cache (ExportCache) the images are served from, or stored in once they have been written
+        :param key: the export cache key of the drawing
+        :returns the list of the image sizes
+        """
+        sizes = []
+        for filename, zoom in images:
+            if cache is None:
+                sizes.append(self.write(filename, zoom))
+            else:
+                # each format and zoom level of the drawing is cached separately
+                image_key = export_cache.key(os.path.splitext(filename)[1].lower(), [key], zoom)
+                if cache.fetch(image_key, filename):
+                    sizes.append(self.size(zoom))
+                else:
+                    sizes.append(self.write(filename, zoom))
+                    cache.store(image_key, filename)
+            if progress is not None:
+                progress(len(sizes) / len(images))
+        return sizes
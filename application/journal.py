@@ -0,0 +1,230 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import os
+import threading
+import time
+from itertools import chain
+
+from application import memo_file
+
+JOURNAL_SUFFIX = '.journal'
+
+# the first line of a journal identifies the saved file it applies to
+HEADER = '!journal'
+# all objects are removed, e.g. when the memo is re-run
+RESET = '!reset'
+# prefix of the memo entry of a removed object, other entries are inserted objects
+REMOVED = '-'
+
+# maximum time (in seconds) the recorded changes may stay unsynced to disk
+FSYNC_INTERVAL = 2.0
+# number of entries after which the journal is compacted
+COMPACT_THRESHOLD = 10000
+
+
+def journal_name(filename):
+    """Return the name of the journal of the (saved) file."""
+    return filename + JOURNAL_SUFFIX
+
+
+def fingerprint(filename):
+    """Return the identification of the saved version of the file: its size and modification time."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return ""
+    return "{0},{1}".format(stat.st_size, stat.st_mtime_ns)
+
+
+def recover(filename, memo):
+    """
+    Apply the changes recorded in the journal of the file to its memo.
+
+    :param filename: the saved file
+    :param memo: list of the memo entries of the saved file
+    :returns the memo including the recorded changes, or None if the file has no (valid) journal
+    """
+    try:
+        with open(journal_name(filename), 'r') as fin:
+            entries = fin.readlines()
+    except (IOError, UnicodeDecodeError):
+        return None
+    if len(entries) == 0 or entries[0].rstrip('\n') != "{0} {1}".format(HEADER, fingerprint(filename)):
+        # the file has been saved (or changed otherwise) since the journal was written
+        return None
+    # a last entry that isn't terminated was written partly
+    if not entries[-1].endswith('\n'):
+        entries.pop()
+    memo = [item.rstrip('\n') for item in memo]
+    for entry in entries[1:]:
+        entry = entry.rstrip('\n')
+        if entry == RESET:
+            memo = []
+        elif entry.startswith(REMOVED):
+            try:
+                memo.remove(entry[len(REMOVED):])
+            except ValueError:
+                pass
+        else:
+            memo.append(entry)
+    return memo
+
+
+class Journal(object):
+    """
+    Append-only record of the changes to a drawing since it has been saved, to recover them after a crash.
+    An inserted object is recorded with its memo entry, a removed object with its memo entry prefixed by REMOVED.
+    The journal file is created on the first change and removed (by discard) when the changes are saved or abandoned.
+    When it has grown past the threshold, it is rewritten in the background as a full save of the drawing.
+
+    :param filename: the file the drawing has been saved in
+    :param objects_callback: returns the current objects of the drawing, for compaction
+    :param compact_threshold: number of entries after which the journal is compacted
+    :param fsync_interval: maximum time (in seconds) the recorded changes may stay unsynced to disk
+    """
+
+    def __init__(self, filename, objects_callback, compact_threshold=COMPACT_THRESHOLD, fsync_interval=FSYNC_INTERVAL):
+        self._name = journal_name(filename)
+        self._header = "{0} {1}".format(HEADER, fingerprint(filename))
+        self._objects_callback = objects_callback
+        self._compact_threshold = compact_threshold
+        self._fsync_interval = fsync_interval
+        self._fout = None
+        self._last_fsync = 0
+        # the latest changes haven't been synced, a timer syncs them within the interval
+        self._unsynced = False
+        self._flusher = None
+        self._nr_entries = 0
+        self._compact_at = compact_threshold
+        # entries recorded during compaction, to be added to the compacted journal
+        self._pending = None
+        self._compactor = None
+        # the compaction thread replaces the journal file
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def nr_entries(self):
+        return self._nr_entries
+
+    @property
+    def unsynced(self):
+        """True if recorded changes haven't been synced to disk yet."""
+        return self._unsynced
+
+    def inserted(self, symbol):
+        """Record that the symbol has been added to the drawing."""
+        self._append(symbol.memo())
+
+    def removed(self, symbol):
+        """Record that the symbol has been removed from the drawing."""
+        self._append(REMOVED + symbol.memo())
+
+    def reset(self):
+        """Record that all objects have been removed from the drawing."""
+        self._append(RESET)
+
+    def _append(self, entry):
+        with self._lock:
+            if self._fout is None:
+                self._fout = open(self._name, 'w')
+                self._fout.write(self._header + "\n")
+            self._fout.write(entry + "\n")
+            self._fout.flush()
+            delay = self._last_fsync + self._fsync_interval - time.monotonic()
+            if delay <= 0:
+                self._sync()
+            else:
+                self._unsynced = True
+                if self._flusher is None:
+                    # no further change may follow, sync this one when the interval has passed
+                    self._flusher = threading.Timer(delay, self._flush)
+                    self._flusher.daemon = True
+                    self._flusher.start()
+            self._nr_entries += 1
+            if self._pending is not None:
+                self._pending.append(entry)
+        if self._nr_entries >= self._compact_at:
+            self.compact()
+
+    def _sync(self):
+        """Sync the journal file to disk, the lock is held by the caller."""
+        os.fsync(self._fout.fileno())
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def _flush(self):
+        with self._lock:
+            self._flusher = None
+            if self._fout is not None and self._unsynced:
+                try:
+                    self._sync()
+                except OSError:
+                    pass
+
+    def compact(self):
+        """Rewrite the journal, in the background, as the full memo of the current objects."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        objects = list(self._objects_callback())
+        with self._lock:
+            self._pending = []
+        self._compactor = threading.Thread(target=self._compact, args=(objects,), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, objects):
+        tmp_name = self._name + '.compact'
+        try:
+            memo_file.write_lines(tmp_name, chain([self._header, RESET], (symbol.memo() for symbol in objects)))
+            with self._lock:
+                # the changes that have been recorded in the meantime
+                with open(tmp_name, 'a') as fout:
+                    for entry in self._pending:
+                        fout.write(entry + "\n")
+                    fout.flush()
+                    os.fsync(fout.fileno())
+                os.replace(tmp_name, self._name)
+                if self._fout is not None:
+                    if self._unsynced:
+                        self._sync()
+                    self._fout.close()
+                self._fout = open(self._name, 'a')
+                self._nr_entries = len(objects) + 1 + len(self._pending)
+                self._compact_at = self._nr_entries + self._compact_threshold
+                self._pending = None
+        except OSError:
+            # keep the journal as it is
+            with self._lock:
+                self._pending = None
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+    def wait(self):
+        """Wait for a running compaction to finish."""
+        if self._compactor is not None:
+            self._compactor.join()
+
+    def discard(self):
+        """Stop recording and remove the journal, the changes have been saved or are abandoned."""
+        self.wait()
+        with self._lock:
+            if self._flusher is not None:
+                self._flusher.cancel()
+                self._flusher = None
+            if self._fout is not None:
+                if self._unsynced:
+                    self._sync()
+                self._fout.close()
+                self._fout = None
+            try:
+                os.unlink(self._name)
+            except OSError:
+                pass
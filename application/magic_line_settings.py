@@ -30,9 +30,86 @@ from gi.repository import Pango, PangoCairo  # noqa: E402
 LineMatchingData = collections.namedtuple('line_matching_data', ['pattern', 'ori', 'char'])
 
 
+class LineMatcher(object):
+    """
+    Line matching data compiled for finding the first matching pattern.
+    The patterns are indexed by their centre character and the match results are memoized by neighbourhood.
+
+    :param lmd: the list of LineMatchingData
+    """
+
+    # maximum number of memoized match results
+    MAX_MEMO = 4096
+
+    def __init__(self, lmd):
+        self._lmd = lmd
+        self._count = len(lmd)
+        # patterns by centre character, patterns with an 'x' (any) centre match every character
+        self._by_centre = dict()
+        self._any_centre = []
+        for idx, entry in enumerate(lmd):
+            chars = [char for row in entry.pattern for char in row]
+            # only the characters that have to match (not 'x') are checked
+            checks = tuple((k, char) for k, char in enumerate(chars) if char != 'x')
+            item = (idx, entry.ori, entry.char, checks)
+            if chars[4] == 'x':
+                self._any_centre.append(item)
+            else:
+                self._by_centre.setdefault(chars[4], []).append(item)
+        self._candidates = dict()
+        self._memo = dict()
+
+    def compiled_for(self, lmd):
+        """Return True if the matcher has been compiled for this line matching data."""
+        return lmd is self._lmd and len(lmd) == self._count
+
+    def candidates(self, centre):
+        """Return the patterns that can match the centre character, in the order of the line matching data."""
+        items = self._candidates.get(centre)
+        if items is None:
+            items = sorted(self._by_centre.get(centre, []) + self._any_centre)
+            self._candidates[centre] = items
+        return items
+
+    def match(self, neighbourhood, ori=None):
+        """
+        Match the neighbourhood of a character in the grid against the Magic Line patterns.
+
+        :param neighbourhood: the 3x3 cells around (and including) the character, row by row
+        :param ori: orientation of the line to be drawn, None matches every orientation
+
+        :return: the index, orientation and terminal character of the first matching pattern, or None if there is no match
+        """
+        key = (neighbourhood, ori)
+        if key in self._memo:
+            return self._memo[key]
+        result = None
+        for idx, m_ori, m_char, checks in self.candidates(neighbourhood[4]):
+            if ori is not None and ori != m_ori:
+                continue
+            for k, char in checks:
+                if neighbourhood[k] != char:
+                    break
+            else:
+                result = (idx, m_ori, m_char)
+                break
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+
 class MagicLineSettings(object):
 
     LMD = []
+    _matcher = None
+
+    @classmethod
+    def matcher(cls):
+        """Return the compiled line matching data, it is recompiled when the settings have been changed."""
+        if cls._matcher is None or not cls._matcher.compiled_for(cls.LMD):
+            cls._matcher = LineMatcher(cls.LMD)
+        return cls._matcher
 
     def __init__(self, filename='magic_line.ini'):
         self._filename = filename
@@ -55,6 +132,8 @@ class MagicLineSettings(object):
             print(msg)
 
     def on_save_settings(self):
+        # the patterns may have been edited in place, e.g. by the settings dialog
+        MagicLineSettings._matcher = None
         try:
             fout = open(self._filename, 'w')
             fout.write(self.settings_to_str())
@@ -78,6 +157,7 @@ class MagicLineSettings(object):
 
     def load_settings_from_str(self, str):
         MagicLineSettings.LMD = []
+        MagicLineSettings._matcher = None
         for line in str.splitlines():
             item = json.loads(line)
             lmd = LineMatchingData(item['pattern'], item['ori'], item['char'])
@@ -127,6 +207,7 @@ class MagicLineSettings(object):
              ['x', 'x', 'x']], VERTICAL, '|'))
 
         MagicLineSettings.LMD = lmd
+        MagicLineSettings._matcher = None
 
 
 class MagicLineSettingsDialog(Gtk.Dialog):
@@ -262,6 +343,7 @@ class MagicLineSettingsDialog(Gtk.Dialog):
 
     def on_save_clicked(self, item):
         MagicLineSettings.LMD = self.lmd
+        MagicLineSettings._matcher = None
         pub.sendMessage('SAVE_MAGIC_LINE_SETTINGS')
 
     def on_restore_defaults_clicked(self, item):
@@ -313,8 +395,7 @@ class MatrixView(Gtk.DrawingArea):
         grid_h = Preferences.values['GRIDSIZE_H']
         x_offset = round((self._surface.get_width() - 3 * grid_w) / 2)
         y_offset = round((self._surface.get_height() - 3 * grid_h) / 2)
-        self._offset = Pos(x_offset, y_offset)
-        self._offset.snap_to_grid()
+        self._offset = Pos(x_offset, y_offset).snap_to_grid()
 
     def on_configure(self, area, event, data=None):
         self.init_surface(self)
@@ -362,9 +443,7 @@ class MatrixView(Gtk.DrawingArea):
             elif grid_pos.y > 0:
                 self._hover_pos += Pos(2, -1).view_xy()
 
-        grid_pos = self._hover_pos - self._offset
-        grid_pos.snap_to_grid()
-        grid_pos = grid_pos.grid_cr()
+        grid_pos = (self._hover_pos - self._offset).snap_to_grid().grid_cr()
         value = event.keyval
         if value in (Gdk.KEY_Shift_L, Gdk.KEY_Shift_R):
             pass
@@ -386,8 +465,7 @@ class MatrixView(Gtk.DrawingArea):
     def on_hover(self, widget, event):
         if not self.has_focus():
             self.grab_focus()
-        self._hover_pos = Pos(event.x, event.y)
-        self._hover_pos.snap_to_grid()
+        self._hover_pos = Pos(event.x, event.y).snap_to_grid()
         self.queue_resize()
 
     def on_draw(self, area, ctx):
@@ -446,19 +524,20 @@ class MatrixView(Gtk.DrawingArea):
     def draw_content(self, ctx):
         if self._matrix is None:
             return
-        grid_w = Preferences.values['GRIDSIZE_W']
-        grid_h = Preferences.values['GRIDSIZE_H']
+        geometry = Preferences.geometry
+        grid_w = geometry.cell_width
+        grid_h = geometry.cell_height
         offset = self._offset
         ctx.set_source_rgb(0.1, 0.1, 0.1)
-        use_pango_font = Preferences.values['PANGO_FONT']
+        use_pango_font = geometry.pango_font
         if use_pango_font:
             # https://sites.google.com/site/randomcodecollections/home/python-gtk-3-pango-cairo-example
             # https://developer.gnome.org/pango/stable/pango-Cairo-Rendering.html
             layout = PangoCairo.create_layout(ctx)
-            desc = Pango.font_description_from_string(Preferences.values['FONT'])
+            desc = Pango.font_description_from_string(geometry.font)
             layout.set_font_description(desc)
         else:
-            ctx.set_font_size(Preferences.values['FONTSIZE'])
+            ctx.set_font_size(geometry.font_size)
             ctx.select_font_face("monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
         y = offset.y
         for r in self._matrix:
@@ -470,7 +549,7 @@ class MatrixView(Gtk.DrawingArea):
                     PangoCairo.show_layout(ctx, layout)
                 else:
                     # the Cairo text glyph origin is its left-bottom corner
-                    ctx.move_to(x, y + Preferences.values['FONTSIZE'])
+                    ctx.move_to(x, y + geometry.font_size)
                     ctx.show_text(str(c))
                 x += grid_w
             y += grid_h
@@ -279,6 +279,7 @@ class MainWindow(Gtk.Window):
         _ = gettext.gettext
         if self._undo_stack_empty or self.show_confirmation_dlg():
             print(_("Closing application"))
+            pub.sendMessage('CLOSING_APPLICATION')
             Gtk.main_quit()
         else:
             return False
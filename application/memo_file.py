@@ -0,0 +1,158 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import gzip
+import io
+import lzma
+import os
+import tempfile
+from itertools import islice
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# number of memo lines that are joined and written at once
+CHUNK_LINES = 4096
+
+# compression formats
+GZIP = 'gzip'
+XZ = 'xz'
+ZSTD = 'zstd'
+
+# files are compressed on writing according to their extension, e.g. 'drawing.aac.gz'
+EXTENSIONS = {'.gz': GZIP, '.xz': XZ, '.zst': ZSTD}
+
+# and decompressed on reading according to their first bytes
+MAGIC = {b'\x1f\x8b': GZIP, b'\xfd7zXZ\x00': XZ, b'\x28\xb5\x2f\xfd': ZSTD}
+
+# errors raised when reading a corrupt compressed file
+DECOMPRESSION_ERRORS = (gzip.BadGzipFile, EOFError, lzma.LZMAError)
+if zstandard is not None:
+    DECOMPRESSION_ERRORS += (zstandard.ZstdError, )
+
+
+def compression_by_extension(filename):
+    """Return the compression format for the file name, or None for a plain text file."""
+    return EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def compression_by_magic(head):
+    """Return the compression format as identified by the first bytes of the file, or None for a plain text file."""
+    for magic, compression in MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise IOError("zstd compression requires the zstandard package")
+
+
+def open_text(filename):
+    """
+    Open a (memo) text file for reading, a compressed file is decompressed while it is being read.
+
+    :param filename: the plain text or gzip, xz or zstd compressed file
+    :returns a text stream that can be iterated by line
+    :raises OSError: if the file cannot be opened
+    """
+    with open(filename, 'rb') as fin:
+        compression = compression_by_magic(fin.read(max(len(magic) for magic in MAGIC)))
+    if compression == GZIP:
+        return gzip.open(filename, 'rt')
+    if compression == XZ:
+        return lzma.open(filename, 'rt')
+    if compression == ZSTD:
+        _require_zstandard()
+        return zstandard.open(filename, 'rt')
+    return open(filename, 'r')
+
+
+def _compressor(raw, compression):
+    """Return a writable (binary) stream that compresses into the raw file, it leaves the raw file open when closed."""
+    if compression == GZIP:
+        # no file name and time stamp in the header, identical content results in identical files
+        # level 6 (as the gzip command) is several times faster than the default 9, and as good for memo files
+        return gzip.GzipFile(filename='', mode='wb', compresslevel=6, fileobj=raw, mtime=0)
+    if compression == XZ:
+        return lzma.LZMAFile(raw, mode='wb')
+    if compression == ZSTD:
+        _require_zstandard()
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    return None
+
+
+def file_mode(filename):
+    """Return the permissions for the (new) file: those of the existing file, otherwise the default for a new file."""
+    try:
+        return os.stat(filename).st_mode & 0o777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_lines(filename, lines, chunk_lines=CHUNK_LINES, progress=None):
+    """
+    Write lines of text to a file, safely.
+    The lines are written in chunks to a temporary file in the same directory, which replaces the target file
+    once it is completely written and flushed to disk. If writing fails the target file is left as it was.
+    A file name with a compression extension (see EXTENSIONS) results in a compressed file.
+
+    :param filename: the target file
+    :param lines: iterable of lines, without line ending (e.g. the symbol memo entries)
+    :param chunk_lines: number of lines written at once
+    :param progress: called with the number of lines written so far, after each chunk
+    :raises OSError: if the file cannot be written
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(prefix='.' + os.path.basename(filename) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            compressor = _compressor(raw, compression_by_extension(filename))
+            fout = io.TextIOWrapper(raw if compressor is None else compressor)
+            lines = iter(lines)
+            nr_lines = 0
+            while True:
+                chunk = list(islice(lines, chunk_lines))
+                if not chunk:
+                    break
+                nr_lines += len(chunk)
+                chunk.append('')
+                fout.write("\n".join(chunk))
+                if progress is not None:
+                    progress(nr_lines)
+            fout.flush()
+            fout.detach()
+            if compressor is not None:
+                compressor.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.chmod(tmp_name, file_mode(filename))
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    _sync_directory(directory)
+
+
+def _sync_directory(directory):
+    """Flush the directory entry of a renamed file to disk, where the platform supports it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
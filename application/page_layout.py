@@ -0,0 +1,134 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import collections
+from math import ceil
+
+from application import CELL_EMPTY, PAPER_SIZES
+from application.preferences import Preferences
+
+# the part of the grid on a page, cells: start and end (exclusive) column and row
+Page = collections.namedtuple('Page', ['number', 'cells'])
+
+# default page margin in points (half an inch)
+MARGIN = 36
+
+
+def content_bbox(rows):
+    """
+    Return the bounding box of the content (the non-empty cells) of the grid.
+
+    :param rows: the rows of (single character) cells
+    :returns the start and end (exclusive) column and row, or None if all cells are empty
+    """
+    c_start = r_start = None
+    c_end = r_end = 0
+    for r, row in enumerate(rows):
+        line = "".join(row)
+        stripped = line.lstrip(CELL_EMPTY)
+        if len(stripped) == 0:
+            continue
+        left = len(line) - len(stripped)
+        right = len(line.rstrip(CELL_EMPTY))
+        if r_start is None:
+            r_start = r
+            c_start = left
+        c_start = min(c_start, left)
+        c_end = max(c_end, right)
+        r_end = r + 1
+    if r_start is None:
+        return None
+    return (c_start, r_start, c_end, r_end)
+
+
+def _split(start, end, per_page, overlap):
+    """Return the (start, end) ranges that divide the cells over pages, consecutive ranges share overlap cells."""
+    ranges = [(start, min(start + per_page, end))]
+    while ranges[-1][1] < end:
+        first = ranges[-1][1] - overlap
+        ranges.append((first, min(first + per_page, end)))
+    return ranges
+
+
+class PageLayout(object):
+    """
+    Divide the content of the grid over one or more pages.
+    The content is scaled to fit on pages_wide by pages_high pages, but it is never drawn larger than max_scale;
+    fewer pages are used if the content fits at that scale. Adjacent pages repeat overlap cells of their neighbour.
+
+    :param paper: the paper size name, see PAPER_SIZES
+    :param landscape: True for landscape orientation
+    :param size: the page width and height in points, instead of paper and landscape (e.g. those of a printer)
+    :param pages_wide: maximum number of pages across
+    :param pages_high: maximum number of pages down
+    :param max_scale: maximum scale of the grid (canvas) dimensions on paper
+    :param overlap: number of cells (columns or rows) repeated on adjacent pages
+    :param margin: page margin in points
+    """
+
+    def __init__(self, paper='A4', landscape=False, size=None, pages_wide=1, pages_high=1, max_scale=0.5, overlap=2,
+                 margin=MARGIN):
+        if size is not None:
+            width, height = size
+        else:
+            width, height = PAPER_SIZES.get(paper, PAPER_SIZES['A4'])
+            if landscape:
+                width, height = height, width
+        self.paper_width = width
+        self.paper_height = height
+        self._pages_wide = max(1, pages_wide)
+        self._pages_high = max(1, pages_high)
+        self._max_scale = max_scale
+        self._overlap = max(0, overlap)
+        # the cells are drawn from the upper-left corner of the area within the margins
+        self.margin = margin
+
+    @classmethod
+    def from_preferences(cls, size=None, margin=MARGIN):
+        """
+        Return the page layout according to the PDF/print preferences.
+
+        :param size: the page width and height in points, default the paper size preferences
+        :param margin: page margin in points
+        """
+        values = Preferences.values
+        return cls(paper=values['PAPER_SIZE'], landscape=values['LANDSCAPE'], size=size, margin=margin,
+                   pages_wide=values['PAGES_WIDE'], pages_high=values['PAGES_HIGH'],
+                   max_scale=values['PRINT_SCALE'] / 100, overlap=values['PAGE_OVERLAP'])
+
+    def layout(self, bbox, cell_width, cell_height):
+        """
+        Compute the scale and the pages to draw the content on.
+
+        :param bbox: the bounding box of the content, see content_bbox()
+        :param cell_width, cell_height: the cell dimensions in canvas coordinates (at scale 1)
+        :returns the scale and the list of pages, no pages if the content is empty
+        """
+        if bbox is None:
+            return self._max_scale, []
+        c_start, r_start, c_end, r_end = bbox
+        area_width = self.paper_width - 2 * self.margin
+        area_height = self.paper_height - 2 * self.margin
+        scale = min(self._max_scale,
+                    self._fit(area_width, cell_width, c_end - c_start, self._pages_wide),
+                    self._fit(area_height, cell_height, r_end - r_start, self._pages_high))
+        # (rounding errors aside, a fitted scale results in a whole number of cells)
+        cols_per_page = max(1, int(area_width / (cell_width * scale) + 1e-9))
+        rows_per_page = max(1, int(area_height / (cell_height * scale) + 1e-9))
+        # overlap can't be more than half a page
+        col_overlap = min(self._overlap, (cols_per_page - 1) // 2)
+        row_overlap = min(self._overlap, (rows_per_page - 1) // 2)
+        pages = []
+        for rows in _split(r_start, r_end, rows_per_page, row_overlap):
+            for cols in _split(c_start, c_end, cols_per_page, col_overlap):
+                cells = (cols[0], rows[0], cols[1], rows[1])
+                pages.append(Page(len(pages), cells))
+        return scale, pages
+
+    def _fit(self, area, cell_size, nr_cells, nr_pages):
+        """Return the scale at which the cells fit on the number of pages."""
+        # n pages, with overlap between them, show n * per_page - (n - 1) * overlap cells
+        per_page = ceil((nr_cells + (nr_pages - 1) * self._overlap) / nr_pages)
+        return area / (cell_size * max(1, per_page))
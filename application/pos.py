@@ -3,35 +3,53 @@ AACircuit
 2020-03-02 JvO
 """
 
-from math import sqrt
+from operator import itemgetter
 from application.preferences import Preferences
 
+# positions with both coordinates in the range 0..INTERN_SIZE-1 are created only once
+INTERN_SIZE = 256
 
-class Pos(object):
-    """A position on the grid (canvas)."""
 
-    def __init__(self, x, y):
-        self._x = int(x)
-        self._y = int(y)
+class Pos(tuple):
+    """
+    A position on the grid (canvas).
+    Positions are immutable: they can be shared, e.g. the small ones are interned, and used as dictionary key.
+    Operations that change a position, like snap_to_grid(), return a new position.
+    A position is an (x, y) tuple, so hashing and equality are those of the tuple
+    and inner loops can unpack it directly: col, row = pos
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, x, y):
+        return _pos(int(x), int(y))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __add__(self, other):
-        x = self._x + other.x
-        y = self._y + other.y
-        return Pos(x, y)
+        return _pos(self[0] + other[0], self[1] + other[1])
 
     def __sub__(self, other):
-        x = self._x - other.x
-        y = self._y - other.y
-        return Pos(x, y)
+        return _pos(self[0] - other[0], self[1] - other[1])
 
-    def __eq__(self, other):
-        return (self._x == other.x and self._y == other.y)
+    # positions are ordered by their distance to the origin, the squared distances give the same order
 
     def __gt__(self, other):
-        return (sqrt(self._x**2 + self._y**2) > sqrt(other._x**2 + other._y**2))
+        x, y = self
+        o_x, o_y = other
+        return x * x + y * y > o_x * o_x + o_y * o_y
 
     def __lt__(self, other):
-        return (sqrt(self._x**2 + self._y**2) < sqrt(other._x**2 + other._y**2))
+        x, y = self
+        o_x, o_y = other
+        return x * x + y * y < o_x * o_x + o_y * o_y
 
     def __ge__(self, other):
         return not (self < other)
@@ -41,55 +59,36 @@ class Pos(object):
 
     def __str__(self):
         """Return coordinates as string: e.g.: "10,12"."""
-        return "{0},{1}".format(self._x, self._y)
-
-    def __hash__(self):
-        return hash((self._x, self._y))
-
-    def __ne__(self, other):
-        return not (self == other)
+        return "{0},{1}".format(*self)
 
-    @property
-    def x(self):
-        return self._x
+    def __repr__(self):
+        return "Pos({0}, {1})".format(*self)
 
-    @ x.setter
-    def x(self, value):
-        self._x = value
+    x = property(itemgetter(0))
 
-    @property
-    def y(self):
-        return self._y
+    y = property(itemgetter(1))
 
-    @ y.setter
-    def y(self, value):
-        self._y = value
+    xy = property(tuple)
 
-    @property
-    def xy(self):
-        return (self._x, self._y)
+    def offset(self, dx, dy):
+        """Return the position moved by (dx, dy), without the need for an offset position as with `+`."""
+        return _pos(self[0] + dx, self[1] + dy)
 
     def snap_to_grid(self):
-        """Set position to the nearest (canvas) grid coordinate."""
-        (x, y) = (self._x, self._y)
-        x -= x % Preferences.values['GRIDSIZE_W']
-        y -= y % Preferences.values['GRIDSIZE_H']
-        self._x = x
-        self._y = y
+        """Return the nearest (canvas) grid coordinate."""
+        geometry = Preferences.geometry
+        x, y = self
+        return _pos(x - x % geometry.cell_width, y - y % geometry.cell_height)
 
     def grid_cr(self):
         """Map canvas (x,y) position to grid (col,row) coordinates."""
-        (x, y) = (self._x, self._y)
-        x /= Preferences.values['GRIDSIZE_W']
-        y /= Preferences.values['GRIDSIZE_H']
-        return Pos(int(x), int(y))
+        geometry = Preferences.geometry
+        return Pos(self[0] / geometry.cell_width, self[1] / geometry.cell_height)
 
     def view_xy(self):
         """Map grid (col,row) coordinates to canvas (x,y) position."""
-        (x, y) = (self._x, self._y)
-        x *= Preferences.values['GRIDSIZE_W']
-        y *= Preferences.values['GRIDSIZE_H']
-        return Pos(x, y)
+        geometry = Preferences.geometry
+        return _pos(self[0] * geometry.cell_width, self[1] * geometry.cell_height)
 
     def in_rect(self, rect):
         """
@@ -99,8 +98,28 @@ class Pos(object):
         :return True if the point lies within the rect, otherwise False
         """
         (ul, br) = rect
-        if (self._x >= ul.x and self._x < br.x and  # noqa W503
-                self._y >= ul.y and self._y < br.y):
-            return True
-        else:
-            return False
+        x, y = self
+        return ul[0] <= x < br[0] and ul[1] <= y < br[1]
+
+
+def grid_size():
+    """
+    Return the (width, height) of a grid cell in canvas coordinates.
+    For inner loops that map many (col,row) coordinates, as tuples, to canvas (x,y) coordinates.
+    """
+    geometry = Preferences.geometry
+    return (geometry.cell_width, geometry.cell_height)
+
+
+_interned = [None] * (INTERN_SIZE * INTERN_SIZE)
+
+
+def _pos(x, y, new=tuple.__new__):
+    """Return the position for integer coordinates, without the overhead of calling the class."""
+    if 0 <= x < INTERN_SIZE and 0 <= y < INTERN_SIZE:
+        idx = y * INTERN_SIZE + x
+        pos = _interned[idx]
+        if pos is None:
+            pos = _interned[idx] = new(Pos, (x, y))
+        return pos
+    return new(Pos, (x, y))
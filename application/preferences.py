@@ -10,6 +10,7 @@ import collections
 from pubsub import pub
 from application import gettext as _
 from application import get_path_to_data
+from application import PAPER_SIZES
 
 import gi
 gi.require_version('Gtk', '3.0')
@@ -17,6 +18,9 @@ from gi.repository import Gtk  # noqa: E402
 
 PreferenceSetting = collections.namedtuple('PreferenceSetting', ['type', 'entry'])
 
+# the cell dimensions (in canvas coordinates) and the font the grid is drawn with, see Preferences.geometry
+Geometry = collections.namedtuple('Geometry', ['cell_width', 'cell_height', 'font_size', 'pango_font', 'font'])
+
 
 class Preferences(object):
 
@@ -50,6 +54,23 @@ class Preferences(object):
     values['TERMINAL4'] = "'"
     values['TERMINAL4_VERT'] = "."
 
+    # PDF export and printing, see PageLayout
+    values['PAPER_SIZE'] = 'A4'
+    values['LANDSCAPE'] = False
+    # the drawing is scaled down to fit on (at most) the number of pages wide and high
+    values['PAGES_WIDE'] = 1
+    values['PAGES_HIGH'] = 1
+    # maximum scale in percent
+    values['PRINT_SCALE'] = 50
+    # number of columns/rows repeated on adjacent pages
+    values['PAGE_OVERLAP'] = 2
+    # PNG/SVG image export, zoom in percent (at 100% one cell is GRIDSIZE_W by GRIDSIZE_H pixels)
+    values['IMAGE_ZOOM'] = 100
+
+    # snapshot of the preference values used for drawing, which is rebuilt when the preferences are read or saved
+    # so that the drawing code doesn't have to look up the values for every cell
+    geometry = None
+
     def __init__(self, filename='aacircuit.ini'):
         self._filename = filename
         self.read_preferences()
@@ -84,12 +105,23 @@ class Preferences(object):
         """Set the value for preference with the given name."""
         self.values[name] = value
 
+    @classmethod
+    def update_geometry(cls):
+        """Rebuild the geometry snapshot from the current preference values."""
+        values = cls.values
+        # the font settings are missing in older preference files
+        cls.geometry = Geometry(values['GRIDSIZE_W'], values['GRIDSIZE_H'], values['FONTSIZE'],
+                                values.get('PANGO_FONT', False), values.get('FONT', 'monospace'))
+        return cls.geometry
+
     def read_preferences(self):
         try:
             file = open(self._filename, 'r')
             str = file.read()
             file.close()
-            Preferences.values = json.loads(str)
+            # preference files of older versions lack the newer settings, those keep their default value
+            Preferences.values.update(json.loads(str))
+            Preferences.update_geometry()
             msg = _("Preferences have been read from: %s" % self._filename)
             # pub.sendMessage('STATUS_MESSAGE', msg=msg)
             print(msg)
@@ -111,6 +143,9 @@ class Preferences(object):
             pub.sendMessage('STATUS_MESSAGE', msg=msg)
 
 
+Preferences.update_geometry()
+
+
 class NumberEntry(Gtk.Entry):
 
     def __init__(self):
@@ -178,7 +213,7 @@ class PreferencesDialog(Gtk.Dialog):
         Arguments pass in must be passed from __new__().
         """
         builder.connect_signals(self)
-        self.set_default_size(350, 600)
+        self.set_default_size(350, 800)
 
         # Add any other initialization here
 
@@ -189,6 +224,8 @@ class PreferencesDialog(Gtk.Dialog):
         self.init_lines_prefs(frame)
         frame = builder.get_object('magic_line')
         self.init_magic_line_prefs(frame)
+        frame = builder.get_object('print')
+        self.init_print_prefs(frame)
         self.show_all()
 
     def entry_string(self, container, row, label_txt, name):
@@ -224,6 +261,19 @@ class PreferencesDialog(Gtk.Dialog):
         container.attach(entry, 1, row, 1, 1)
         self.entries[name] = PreferenceSetting('font', entry)
 
+    def entry_choice(self, container, row, label_txt, name, choices):
+        label = Gtk.Label(label_txt)
+        label.set_alignment(0, 0)
+        container.attach(label, 0, row, 1, 1)
+
+        entry = Gtk.ComboBoxText()
+        for choice in choices:
+            entry.append_text(choice)
+        if Preferences.values[name] in choices:
+            entry.set_active(choices.index(Preferences.values[name]))
+        container.attach(entry, 1, row, 1, 1)
+        self.entries[name] = PreferenceSetting('choice', entry)
+
     def entry_bool(self, container, row, label_txt, name):
         label = Gtk.Label(label_txt)
         label.set_alignment(0, 0)
@@ -290,6 +340,26 @@ class PreferencesDialog(Gtk.Dialog):
         row += 1
         self.entry_string(grid, row, _("Lower corner char"), 'LOWER_CORNER')
 
+    def init_print_prefs(self, frame):
+        grid = Gtk.Grid()
+        grid.set_row_spacing(5)
+        grid.set_column_spacing(5)
+        frame.add(grid)
+        row = 0
+        self.entry_choice(grid, row, _("Paper size"), 'PAPER_SIZE', list(PAPER_SIZES))
+        row += 1
+        self.entry_bool(grid, row, _("Landscape"), 'LANDSCAPE')
+        row += 1
+        self.entry_dimension(grid, row, _("Pages wide"), 'PAGES_WIDE')
+        row += 1
+        self.entry_dimension(grid, row, _("Pages high"), 'PAGES_HIGH')
+        row += 1
+        self.entry_dimension(grid, row, _("Maximum scale (%)"), 'PRINT_SCALE')
+        row += 1
+        self.entry_dimension(grid, row, _("Page overlap (cells)"), 'PAGE_OVERLAP')
+        row += 1
+        self.entry_dimension(grid, row, _("Image zoom (%)"), 'IMAGE_ZOOM')
+
     def on_ok_clicked(self, item):
         for key, setting in self.entries.items():
             if setting.type == 'str':
@@ -300,5 +370,9 @@ class PreferencesDialog(Gtk.Dialog):
                 value = setting.entry.get_active()
             elif setting.type == 'font':
                 value = setting.entry.get_font_name()
+            elif setting.type == 'choice':
+                value = setting.entry.get_active_text()
             Preferences.values[key] = value
+        # before the listeners redraw with the new values
+        Preferences.update_geometry()
         pub.sendMessage('SAVE_PREFERENCES')
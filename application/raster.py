@@ -0,0 +1,121 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+from application.pos import Pos
+from application import CELL_ERASE
+
+
+class Raster(object):
+    """
+    Compact representation of characters on the grid, as runs (spans) of characters.
+    A span starts at a (col, row) position and advances (dcol, drow) for each character of its text,
+    e.g. a horizontal line is one span with step (1, 0).
+    Where spans overlap, the span that has been added last determines the character.
+    """
+
+    def __init__(self):
+        # list of (col, row, dcol, drow, text)
+        self._spans = []
+        # bounding boxes of the spans, to find out if spans overlap
+        self._boxes = []
+        self._overlapping = False
+
+    def __len__(self):
+        """Return the number of spans."""
+        return len(self._spans)
+
+    @property
+    def spans(self):
+        return self._spans
+
+    @property
+    def overlapping(self):
+        """True if at least two spans (might) overlap."""
+        return self._overlapping
+
+    def add(self, col, row, dcol, drow, text):
+        """
+        Add a span of characters.
+        :param col, row: grid coordinates of the first character
+        :param dcol, drow: step to the next character
+        :param text: the characters
+        """
+        self._add(col, row, dcol, drow, text, len(self._boxes))
+
+    def _add(self, col, row, dcol, drow, text, nr_boxes):
+        """Add a span of characters, only the spans of the first nr_boxes bounding boxes may overlap it."""
+        if len(text) == 0:
+            return
+        n = len(text) - 1
+        col_end = col + n * dcol
+        row_end = row + n * drow
+        box = (min(col, col_end), min(row, row_end), max(col, col_end), max(row, row_end))
+        if not self._overlapping:
+            boxes = self._boxes
+            for i in range(nr_boxes):
+                other = boxes[i]
+                # a (conservative) bounding box test, exact for horizontal and vertical spans
+                if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                    self._overlapping = True
+                    break
+        self._boxes.append(box)
+        self._spans.append((col, row, dcol, drow, text))
+
+    def add_points(self, points, char):
+        """
+        Add a character at each of the points, consecutive points with the same step are combined into one span.
+        :param points: sequence of distinct (col, row) coordinates, e.g. of a straight line
+        :param char: the character
+        """
+        points = list(points)
+        # the spans of distinct points don't overlap each other, only the spans added before
+        nr_boxes = len(self._boxes)
+        start = 0
+        while start < len(points):
+            col, row = points[start]
+            end = start + 1
+            dcol, drow = (1, 0)
+            if end < len(points):
+                dcol = points[end][0] - col
+                drow = points[end][1] - row
+                while end < len(points) and points[end][0] - points[end - 1][0] == dcol and points[end][1] - points[end - 1][1] == drow:
+                    end += 1
+            self._add(col, row, dcol, drow, char * (end - start), nr_boxes)
+            start = end
+
+    def cells(self):
+        """
+        Iterate over the characters on the grid, overlapping spans are resolved.
+        :returns (col, row, char) tuples
+        """
+        if self._overlapping:
+            cells = dict()
+            for col, row, dcol, drow, text in self._spans:
+                for i, char in enumerate(text):
+                    cells[(col + i * dcol, row + i * drow)] = char
+            for (col, row), char in cells.items():
+                yield col, row, char
+        else:
+            for col, row, dcol, drow, text in self._spans:
+                for i, char in enumerate(text):
+                    yield col + i * dcol, row + i * drow, char
+
+    def as_dict(self):
+        """Return the characters as dictionary of positions in grid (col,row) coordinates and the character on each position."""
+        return {Pos(col, row): char for col, row, char in self.cells()}
+
+    def paste(self, grid):
+        """Write the characters in the grid."""
+        if self._overlapping:
+            for col, row, char in self.cells():
+                grid.set_cell(Pos(col, row), char)
+        else:
+            for col, row, dcol, drow, text in self._spans:
+                grid.set_span(col, row, dcol, drow, text)
+
+    def erase(self, grid):
+        """Erase the cells covered by the characters in the grid."""
+        for col, row, dcol, drow, text in self._spans:
+            grid.set_span(col, row, dcol, drow, [CELL_ERASE] * len(text))
@@ -0,0 +1,63 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import gi
+
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib  # noqa: E402
+
+
+class RedrawScheduler(object):
+    """
+    Coalesce the redraw requests of a widget into at most one redraw per frame clock tick.
+
+    :param widget: the Gtk.Widget to be redrawn
+    """
+
+    def __init__(self, widget):
+        self._widget = widget
+        # the areas to be redrawn, an empty list with _full set redraws the whole widget
+        self._areas = []
+        self._full = False
+        self._tick_id = None
+        # statistics
+        self.nr_requested = 0
+        self.nr_performed = 0
+
+    @property
+    def pending(self):
+        return self._tick_id is not None
+
+    def request(self, rect=None):
+        """
+        Request a redraw, to be performed at the next frame clock tick.
+        :param rect: the (x, y, width, height) rectangle to be redrawn, None redraws the whole widget
+        """
+        self.nr_requested += 1
+        if rect is None:
+            self._full = True
+            self._areas = []
+        elif not self._full:
+            self._areas.append(rect)
+        if self._tick_id is None:
+            self._tick_id = self._widget.add_tick_callback(self.on_tick)
+
+    def on_tick(self, widget, frame_clock, user_data=None):
+        self.flush()
+        return GLib.SOURCE_REMOVE
+
+    def flush(self):
+        """Perform the pending redraw requests."""
+        if self._tick_id is None:
+            return
+        self._tick_id = None
+        if self._full:
+            self._widget.queue_draw()
+        else:
+            for x, y, width, height in self._areas:
+                self._widget.queue_draw_area(x, y, width, height)
+        self._full = False
+        self._areas = []
+        self.nr_performed += 1
@@ -8,7 +8,7 @@ from application import HORIZONTAL, VERTICAL
 from application.preferences import Preferences
 from application import IDLE, SELECTING, SELECTED, DRAG
 from application import OBJECT, TEXT, TEXT_BLOCK, COL, ROW, RECT, ERASER
-from application.pos import Pos
+from application.pos import Pos, grid_size
 
 
 class Selection(object):
@@ -163,8 +163,7 @@ class SelectionArrow(Selection):
         ctx.new_path()
         cmd = ctx.move_to
         for p in poly:
-            p.snap_to_grid()
-            cmd(p.x, p.y)
+            cmd(*p.snap_to_grid().xy)
             cmd = ctx.line_to
 
     def draw(self, ctx):
@@ -212,8 +211,9 @@ class SelectionCol(Selection):
             ctx.new_path()
             ctx.move_to(x, 0)
             ctx.line_to(x, self._maxpos.y)
-            ctx.move_to(x + Preferences.values['GRIDSIZE_W'], 0)
-            ctx.line_to(x + Preferences.values['GRIDSIZE_W'], self._maxpos.y)
+            width = Preferences.geometry.cell_width
+            ctx.move_to(x + width, 0)
+            ctx.line_to(x + width, self._maxpos.y)
             ctx.stroke()
 
 
@@ -240,8 +240,9 @@ class SelectionRow(Selection):
             ctx.new_path()
             ctx.move_to(0, y)
             ctx.line_to(self._maxpos.x, y)
-            ctx.move_to(0, y + Preferences.values['GRIDSIZE_H'])
-            ctx.line_to(self._maxpos.x, y + Preferences.values['GRIDSIZE_H'])
+            height = Preferences.geometry.cell_height
+            ctx.move_to(0, y + height)
+            ctx.line_to(self._maxpos.x, y + height)
             ctx.stroke()
 
 
@@ -260,15 +261,16 @@ class SelectionText(Selection):
         self._text = value
 
     def draw(self, ctx):
+        width, height = grid_size()
         y = self._startpos.y
         str = self._text.split('\n')
         for line in str:
             x = self._startpos.x
             for char in line:
-                x += Preferences.values['GRIDSIZE_W']
+                x += width
                 ctx.move_to(x, y)
                 ctx.show_text(char)
-            y += Preferences.values['GRIDSIZE_H']  # TODO check max?
+            y += height  # TODO check max?
 
 
 class SelectionTextBlock(SelectionText):
@@ -3,27 +3,27 @@ AACircuit
 2020-03-02 JvO
 '''
 
-import copy
 import json
-import re
 from pubsub import pub
-from bresenham import bresenham
-from math import pi, radians, atan
+from bisect import bisect_left
+from math import tan, radians, isqrt
 
 from application import gettext as _
 from application.preferences import Preferences
 from application.magic_line_settings import MagicLineSettings
 from application.pos import Pos
-from application import CELL_ERASE
+from application.raster import Raster
+from application import bresenham
+from application import CELL_ERASE, CELL_EMPTY, CELL_ERASE_CHAR
 from application import INSERT, COL, ROW
 from application import HORIZONTAL, VERTICAL, LONGEST_FIRST
-from application import ERASER, COMPONENT, CHARACTER, TEXT, DRAW_RECT, LINE, MAG_LINE, DIR_LINE, ARROW
+from application import ERASER, COMPONENT, CHARACTER, TEXT, DRAW_RECT, LINE, MAG_LINE, DIR_LINE, ARROW, BLOCK
 
 
 def show_text(ctx, x, y, text):
     """Show text on a canvas position taking into account the Cairo glyph origin."""
     # the Cairo text glyph origin is its left-bottom corner
-    y += Preferences.values['FONTSIZE']
+    y += Preferences.geometry.font_size
     ctx.move_to(x, y)
     ctx.show_text(text)
     return
@@ -69,6 +69,12 @@ class Symbol(object):
         self._is_symbol = True
         self._is_text = False
         self._is_line = False
+        # the representation is computed on first use, see repr
+        self._repr = None
+        # span based representation, used instead of the dictionary representation if set
+        self._raster = None
+        # the pick position is computed on first use, see pickpoint_pos
+        self._pickpoint = None
 
     def __str__(self):
         str = _("Class: {0} id: {1} ori: {2} startpos: {3}").format(self.__class__.__name__, self._id, self.ORIENTATION[self._ori], self.startpos)
@@ -76,15 +82,12 @@ class Symbol(object):
 
     def _representation(self):
         self._repr = dict()
-        pos = self._startpos
-        incr = Pos(1, 0)
-        for row in self.grid:
-            pos.x = self._startpos.x
-            for char in row:
+        col, row = self._startpos.xy
+        for text in self.grid:
+            for i, char in enumerate(text):
                 if char != ' ':
-                    self._repr[pos] = char
-                pos += incr
-            pos += Pos(0, 1)
+                    self._repr[Pos(col + i, row)] = char
+            row += 1
 
     @property
     def name(self):
@@ -117,16 +120,18 @@ class Symbol(object):
         '|......' => 'x|......'
         '.......' => '.......x' => empty first line not expected, see the component library content
 
+        The position only changes with the start position, orientation or mirroring of the symbol,
+        so it is computed once and kept until one of these changes.
         """
-        first_row = self.grid[0]
-        found = re.search(r'\S', first_row)
-        if found:
-            x_offset = found.start()
-            x_offset -= 1
-        else:
-            x_offset = 0
-        pos = Pos(self._startpos.x + x_offset, self._startpos.y)
-        return pos
+        if self._pickpoint is None:
+            first_row = self.grid[0]
+            x_offset = len(first_row) - len(first_row.lstrip())
+            if x_offset < len(first_row):
+                x_offset -= 1
+            else:
+                x_offset = 0
+            self._pickpoint = self._startpos.offset(x_offset, 0)
+        return self._pickpoint
 
     @property
     def id(self):
@@ -145,6 +150,7 @@ class Symbol(object):
         # orientation can be set as the grid is dynamically selected (in grid() method)
         if value in (0, 1, 2, 3):
             self._ori = value
+            self._invalidate()
 
     @property
     def mirrored(self):
@@ -154,6 +160,7 @@ class Symbol(object):
     def mirrored(self, value):
         """Set to True to show the symbol vertically mirrored, otherwise False."""
         self._mirrored = value
+        self._invalidate()
 
     @property
     def startpos(self):
@@ -162,6 +169,7 @@ class Symbol(object):
     @startpos.setter
     def startpos(self, value):
         self._startpos = value
+        self._invalidate()
 
     @property
     def endpos(self):
@@ -170,6 +178,13 @@ class Symbol(object):
     @endpos.setter
     def endpos(self, value):
         self._endpos = value
+        self._invalidate()
+
+    def _invalidate(self):
+        """Discard the representation and pick position, they are computed again on first use."""
+        self._repr = None
+        self._raster = None
+        self._pickpoint = None
 
     @property
     def default(self):
@@ -188,19 +203,38 @@ class Symbol(object):
         The representation in ASCII characters of the symbol on a grid.
         :returns a dictionary of positions in grid (col,row) coordinates and the character to be shown on each position.
         """
+        if self._repr is None and self._raster is None:
+            self._representation()
+        if self._repr is None:
+            # the dictionary of the raster is composed once, until the representation is invalidated
+            self._repr = self._raster.as_dict()
         return self._repr
 
+    def cells(self):
+        """Return the (col, row) coordinates of the cells the symbol is represented on."""
+        if self._repr is None and self._raster is None:
+            self._representation()
+        if self._raster is not None:
+            return {(col, row) for col, row, char in self._raster.cells()}
+        return {pos.xy for pos in self._repr.keys()}
+
     def memo(self):
         """Return entry for the actions as recorded in the memo."""
         str = "{0}:{1},{2},{3},{4}".format(COMPONENT, self._id, self._ori, self._mirrored, self._startpos)
         return str
 
     def copy(self):
-        ori = copy.deepcopy(self._ori)
-        mirrored = copy.deepcopy(self._mirrored)
-        startpos = copy.deepcopy(self._startpos)
-        endpos = copy.deepcopy(self._endpos)
-        return Symbol(id=self._id, grid=self._grid, ori=ori, mirrored=mirrored, startpos=startpos, endpos=endpos)
+        """
+        Return a copy of the symbol.
+        The attributes are shared with the copy: the template data (e.g. the character-grid) isn't changed
+        and positions are immutable, a changed position or orientation is a new value for the copy only.
+        The representation of the copy is computed on first use.
+        """
+        clone = object.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone._repr = None
+        clone._raster = None
+        return clone
 
     @property
     def grid(self):
@@ -216,6 +250,7 @@ class Symbol(object):
         """Return the grid with the next (90 degrees clockwise rotated) orientation for this symbol."""
         self._ori += 1
         self._ori %= 4
+        self._invalidate()
 
         return self.grid
 
@@ -225,23 +260,41 @@ class Symbol(object):
         :param ctx: the Cairo context
         :param pos: target position in grid canvas (x,y) coordinates
         """
-        self._representation()
+        if self._repr is None and self._raster is None:
+            self._representation()
         if pos is None:
             pos = self._startpos.view_xy()
-        offset = pos - self._startpos.view_xy()
-        for pos, char in self._repr.items():
-            grid_pos = pos.view_xy() + offset
-            show_text(ctx, grid_pos.x, grid_pos.y, char)
+        geometry = Preferences.geometry
+        width = geometry.cell_width
+        height = geometry.cell_height
+        x_offset, y_offset = (pos - self._startpos.view_xy()).xy
+        # the Cairo text glyph origin is its left-bottom corner
+        y_offset += geometry.font_size
+        if self._raster is not None:
+            cells = self._raster.cells()
+        else:
+            cells = ((col, row, char) for (col, row), char in self._repr.items())
+        for col, row, char in cells:
+            ctx.move_to(col * width + x_offset, row * height + y_offset)
+            ctx.show_text(char)
 
     def paste(self, grid):
         """Paste the symbol in the target grid at its start position."""
-        self._representation()
+        if self._repr is None and self._raster is None:
+            self._representation()
+        if self._raster is not None:
+            self._raster.paste(grid)
+            return
         for pos, value in self._repr.items():
             grid.set_cell(pos, value)
 
     def remove(self, grid):
         """Remove the symbol from the target grid."""
-        self._representation()
+        if self._repr is None and self._raster is None:
+            self._representation()
+        if self._raster is not None:
+            self._raster.erase(grid)
+            return
         for pos in self._repr.keys():
             grid.set_cell(pos, CELL_ERASE)
 
@@ -278,18 +331,13 @@ class Eraser(Symbol):
         """
         super(Eraser, self).__init__(grid=None, startpos=startpos)
         self._size = size
-        self._representation()
 
     def _representation(self):
         self._repr = dict()
-        pos = self._startpos
-        incr = Pos(1, 0)
-        for row in range(self._size[1]):
-            pos.x = self._startpos.x
-            for col in range(self._size[0]):
-                self._repr[pos] = CELL_ERASE
-                pos += incr
-            pos += Pos(0, 1)
+        col, row = self._startpos.xy
+        for j in range(self._size[1]):
+            for i in range(self._size[0]):
+                self._repr[Pos(col + i, row + j)] = CELL_ERASE
 
     def draw(self, ctx, pos=None):
         """
@@ -312,9 +360,6 @@ class Eraser(Symbol):
         str = "{0}:{1},{2},{3}".format(ERASER, self._size[0], self._size[1], self._startpos)
         return str
 
-    def copy(self):
-        return Eraser(size=self._size, startpos=self._startpos)
-
 
 class Character(Symbol):
 
@@ -328,7 +373,6 @@ class Character(Symbol):
         self._char = char
         self._is_symbol = False
         self._is_text = True
-        self._representation()
 
     @property
     def grid(self):
@@ -338,10 +382,6 @@ class Character(Symbol):
         str = "{0}:{1},{2}".format(CHARACTER, self._id, self._startpos)
         return str
 
-    def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        return Character(self._char, grid=self._grid, startpos=startpos)
-
     def rotate(self):
         # raise NotImplementedError
         pass
@@ -355,29 +395,21 @@ class Text(Symbol):
         self._text = text
         self._is_symbol = False
         self._is_text = True
-        self._representation()
 
     def _representation(self):
         self._repr = dict()
-        startpos = self._startpos
-        pos = self._startpos
+        col, row = self._startpos.xy
         str = self._text.split('\n')
         if self._ori == 0 or self._ori == 2:
-            for line in str:
-                pos.x = startpos.x
-                for char in line:
+            for j, line in enumerate(str):
+                for i, char in enumerate(line):
                     if char != ' ':
-                        self._repr[pos] = char
-                    pos += Pos(1, 0)
-                pos += Pos(0, 1)
+                        self._repr[Pos(col + i, row + j)] = char
         elif self._ori == 1 or self._ori == 3:
-            for line in str:
-                pos.y = startpos.y
-                for char in line:
+            for i, line in enumerate(str):
+                for j, char in enumerate(line):
                     if char != ' ':
-                        self._repr[pos] = char
-                    pos += Pos(0, 1)
-                pos += Pos(1, 0)
+                        self._repr[Pos(col + i, row + j)] = char
 
     @property
     def grid(self):
@@ -390,16 +422,81 @@ class Text(Symbol):
     @text.setter
     def text(self, value):
         self._text = value
+        self._invalidate()
 
     def memo(self):
         jstext = json.dumps(self._text)
         str = "{0}:{1},{2},{3}".format(TEXT, self._ori, self._startpos, jstext)
         return str
 
-    def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        ori = copy.deepcopy(self._ori)
-        return Text(pos=startpos, text=self._text, ori=ori)
+
+class Block(Symbol):
+    """
+    A rectangle of characters as one object, e.g. imported ASCII art, instead of a Text for each line.
+    As in a Text, spaces are transparent. The rows are written in the grid at once, see Grid.set_block().
+
+    :param pos: the upper-left corner (col,row) coordinate of the rectangle
+    :param lines: the rows of characters
+    """
+
+    def __init__(self, pos, lines):
+        grid = {"N": ['?']}
+        super(Block, self).__init__(grid=grid, startpos=pos)
+        # trailing spaces (and line endings) show nothing
+        self._lines = [line.rstrip(' \r\n') for line in lines]
+        self._is_symbol = False
+        self._is_text = True
+
+    def _representation(self):
+        self._repr = dict()
+        col, row = self._startpos.xy
+        for j, line in enumerate(self._lines):
+            for i, char in enumerate(line):
+                if char == CELL_ERASE_CHAR:
+                    self._repr[Pos(col + i, row + j)] = CELL_ERASE
+                elif char != ' ':
+                    self._repr[Pos(col + i, row + j)] = char
+
+    def cells(self):
+        col, row = self._startpos.xy
+        return {(col + i, row + j) for j, line in enumerate(self._lines) for i, char in enumerate(line) if char != ' '}
+
+    @property
+    def grid(self):
+        return self._grid[self.ORIENTATION[0]]
+
+    @property
+    def lines(self):
+        return self._lines
+
+    def rotate(self):
+        """A block isn't rotated."""
+        return self.grid
+
+    def draw(self, ctx, pos=None):
+        if pos is None:
+            pos = self._startpos.view_xy()
+        geometry = Preferences.geometry
+        x, y = pos.xy
+        for line in self._lines:
+            for i, char in enumerate(line):
+                if char != ' ' and char != CELL_ERASE_CHAR:
+                    show_text(ctx, x + i * geometry.cell_width, y, char)
+            y += geometry.cell_height
+
+    def paste(self, grid):
+        col, row = self._startpos.xy
+        grid.set_block(col, row, self._lines)
+
+    def remove(self, grid):
+        col, row = self._startpos.xy
+        grid.set_block(col, row, self._lines, erase=True)
+
+    def memo(self):
+        # the rows as JSON array
+        jslines = json.dumps(self._lines)
+        str = "{0}:{1},{2}".format(BLOCK, self._startpos, jslines)
+        return str
 
 
 class Line(Symbol):
@@ -428,7 +525,6 @@ class Line(Symbol):
         self._terminal = self.TERMINAL_TYPE[self._type]
         self._is_symbol = False
         self._is_line = True
-        self._representation()
 
     def _direction(self):
         dx, dy = (self._endpos - self._startpos).xy
@@ -440,47 +536,68 @@ class Line(Symbol):
     def _representation(self):
         """Compose the line elements."""
         self._direction()
-        self._repr = dict()
-        terminal = self._terminal
+        raster = Raster()
+        Line.rasterize(raster, self._startpos, self._endpos, self._type)
+        self._raster = raster
+
+    @classmethod
+    def rasterize(cls, raster, startpos, endpos, type):
+        """
+        Add a line, with the same characters as its representation, as a single span to the raster.
+        :param raster: the target Raster
+        :param startpos: start position in grid (col,row) coordinates
+        :param endpos: end position in grid (col,row) coordinates
+        :param type: line type, e.g. Line.LINE1
+        """
+        x1, y1 = startpos.xy
+        x2, y2 = endpos.xy
+        terminal = cls.TERMINAL_TYPE[type]
         start_terminal = terminal
-        start = self._startpos
-        end = self._endpos
-        pos = start
-        if self._dir == HORIZONTAL:
+        # positions are compared by their distance to the origin (see Pos), squared to stay with integers
+        start_norm = x1 * x1 + y1 * y1
+        end_norm = x2 * x2 + y2 * y2
+        if abs(x2 - x1) > abs(y2 - y1):
             line_char = Preferences.values['LINE_HOR']
-            incr = Pos(1, 0)
-            if start > end:
+            if start_norm > end_norm:
                 # line drawn from right-to-left
-                pos = Pos(end.x, start.y)
-                end = start
-
-        elif self._dir == VERTICAL:
-            if self._type == self.LINE4:
+                col, row, norm = (x2, y1, start_norm)
+            else:
+                col, row, norm = (x1, y1, end_norm)
+            length = cls._length(col, row, norm)
+            dcol, drow = (1, 0)
+        else:
+            if type == cls.LINE4:
                 start_terminal = Preferences.values['TERMINAL4_VERT']
             line_char = Preferences.values['LINE_VERT']
-            incr = Pos(0, 1)
-            if start > end:
-                # line drawn from right-to-left
-                pos = Pos(start.x, end.y)
-                end = start
-        else:
-            line_char = "?"
-            incr = Pos(1, 1)
-
-        # startpoint terminal
+            if start_norm > end_norm:
+                # line drawn from bottom-to-top
+                col, row, norm = (x1, y2, start_norm)
+            else:
+                col, row, norm = (x1, y1, end_norm)
+            length = cls._length(row, col, norm)
+            dcol, drow = (0, 1)
         if start_terminal is None:
-            self._repr[pos] = line_char
-        else:
-            self._repr[pos] = start_terminal
-        pos += incr
-        while pos < end:
-            self._repr[pos] = line_char
-            pos += incr
-        # endpoint terminal
-        if self._terminal is None:
-            self._repr[pos] = line_char
-        else:
-            self._repr[pos] = self._terminal
+            start_terminal = line_char
+        if terminal is None:
+            terminal = line_char
+        raster.add(col, row, dcol, drow, start_terminal + line_char * (length - 2) + terminal)
+
+    @staticmethod
+    def _length(start, other, norm):
+        """
+        Return the number of characters of a line that starts at the coordinate start and ends
+        where its squared distance to the origin reaches norm, with at least two characters (the terminals).
+        :param start: start coordinate along the line
+        :param other: the coordinate perpendicular to the line
+        :param norm: squared distance to the origin of the end position
+        """
+        rest = norm - other * other
+        end = 0
+        if rest > 0:
+            end = isqrt(rest)
+            if end * end < rest:
+                end += 1
+        return max(start + 1, end) - start + 1
 
     @property
     def pickpoint_pos(self):
@@ -490,12 +607,6 @@ class Line(Symbol):
         # TODO enable to rotate (from HOR to VERT)?
         pass
 
-    def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        endpos = copy.deepcopy(self._endpos)
-        type = copy.deepcopy(self._type)
-        return Line(startpos, endpos, type)
-
     def memo(self):
         str = "{0}:{1},{2},{3}".format(LINE, self._type, self._startpos, self._endpos)
         return str
@@ -510,46 +621,37 @@ class DirLine(Line):
 
     def __init__(self, startpos, endpos):
         super(DirLine, self).__init__(startpos=startpos, endpos=endpos)
-        self._representation()
 
     def _representation(self):
-        x, y = (self._endpos - self._startpos).xy
-        # TODO better representation of straight line (using ASCII chars)?
-        if abs(x) > 0:
-            angle = atan(y / x)
-        else:
-            angle = pi / 2
-        if angle < radians(-75):
-            linechar = '|'
-        if angle >= radians(-75) and angle <= radians(-52):
-            linechar = '.'
-        elif angle > radians(-52) and angle <= radians(-37):
-            linechar = '/'
-        elif angle > radians(-37) and angle <= radians(-15):
-            linechar = '.'
-        elif angle > radians(-15) and angle <= radians(15):
-            linechar = '-'
-        elif angle > radians(15) and angle <= radians(37):
-            linechar = '.'
-        elif angle > radians(37) and angle <= radians(52):
-            linechar = '\\'
-        elif angle > radians(52) and angle <= radians(75):
-            linechar = '.'
-        elif angle > radians(75):
-            linechar = '|'
-        else:
-            linechar = '?'
-        repr = dict()
-        line = bresenham(self._startpos.x, self._startpos.y, self._endpos.x, self._endpos.y)
-        for coord in line:
-            pos = Pos(coord[0], coord[1])
-            repr[pos] = linechar
-        self._repr = repr
+        raster = Raster()
+        DirLine.rasterize(raster, self._startpos, self._endpos)
+        self._raster = raster
 
-    def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        endpos = copy.deepcopy(self._endpos)
-        return DirLine(startpos, endpos)
+    @classmethod
+    def rasterize(cls, raster, startpos, endpos):
+        """
+        Add a straight line, with the same characters as its representation, to the raster.
+        :param raster: the target Raster
+        :param startpos: start position in grid (col,row) coordinates
+        :param endpos: end position in grid (col,row) coordinates
+        """
+        linechar = cls.line_char(startpos, endpos)
+        cols, rows = bresenham.line(startpos.x, startpos.y, endpos.x, endpos.y)
+        raster.add_points(zip(cols, rows), linechar)
+
+    # the character of a straight line by its slope (dy/dx), i.e. its angle with the horizontal:
+    # up to -75 degrees '|', -75..-52 '.', -52..-37 '/', -37..-15 '.', -15..15 '-', 15..37 '.', 37..52 '\\', 52..75 '.', from 75 '|'
+    # TODO better representation of straight line (using ASCII chars)?
+    SLOPES = tuple(tan(radians(angle)) for angle in (-75, -52, -37, -15, 15, 37, 52, 75))
+    SLOPE_CHARS = ('|', '.', '/', '.', '-', '.', '\\', '.', '|')
+
+    @staticmethod
+    def line_char(startpos, endpos):
+        """Return the character that represents a straight line with the direction from start to end position."""
+        x, y = (endpos - startpos).xy
+        if x == 0:
+            return '|'
+        return DirLine.SLOPE_CHARS[bisect_left(DirLine.SLOPES, y / x)]
 
     def memo(self):
         str = "{0}:{1},{2}".format(DIR_LINE, self._startpos, self._endpos)
@@ -561,44 +663,91 @@ class MagLine(Line):
 
     ori_desc = {0: 'hor', 1: 'vert', 2: 'longest-first', None: 'None'}
 
-    def __init__(self, startpos, endpos, cell_callback=None, type=Line.MLINE):
+    def __init__(self, startpos, endpos, cell_callback=None, type=Line.MLINE, neighbourhood_callback=None):
         self.cell = cell_callback
+        self.neighbourhood = neighbourhood_callback
+        self._reset()
         super(MagLine, self).__init__(startpos=startpos, endpos=endpos, type=type)
-        self._representation()
 
-    def _line_match(self, idx, ori, pos):
+    def _reset(self):
+        """Initialize the state of a line that hasn't been pasted."""
+        # memoized terminal matches, see freeze_matches()
+        self._matches = None
+        # the latest status message
+        self._status = None
+        # the cells (col, row) read by the latest representation and their content
+        self._reads = dict()
+        # the content of the cells covered by the line, before it was pasted
+        self._covered = dict()
+        # the orientation of the first line, fixed once the line has been pasted
+        self._f_ori = None
+        self._pasted_ori = None
+
+    def freeze_matches(self):
+        """
+        Memoize the terminal matches by position and orientation, as long as the grid doesn't change.
+        E.g. while dragging a magic line, its start terminal is matched once and its end terminal once per cell.
+        Calling this method again discards the memoized matches.
+        """
+        self._matches = dict()
+        self._status = None
+
+    @property
+    def dependencies(self):
+        """
+        The cells the representation depends on.
+        :returns a set of (col, row) coordinates of the cells that have been read, except the cells covered by the line itself
+        """
+        return set(self._reads.keys()) - self.cells()
+
+    def _cell(self, pos):
+        """Return the content of a cell, as it was before the line was pasted."""
+        xy = pos.xy
+        if xy in self._covered:
+            value = self._covered[xy]
+        else:
+            value = self.cell(pos)
+        self._reads[xy] = value
+        return value
+
+    def _neighbourhood(self, pos):
+        """Return the 3x3 cells around (and including) the position, row by row."""
+        col, row = pos.xy
+        positions = [(col + i, row + j) for j in (-1, 0, 1) for i in (-1, 0, 1)]
+        if self.neighbourhood is not None:
+            cells = self.neighbourhood(pos)
+        else:
+            cells = [self.cell(Pos(c, r)) for c, r in positions]
+        if self._covered:
+            cells = [self._covered.get(xy, cell) for xy, cell in zip(positions, cells)]
+        self._reads.update(zip(positions, cells))
+        return tuple(cells)
+
+    def _line_match(self, ori, pos):
         """
-        Match a character in the grid against a Magic Line pattern.
+        Match a character in the grid against the Magic Line patterns.
 
-        :param idx: number of the line matching pattern to be used
         :param ori: orientation of the line to be drawn
         :param pos: character position (col, row) coordinates
 
-        :return result: True if a match was found, otherwise False
+        :return idx: number of the (first) matching pattern, or None if no match was found
         :return ori: magic line orientation
         :return char: terminal character
 
         """
-        lmd = MagicLineSettings.LMD[idx]
-        result = True
-        m_ori = None
-        m_char = None
-        if pos > Pos(0, 0) and (ori is None or ori == lmd.ori):
-            for j, row in enumerate(lmd.pattern):
-                for i, char in enumerate(row):
-                    if char != 'x':
-                        m_pos = pos + Pos(i - 1, j - 1)
-                        m_cell = self.cell(m_pos)
-                        if m_cell != char:
-                            result = False
-                            break
-            if result:
-                m_ori = lmd.ori
-                m_char = lmd.char
-                # print("line_match, idx:", idx, " m_ori:", m_ori, " m_char:", m_char)
-        else:
-            result = False
-        return result, m_ori, m_char
+        if self._matches is not None:
+            key = (pos.xy, ori)
+            if key not in self._matches:
+                self._matches[key] = self._find_match(ori, pos)
+            return self._matches[key]
+        return self._find_match(ori, pos)
+
+    def _find_match(self, ori, pos):
+        if pos > Pos(0, 0):
+            found = MagicLineSettings.matcher().match(self._neighbourhood(pos), ori)
+            if found is not None:
+                return found
+        return None, None, None
 
     def _representation(self):
         startpos = self._startpos
@@ -606,16 +755,17 @@ class MagLine(Line):
         dx = endpos.x - startpos.x
         dy = endpos.y - startpos.y
         self._repr = dict()
-        f_ori = None
-        f_terminal = None
+        self._reads = dict()
         s_ori = HORIZONTAL
+        # the last pattern is reported if no match was found
+        last = len(MagicLineSettings.LMD) - 1
 
         # determine the first line terminal
-        for i in range(len(MagicLineSettings.LMD)):
-            match, f_ori, f_terminal = self._line_match(i, None, startpos)
-            if match:
-                self._repr[startpos] = f_terminal
-                break
+        f_idx, f_ori, f_terminal = self._line_match(None, startpos)
+        if f_idx is None:
+            f_idx = last
+        else:
+            self._repr[startpos] = f_terminal
         # the orientation of the first line
         if f_ori is None:
             f_ori = HORIZONTAL
@@ -624,7 +774,10 @@ class MagLine(Line):
                 f_ori = VERTICAL
             else:
                 f_ori = HORIZONTAL
-        msg = _("Start: M[{0}] char:{1} ori:{2} / ").format(i, f_terminal, MagLine.ori_desc[f_ori])
+        if self._pasted_ori is not None:
+            # keep the route of a pasted line, only its characters are re-evaluated
+            f_ori = self._pasted_ori
+        self._f_ori = f_ori
 
         # the orientation of the second line
         if f_ori == HORIZONTAL:
@@ -637,14 +790,20 @@ class MagLine(Line):
                 s_ori = HORIZONTAL
             else:
                 s_ori = VERTICAL
-        for i in range(len(MagicLineSettings.LMD)):
-            match, m_ori, m_terminal = self._line_match(i, s_ori, endpos)
-            if match:
-                # the end-terminal of the second line
-                self._repr[endpos] = m_terminal
-                break
-        msg += _("End: M[{0}] char:{1} ori:{2}").format(i, m_terminal, MagLine.ori_desc[m_ori])
-        pub.sendMessage('STATUS_MESSAGE', msg=msg)
+        m_idx, m_ori, m_terminal = self._line_match(s_ori, endpos)
+        if m_idx is None:
+            m_idx = last
+        else:
+            # the end-terminal of the second line
+            self._repr[endpos] = m_terminal
+
+        # only report changes, the representation is recomputed on every preview frame
+        status = (f_idx, f_terminal, f_ori, m_idx, m_terminal, m_ori)
+        if status != self._status:
+            self._status = status
+            msg = _("Start: M[{0}] char:{1} ori:{2} / ").format(f_idx, f_terminal, MagLine.ori_desc[f_ori])
+            msg += _("End: M[{0}] char:{1} ori:{2}").format(m_idx, m_terminal, MagLine.ori_desc[m_ori])
+            pub.sendMessage('STATUS_MESSAGE', msg=msg)
         self._corner_line(f_ori)
 
     def _corner_line(self, ori):
@@ -675,7 +834,7 @@ class MagLine(Line):
         if abs(dx) > 1:
             for temp in range(endv - startv):
                 pos = Pos(startv + temp, top)
-                if self.cell(pos) == Preferences.values['LINE_VERT']:
+                if self._cell(pos) == Preferences.values['LINE_VERT']:
                     char = Preferences.values['CROSSING']
                 else:
                     char = Preferences.values['LINE_HOR']
@@ -691,7 +850,7 @@ class MagLine(Line):
         if abs(dy) > 1:
             for temp in range(endv - startv):
                 pos = Pos(left, startv + temp)
-                if self.cell(pos) == Preferences.values['LINE_HOR']:
+                if self._cell(pos) == Preferences.values['LINE_HOR']:
                     char = Preferences.values['CROSSING']
                 else:
                     char = Preferences.values['LINE_VERT']
@@ -701,10 +860,45 @@ class MagLine(Line):
         if (ori == HORIZONTAL and abs(dy) > 0) or (ori == VERTICAL and abs(dx) > 0):
             self._repr[Pos(left, top)] = corner_char
 
+    def paste(self, grid):
+        # the terminals depend on the grid content, which may have been changed since the line was last pasted
+        self._invalidate()
+        super(MagLine, self).paste(grid)
+        self._covered = {xy: self._reads[xy] for xy in (pos.xy for pos in self._repr.keys()) if xy in self._reads}
+        self._pasted_ori = self._f_ori
+
+    def remove(self, grid):
+        super(MagLine, self).remove(grid)
+        self._covered = dict()
+        self._pasted_ori = None
+
+    def reevaluate(self, grid):
+        """
+        Recompute the representation of the pasted line, e.g. after one of its dependencies has been changed.
+        Only the cells of which the content has been changed are updated in the grid.
+        :param grid: the grid the line has been pasted in
+        :returns the set of (col, row) coordinates of the changed cells
+        """
+        old = {pos.xy: char for pos, char in self.repr.items()}
+        covered = self._covered
+        self._representation()
+        new = {pos.xy: char for pos, char in self._repr.items()}
+        changed = {xy for xy in old.keys() | new.keys() if old.get(xy) != new.get(xy)}
+        for xy in changed:
+            if xy in new:
+                grid.set_cell(Pos(*xy), new[xy])
+            else:
+                # restore the content that was covered by the line, an empty cell is erased (a space is transparent)
+                value = covered.get(xy, CELL_EMPTY)
+                grid.set_cell(Pos(*xy), CELL_ERASE if value == CELL_EMPTY else value)
+        self._covered = {xy: self._reads[xy] for xy in new.keys() if xy in self._reads}
+        return changed
+
     def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        endpos = copy.deepcopy(self._endpos)
-        return MagLine(startpos, endpos, self.cell, self.type)
+        clone = super(MagLine, self).copy()
+        # the copy hasn't been pasted
+        clone._reset()
+        return clone
 
     def memo(self):
         str = "{0}:{1},{2},{3}".format(MAG_LINE, self._type, self._startpos, self._endpos)
@@ -716,7 +910,6 @@ class MagLineOld(MagLine):
 
     def __init__(self, startpos, endpos, cell_callback=None, type=Line.MLINE_LEGACY):
         super(MagLineOld, self).__init__(startpos=startpos, endpos=endpos, cell_callback=cell_callback, type=type)
-        self._representation()
         self._se_count = 0
         self._se_status_msg = ""
 
@@ -1096,22 +1289,30 @@ class Rect(Symbol):
         super(Rect, self).__init__(grid=grid, startpos=startpos, endpos=endpos)
         self._is_symbol = False
         self._is_line = True
-        self._representation()
 
     def _representation(self):
         ul = self._startpos
         ur = Pos(self._endpos.x, self._startpos.y)
         bl = Pos(self._startpos.x, self._endpos.y)
         br = self._endpos
-        line1 = Line(ul, ur, Line.LINE1)
-        line2 = Line(ur, br, Line.LINE4)
-        line3 = Line(bl, br, Line.LINE1)
-        line4 = Line(ul, bl, Line.LINE4)
-        self._repr = dict()
-        self._repr.update(line1.repr)
-        self._repr.update(line3.repr)
-        self._repr.update(line2.repr)
-        self._repr.update(line4.repr)
+        raster = Raster()
+        if ul.x != br.x and ul.y != br.y:
+            # the vertical sides overwrite the corners of the horizontal sides,
+            # so only the inner part of the horizontal sides is added and the spans don't overlap
+            line_char = Preferences.values['LINE_HOR']
+            col = min(ul.x, br.x) + 1
+            width = abs(br.x - ul.x) - 1
+            raster.add(col, ul.y, 1, 0, line_char * width)
+            raster.add(col, br.y, 1, 0, line_char * width)
+            Line.rasterize(raster, ur, br, Line.LINE4)
+            Line.rasterize(raster, ul, bl, Line.LINE4)
+        else:
+            # a single row or column: the sides overlap, in the same order as they were always drawn
+            Line.rasterize(raster, ul, ur, Line.LINE1)
+            Line.rasterize(raster, bl, br, Line.LINE1)
+            Line.rasterize(raster, ur, br, Line.LINE4)
+            Line.rasterize(raster, ul, bl, Line.LINE4)
+        self._raster = raster
 
     def rotate(self):
         w = self._endpos.x - self._startpos.x
@@ -1120,11 +1321,7 @@ class Rect(Symbol):
         br = Pos(self._startpos.x + h, self._startpos.y + w)
         self._startpos = ul
         self._endpos = br
-
-    def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        endpos = copy.deepcopy(self._endpos)
-        return Rect(startpos, endpos)
+        self._invalidate()
 
     def memo(self):
         str = "{0}:{1},{2}".format(DRAW_RECT, self._startpos, self._endpos)
@@ -1138,7 +1335,6 @@ class Arrow(Symbol):
         super(Arrow, self).__init__(grid=grid, startpos=startpos, endpos=endpos)
         self._is_symbol = False
         self._is_line = True
-        self._representation()
 
     def _direction(self):
         dx = abs(self._endpos.x - self._startpos.x)
@@ -1226,32 +1422,23 @@ class Arrow(Symbol):
         self._pickpoint = c
 
     def _repr_poly(self, a, b, c, d, e, f, g):
-        line1 = Line(a, b, Line.LINE4)
-        line2 = Line(b, c, Line.LINE4)
-        line3 = Line(c, d, Line.LINE1)
-        line4 = DirLine(d, e)
-        line5 = DirLine(e, f)
-        line6 = Line(f, g, Line.LINE1)
-        line7 = Line(g, a, Line.LINE4)
-        self._repr = dict()
+        raster = Raster()
         # TODO more or less optimal order for horizontal arrow pointing to the right, what with the other ones?
-        self._repr.update(line1.repr)
-        self._repr.update(line3.repr)
-        self._repr.update(line4.repr)
-        self._repr.update(line6.repr)
-        self._repr.update(line5.repr)
-        self._repr.update(line7.repr)
-        self._repr.update(line2.repr)
+        Line.rasterize(raster, a, b, Line.LINE4)
+        Line.rasterize(raster, c, d, Line.LINE1)
+        DirLine.rasterize(raster, d, e)
+        Line.rasterize(raster, f, g, Line.LINE1)
+        DirLine.rasterize(raster, e, f)
+        Line.rasterize(raster, g, a, Line.LINE4)
+        Line.rasterize(raster, b, c, Line.LINE4)
+        self._raster = raster
 
     @property
     def pickpoint_pos(self):
+        if self._raster is None:
+            self._representation()
         return self._pickpoint
 
-    def copy(self):
-        startpos = copy.deepcopy(self._startpos)
-        endpos = copy.deepcopy(self._endpos)
-        return Arrow(startpos, endpos)
-
     def memo(self):
         str = "{0}:{1},{2}".format(ARROW, self._startpos, self._endpos)
         return str
@@ -1291,9 +1478,6 @@ class Column(Symbol):
         str += "{0}:{1}".format(COL, self.col)
         return str
 
-    def copy(self):
-        return Column(self._col, self._action)
-
 
 class Row(Symbol):
 
@@ -1328,6 +1512,3 @@ class Row(Symbol):
             str = "d"
         str += "{0}:{1}".format(ROW, self.row)
         return str
-
-    def copy(self):
-        return Row(self._row, self._action)
@@ -0,0 +1,103 @@
+"""
+AACircuit
+2020-03-02 JvO
+"""
+
+import math
+import cairo
+import collections
+
+
+class TileCache(object):
+    """
+    Back buffer of a canvas, split into fixed-size tiles that are drawn on demand.
+    The least recently used tiles are discarded when the memory limit has been reached.
+
+    :param draw: callback that draws the canvas content, called with a Cairo context and the (x, y, width, height) rectangle of the tile
+    :param tile_size: the width and height of a tile in pixels
+    :param max_bytes: the memory limit for all tiles together
+    """
+
+    TILE_SIZE = 256
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, draw, tile_size=TILE_SIZE, max_bytes=MAX_BYTES):
+        self._draw = draw
+        self._tile_size = tile_size
+        self._tile_bytes = 4 * tile_size * tile_size  # ARGB32
+        self._max_tiles = max(1, max_bytes // self._tile_bytes)
+        # LRU order: the most recently used tile is at the end
+        self._tiles = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    @property
+    def tile_size(self):
+        return self._tile_size
+
+    @property
+    def nr_bytes(self):
+        """Return the memory used by the tiles."""
+        return len(self._tiles) * self._tile_bytes
+
+    def tile(self, col, row):
+        """
+        Return the tile surface, the tile is drawn if it is not present in the cache.
+        :param col: tile column
+        :param row: tile row
+        """
+        key = (col, row)
+        surface = self._tiles.get(key)
+        if surface is None:
+            surface = self._render(col, row)
+            self._tiles[key] = surface
+            while len(self._tiles) > self._max_tiles:
+                self._tiles.popitem(last=False)
+        else:
+            self._tiles.move_to_end(key)
+        return surface
+
+    def _render(self, col, row):
+        size = self._tile_size
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+        ctx = cairo.Context(surface)
+        ctx.translate(-col * size, -row * size)
+        self._draw(ctx, (col * size, row * size, size, size))
+        surface.flush()
+        return surface
+
+    def invalidate(self, rect=None):
+        """
+        Discard the tiles that intersect the given rectangle, so they will be redrawn.
+        :param rect: the (x, y, width, height) rectangle, None discards all tiles
+        """
+        if rect is None:
+            self._tiles.clear()
+            return
+        x, y, width, height = rect
+        size = self._tile_size
+        c_start, r_start = (math.floor(x / size), math.floor(y / size))
+        c_end, r_end = (math.ceil((x + width) / size), math.ceil((y + height) / size))
+        for key in list(self._tiles.keys()):
+            col, row = key
+            if col >= c_start and col < c_end and row >= r_start and row < r_end:
+                del self._tiles[key]
+
+    def paint(self, ctx):
+        """Composite the tiles that intersect the clip region of the context."""
+        x1, y1, x2, y2 = ctx.clip_extents()
+        size = self._tile_size
+        c_start = max(0, math.floor(x1 / size))
+        r_start = max(0, math.floor(y1 / size))
+        c_end = math.ceil(x2 / size)
+        r_end = math.ceil(y2 / size)
+        ctx.save()
+        for row in range(r_start, r_end):
+            for col in range(c_start, c_end):
+                x = col * size
+                y = row * size
+                ctx.set_source_surface(self.tile(col, row), x, y)
+                ctx.rectangle(x, y, size, size)
+                ctx.fill()
+        ctx.restore()
@@ -0,0 +1,52 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of importing a large ASCII file: pasting its lines as one Block against a Text for each line,
+and the size of the resulting memo.
+
+Run from the project directory: python3 -m benchmarks.bench_ascii_import
+"""
+
+import timeit
+
+from application.pos import Pos
+from application.grid import Grid
+from application.symbol import Text, Block
+
+NR_LINES = 5000
+NR_COLS = 120
+
+
+def dump():
+    """ASCII art lines, as in a (large) exported drawing."""
+    pattern = "  .--.   |   ---+---  o-----o  |R1|  "
+    return [(pattern * (NR_COLS // len(pattern) + 1))[i % 7:i % 7 + NR_COLS - 10] for i in range(NR_LINES)]
+
+
+def import_text(lines, grid):
+    symbols = [Text(Pos(0, row), line) for row, line in enumerate(lines)]
+    for symbol in symbols:
+        symbol.copy().paste(grid)
+    return [symbol.memo() for symbol in symbols]
+
+
+def import_block(lines, grid):
+    symbol = Block(Pos(0, 0), lines)
+    symbol.copy().paste(grid)
+    return [symbol.memo()]
+
+
+def main():
+    lines = dump()
+    print("{0} lines of {1} characters".format(NR_LINES, NR_COLS))
+    for name, function in (("text", import_text), ("block", import_block)):
+        grid = Grid(NR_COLS, NR_LINES)
+        memo = function(lines, grid)
+        seconds = min(timeit.repeat(lambda: function(lines, Grid(NR_COLS, NR_LINES)), number=1, repeat=3))
+        size = sum(len(entry) + 1 for entry in memo)
+        print("{0:6} {1:8.1f} ms {2:6} memo entries {3:8.0f} kB".format(name, seconds * 1e3, len(memo), size / 1e3))
+
+
+if __name__ == '__main__':
+    main()
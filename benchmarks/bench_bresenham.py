@@ -0,0 +1,53 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of the straight line coordinates: the iterative Bresenham algorithm (as in the bresenham package)
+against the direct computation of line() and the batch computation of lines().
+
+Run from the project directory: python3 -m benchmarks.bench_bresenham
+"""
+
+import random
+import timeit
+
+from application.bresenham import line, lines
+
+
+def reference(x0, y0, x1, y1):
+    """The iterative Bresenham algorithm."""
+    dx = x1 - x0
+    dy = y1 - y0
+    xsign = 1 if dx > 0 else -1
+    ysign = 1 if dy > 0 else -1
+    dx = abs(dx)
+    dy = abs(dy)
+    if dx > dy:
+        xx, xy, yx, yy = xsign, 0, 0, ysign
+    else:
+        dx, dy = dy, dx
+        xx, xy, yx, yy = 0, ysign, xsign, 0
+    D = 2 * dy - dx
+    y = 0
+    for x in range(dx + 1):
+        yield x0 + x * xx + y * yx, y0 + x * xy + y * yy
+        if D >= 0:
+            y += 1
+            D -= 2 * dx
+        D += 2 * dy
+
+
+def main():
+    random.seed(1)
+    for length in (20, 200, 2000):
+        segments = [(0, 0, length, random.randint(-length, length)) for i in range(50)]
+        timings = (("iterative", lambda: [list(reference(*segment)) for segment in segments]),
+                   ("line", lambda: [line(*segment) for segment in segments]),
+                   ("lines", lambda: lines(segments)))
+        for label, func in timings:
+            seconds = min(timeit.repeat(func, number=10, repeat=5)) / 10
+            print("{0:4} points {1:9} {2:8.3f} ms / 50 lines".format(length + 1, label, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
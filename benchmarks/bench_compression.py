@@ -0,0 +1,52 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of compressed memo files: file size, write time and load time of a large drawing,
+plain text against gzip, xz and zstd (if the zstandard package is installed) compressed files.
+The read time is that of reading the memo lines (decompression included), the open time that of
+opening the file in the application (reading and playing the memo) for a smaller drawing.
+
+Run from the project directory: python3 -m benchmarks.bench_compression
+"""
+
+import os
+import tempfile
+import timeit
+
+from application import memo_file
+from application.controller import Controller
+from benchmarks.bench_memo_file import document
+
+NR_OBJECTS_OPEN = 2000
+
+
+def read(filename):
+    with memo_file.open_text(filename) as fin:
+        for line in fin:
+            pass
+
+
+def main():
+    extensions = [''] + [extension for extension, compression in memo_file.EXTENSIONS.items()
+                         if compression != memo_file.ZSTD or memo_file.zstandard is not None]
+    objects = document()
+    memo = [symbol.memo() for symbol in objects]
+    controller = Controller()
+    with tempfile.TemporaryDirectory() as directory:
+        print("{0} objects, open: {1} objects".format(len(memo), NR_OBJECTS_OPEN))
+        for extension in extensions:
+            filename = os.path.join(directory, 'bench.aac' + extension)
+            write = min(timeit.repeat(lambda: memo_file.write_lines(filename, memo), number=1, repeat=3))
+            size = os.path.getsize(filename)
+            load = min(timeit.repeat(lambda: read(filename), number=1, repeat=3))
+
+            small = os.path.join(directory, 'small.aac' + extension)
+            memo_file.write_lines(small, memo[:NR_OBJECTS_OPEN])
+            opening = min(timeit.repeat(lambda: controller.on_read_from_file(small), number=1, repeat=3))
+            print("{0:6} {1:8.0f} kB {2:8.1f} ms write {3:8.1f} ms read {4:8.1f} ms open".format(
+                extension or 'plain', size / 1e3, write * 1e3, load * 1e3, opening * 1e3))
+
+
+if __name__ == '__main__':
+    main()
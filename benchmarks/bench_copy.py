@@ -0,0 +1,38 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of copying a large selection, as when pasting selected objects or duplicating a drawing.
+
+Run from the project directory: python3 -m benchmarks.bench_copy
+"""
+
+import timeit
+
+from application.pos import Pos
+from application.symbol import Symbol, Text, Line, DirLine, Rect
+
+NR_SYMBOLS = 10000
+
+
+def selection():
+    """A mix of components, lines and text, as in a typical drawing."""
+    symbols = []
+    for i in range(NR_SYMBOLS // 5):
+        pos = Pos(i % 200, i // 200)
+        symbols.append(Symbol(grid={"N": ["  |  ", ".-+-.", "| R |", "'-+-'", "  |  "]}, startpos=pos))
+        symbols.append(Line(pos, pos + Pos(20, 0), Line.LINE1))
+        symbols.append(DirLine(pos, pos + Pos(15, 6)))
+        symbols.append(Rect(pos, pos + Pos(8, 4)))
+        symbols.append(Text(pos, "R1\n10k"))
+    return symbols
+
+
+def main():
+    symbols = selection()
+    seconds = min(timeit.repeat(lambda: [symbol.copy() for symbol in symbols], number=1, repeat=5))
+    print("copy {0} symbols {1:8.1f} ms".format(len(symbols), seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
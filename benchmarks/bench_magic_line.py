@@ -0,0 +1,87 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of the Magic Line pattern matching: the compiled matcher against the
+original loop over all line matching data.
+
+Run from the project directory: python3 -m benchmarks.bench_magic_line
+"""
+
+import random
+import timeit
+
+from application.grid import Grid
+from application.pos import Pos
+from application.magic_line_settings import MagicLineSettings, LineMatcher
+from application import HORIZONTAL, VERTICAL
+
+
+def legacy_match(cell, ori, pos):
+    """The original MagLine matching loop, a cell lookup and a Pos per pattern character."""
+    if not pos > Pos(0, 0):
+        return None
+    for idx, lmd in enumerate(MagicLineSettings.LMD):
+        if ori is None or ori == lmd.ori:
+            result = True
+            for j, row in enumerate(lmd.pattern):
+                for i, char in enumerate(row):
+                    if char != 'x':
+                        m_pos = pos + Pos(i - 1, j - 1)
+                        if cell(m_pos) != char:
+                            result = False
+                            break
+            if result:
+                return (idx, lmd.ori, lmd.char)
+    return None
+
+
+def compiled_match(grid, ori, pos):
+    if not pos > Pos(0, 0):
+        return None
+    return MagicLineSettings.matcher().match(grid.neighbourhood(pos), ori)
+
+
+def schematic(cols, rows):
+    """Return a grid with random line fragments."""
+    random.seed(42)
+    grid = Grid(cols, rows)
+    for _ in range(cols * rows // 4):
+        pos = Pos(random.randrange(cols), random.randrange(rows))
+        grid.set_cell(pos, random.choice("-|.'+o"))
+    return grid
+
+
+def main():
+    MagicLineSettings(filename='')  # default settings
+    grid = schematic(120, 80)
+    positions = [Pos(c, r) for r in range(grid.nr_rows) for c in range(grid.nr_cols)]
+    orientations = (None, HORIZONTAL, VERTICAL)
+
+    # both must find the same (first) pattern
+    for pos in positions:
+        for ori in orientations:
+            assert legacy_match(grid.cell, ori, pos) == compiled_match(grid, ori, pos), (pos, ori)
+
+    def run_legacy():
+        for pos in positions:
+            for ori in orientations:
+                legacy_match(grid.cell, ori, pos)
+
+    def run_compiled():
+        for pos in positions:
+            for ori in orientations:
+                compiled_match(grid, ori, pos)
+
+    def run_compiled_cold():
+        MagicLineSettings._matcher = LineMatcher(MagicLineSettings.LMD)
+        run_compiled()
+
+    nr_matches = len(positions) * len(orientations)
+    for name, func in (("legacy loop", run_legacy), ("compiled (cold)", run_compiled_cold), ("compiled", run_compiled)):
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        print("{0:16} {1:8.1f} ms  {2:6.2f} us/match".format(name, seconds * 1e3, seconds * 1e6 / nr_matches))
+
+
+if __name__ == '__main__':
+    main()
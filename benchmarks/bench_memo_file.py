@@ -0,0 +1,60 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of saving a large drawing: the streaming, atomic memo writer against
+the original concatenation of all memo entries in one string.
+
+Run from the project directory: python3 -m benchmarks.bench_memo_file
+"""
+
+import os
+import tempfile
+import timeit
+
+from application import memo_file
+from application.pos import Pos
+from application.symbol import Symbol, Text, Line, DirLine, Rect
+
+NR_OBJECTS = 100000
+
+
+def document():
+    """A mix of components, lines and text, as in a typical drawing."""
+    objects = []
+    for i in range(NR_OBJECTS // 5):
+        pos = Pos(i % 200, i // 200)
+        objects.append(Symbol(id=1 + i % 20, startpos=pos))
+        objects.append(Line(pos, pos + Pos(20, 0), Line.LINE1))
+        objects.append(DirLine(pos, pos + Pos(15, 6)))
+        objects.append(Rect(pos, pos + Pos(8, 4)))
+        objects.append(Text(pos, "R1\n10k"))
+    return objects
+
+
+def legacy_write(filename, objects):
+    """The original writer: the memo is collected in one string that is written at once."""
+    fout = open(filename, 'w')
+    str = ""
+    for symbol in objects:
+        str += symbol.memo() + "\n"
+    fout.write(str)
+    fout.close()
+
+
+def streaming_write(filename, objects):
+    memo_file.write_lines(filename, (symbol.memo() for symbol in objects))
+
+
+def main():
+    objects = document()
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'bench.aac')
+        for name, write in (("legacy", legacy_write), ("streaming", streaming_write)):
+            seconds = min(timeit.repeat(lambda: write(filename, objects), number=1, repeat=3))
+            size = os.path.getsize(filename)
+            print("{0:10} {1:8.1f} ms {2:8.1f} MB/s {3:10.0f} objects/s".format(name, seconds * 1e3, size / seconds / 1e6, len(objects) / seconds))
+
+
+if __name__ == '__main__':
+    main()
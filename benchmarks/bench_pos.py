@@ -0,0 +1,45 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of the representation build times, dominated by the creation of positions (Pos),
+and of the position arithmetic and conversions in the drawing and hover code.
+
+Run from the project directory: python3 -m benchmarks.bench_pos
+"""
+
+import timeit
+
+from application.grid import Grid
+from application.pos import Pos
+from application.symbol import Symbol, Text, Eraser, Line, MagLine
+
+
+def representations():
+    grid = Grid(200, 100)
+    component = Symbol(grid={"N": ["  |  ", ".-+-.", "| R |", "'-+-'", "  |  "] * 4})
+    text = Text(Pos(5, 5), "\n".join(["The quick brown fox jumps over the lazy dog"] * 10))
+    eraser = Eraser((40, 20), Pos(10, 10))
+    line = Line(Pos(5, 50), Pos(150, 50), Line.LINE1)
+    mag_line = MagLine(Pos(5, 5), Pos(150, 80), grid.cell, neighbourhood_callback=grid.neighbourhood)
+    return (("component", component), ("text", text), ("eraser", eraser), ("line", line), ("mag_line", mag_line))
+
+
+def arithmetic(positions):
+    """Canvas to grid coordinates and back, with an offset, as the hover and drawing code does."""
+    offset = Pos(3, 2)
+    for pos in positions:
+        (pos.grid_cr() + offset).view_xy() - offset
+
+
+def main():
+    for name, symbol in representations():
+        seconds = min(timeit.repeat(symbol._representation, number=100, repeat=5)) / 100
+        print("representation {0:10} {1:8.1f} us".format(name, seconds * 1e6))
+    positions = [Pos(x, y) for x in range(0, 1000, 7) for y in range(0, 600, 7)]
+    seconds = min(timeit.repeat(lambda: arithmetic(positions), number=5, repeat=5)) / 5
+    print("arithmetic                {0:8.1f} us / 1000 positions".format(seconds * 1e9 / len(positions)))
+
+
+if __name__ == '__main__':
+    main()
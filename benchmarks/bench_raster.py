@@ -0,0 +1,90 @@
+"""
+AACircuit
+2020-03-02 JvO
+
+Benchmark of the Rect and Arrow representation: the span based raster against
+the original dictionary merge of Line and DirLine representations.
+Dragging recomputes the representation for every end position, as the preview does,
+and visits all cells (as drawing does); pasting writes the cells in a grid.
+
+Run from the project directory: python3 -m benchmarks.bench_raster
+"""
+
+import timeit
+
+from application.grid import Grid
+from application.pos import Pos
+from application.symbol import Line, DirLine, Rect, Arrow
+
+
+def legacy_rect(rect):
+    """The original Rect representation, merged from four lines."""
+    ul = rect.startpos
+    br = rect.endpos
+    ur = Pos(br.x, ul.y)
+    bl = Pos(ul.x, br.y)
+    repr = dict()
+    for start, end, type in ((ul, ur, Line.LINE1), (bl, br, Line.LINE1), (ur, br, Line.LINE4), (ul, bl, Line.LINE4)):
+        repr.update(Line(start, end, type).repr)
+    return repr
+
+
+def legacy_arrow(arrow):
+    """The original Arrow representation, merged from five lines and two straight lines."""
+    vertices = []
+    arrow._repr_poly = lambda *args: vertices.extend(args)
+    arrow._representation()
+    del arrow._repr_poly
+    a, b, c, d, e, f, g = vertices
+    repr = dict()
+    for line in (Line(a, b, Line.LINE4), Line(c, d, Line.LINE1), DirLine(d, e), Line(f, g, Line.LINE1),
+                 DirLine(e, f), Line(g, a, Line.LINE4), Line(b, c, Line.LINE4)):
+        repr.update(line.repr)
+    return repr
+
+
+def drag(symbol, legacy, endpositions):
+    """Recompute the representation for each end position and visit its cells."""
+    for endpos in endpositions:
+        symbol.endpos = endpos
+        if legacy:
+            cells = legacy_rect(symbol) if isinstance(symbol, Rect) else legacy_arrow(symbol)
+            for pos, char in cells.items():
+                pass
+        else:
+            symbol._representation()
+            for col, row, char in symbol._raster.cells():
+                pass
+
+
+def paste(symbol, legacy, grid):
+    if legacy:
+        cells = legacy_rect(symbol) if isinstance(symbol, Rect) else legacy_arrow(symbol)
+        for pos, value in cells.items():
+            grid.set_cell(pos, value)
+    else:
+        symbol.paste(grid)
+
+
+def main():
+    grid = Grid(400, 300)
+    size = 250
+    rect = Rect(Pos(10, 10), Pos(10 + size, 10 + size))
+    arrow = Arrow(Pos(10, 150), Pos(10 + size, 150 - 60))
+    frames = 50
+
+    # both must give the same representation
+    assert rect.repr == legacy_rect(rect)
+    assert arrow.repr == legacy_arrow(arrow)
+
+    for name, symbol in (("rect", rect), ("arrow", arrow)):
+        endpositions = [symbol.endpos - Pos(i, i // 2) for i in range(frames)]
+        for label, legacy in (("legacy", True), ("raster", False)):
+            seconds = min(timeit.repeat(lambda: drag(symbol, legacy, endpositions), number=1, repeat=5))
+            print("drag  {0:5} {1:6} {2:8.2f} ms/frame".format(name, label, seconds * 1e3 / frames))
+            seconds = min(timeit.repeat(lambda: paste(symbol, legacy, grid), number=10, repeat=5)) / 10
+            print("paste {0:5} {1:6} {2:8.2f} ms".format(name, label, seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
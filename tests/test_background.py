@@ -0,0 +1,51 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.background import BackgroundTask
+from application.pos import Pos
+from application.symbol import Line
+from application.controller import Controller
+
+
+class BackgroundTaskTest(unittest.TestCase):
+
+    def test_done(self):
+
+        results = []
+
+        def work(progress):
+            for i in range(10):
+                progress(i / 10)
+            return 42
+
+        # w/o a running main loop the task is run right away
+        task = BackgroundTask(work, on_done=results.append, label="Working")
+        task.start()
+        self.assertEqual(results, [42])
+        self.assertFalse(task.failed)
+
+    def test_error(self):
+
+        errors = []
+
+        def work(progress):
+            raise IOError("disk full")
+
+        task = BackgroundTask(work, on_error=errors.append)
+        task.start()
+        self.assertTrue(task.failed)
+        self.assertEqual(len(errors), 1)
+
+    def test_write_snapshot(self):
+
+        c = Controller()
+        c.on_new()
+        c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE2)
+
+        filename = 'tmp/test_background.aac'
+        self.assertTrue(c.on_write_to_file(filename))
+        with open(filename) as fin:
+            self.assertEqual(fin.read(), c.objects[0].memo() + "\n")
+
+        self.assertFalse(c.on_write_to_file('tmp/no_such_directory/test_background.aac'))
@@ -0,0 +1,67 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application import bresenham
+from application.bresenham import line, lines
+from application.pos import Pos
+from application.symbol import DirLine
+
+
+def reference(x0, y0, x1, y1):
+    """The iterative Bresenham algorithm."""
+    dx = x1 - x0
+    dy = y1 - y0
+    xsign = 1 if dx > 0 else -1
+    ysign = 1 if dy > 0 else -1
+    dx = abs(dx)
+    dy = abs(dy)
+    if dx > dy:
+        xx, xy, yx, yy = xsign, 0, 0, ysign
+    else:
+        dx, dy = dy, dx
+        xx, xy, yx, yy = 0, ysign, xsign, 0
+    D = 2 * dy - dx
+    y = 0
+    for x in range(dx + 1):
+        yield x0 + x * xx + y * yx, y0 + x * xy + y * yy
+        if D >= 0:
+            y += 1
+            D -= 2 * dx
+        D += 2 * dy
+
+
+class BresenhamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.segments = [(3, -2, x, y) for x in range(-9, 10) for y in range(-9, 10)]
+
+    def test_line(self):
+
+        for segment in self.segments:
+            cols, rows = line(*segment)
+            self.assertEqual(list(zip(cols, rows)), list(reference(*segment)))
+
+    def test_lines(self):
+
+        min_points = bresenham.NUMPY_MIN_POINTS
+        try:
+            # also the NumPy version (if available) for short lines
+            for bresenham.NUMPY_MIN_POINTS in (0, min_points):
+                for (cols, rows), segment in zip(lines(self.segments), self.segments):
+                    self.assertEqual([(int(c), int(r)) for c, r in zip(cols, rows)], list(reference(*segment)))
+        finally:
+            bresenham.NUMPY_MIN_POINTS = min_points
+        self.assertEqual(lines([]), [])
+
+    def test_line_char(self):
+
+        start = Pos(10, 10)
+        self.assertEqual(DirLine.line_char(start, Pos(10, 2)), '|')
+        # steep lines are vertical, also with a negative slope
+        self.assertEqual(DirLine.line_char(start, Pos(11, 2)), '|')
+        self.assertEqual(DirLine.line_char(start, Pos(9, 2)), '|')
+        self.assertEqual(DirLine.line_char(start, Pos(20, 11)), '-')
+        self.assertEqual(DirLine.line_char(start, Pos(15, 15)), '\\')
+        self.assertEqual(DirLine.line_char(start, Pos(15, 5)), '/')
+        self.assertEqual(DirLine.line_char(start, Pos(15, 12)), '.')
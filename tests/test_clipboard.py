@@ -0,0 +1,67 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.clipboard import Clipboard
+from application.pos import Pos
+from application.symbol import Line
+from application.controller import Controller
+
+
+class TextClipboard(object):
+    """The system clipboard, as far as the text is concerned."""
+
+    def __init__(self):
+        self.text = None
+
+    def set_text(self, text, length):
+        self.text = text
+
+    def request_text(self, callback, *args):
+        callback(self, self.text, *args)
+
+
+class LocalClipboard(Clipboard):
+
+    def __init__(self):
+        super(LocalClipboard, self).__init__()
+        self._clipboard = TextClipboard()
+
+    @property
+    def clipboard(self):
+        return self._clipboard
+
+
+class ClipboardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.c = Controller()
+        self.c.on_new()
+        self.c.clipboard = LocalClipboard()
+        self.c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE2)
+
+    def test_copy_paste_grid(self):
+
+        c = self.c
+        c.on_copy_grid()
+        self.assertEqual(c.clipboard.clipboard.text, c.grid.content_as_str())
+
+        # pasted as one block
+        c.on_paste_grid()
+        self.assertEqual(len(c.selected_objects), 1)
+        self.assertEqual(c.selected_objects[0].symbol.lines[5], c.grid.content_as_lines()[5].rstrip())
+
+        # no text
+        c.clipboard.clipboard.text = None
+        c.selected_objects = []
+        c.on_paste_grid()
+        self.assertEqual(c.selected_objects, [])
+
+    def test_copy_internal(self):
+
+        c = self.c
+        c.clipboard.clipboard.text = "copied elsewhere"
+        # copying and cutting a selection don't touch the clipboard
+        c.on_copy((Pos(4, 5), Pos(15, 6)))
+        c.on_cut((Pos(4, 5), Pos(15, 6)))
+        self.assertEqual(c.clipboard.clipboard.text, "copied elsewhere")
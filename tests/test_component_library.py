@@ -1,9 +1,11 @@
 # NB to be run with nose, this .py should _not_ be executable (chmod -x)
 
+import re
 import unittest
 from locale import gettext as _
 
 from application.component_library import ComponentLibrary
+from application.pos import Pos
 
 
 class ComponentLibraryTest(unittest.TestCase):
@@ -24,3 +26,22 @@ class ComponentLibraryTest(unittest.TestCase):
         symbol = c.get_symbol(key=key)
 
         self.assertEquals(symbol.id, 1)
+
+    def test_pickpoint(self):
+
+        c = ComponentLibrary()
+
+        key = _("Resistor")
+        symbol = c.get_symbol(key=key)
+        symbol.startpos = Pos(10, 5)
+
+        for mirrored in (0, 1):
+            symbol.mirrored = mirrored
+            for ori in range(4):
+                symbol.ori = ori
+                # the pick position is left of the first character of the (oriented) first row
+                x_offset = re.search(r'\S', symbol.grid[0]).start() - 1
+                self.assertEqual(symbol.pickpoint_pos, Pos(10 + x_offset, 5))
+
+        symbol.startpos = Pos(20, 8)
+        self.assertEqual(symbol.pickpoint_pos.y, 8)
@@ -0,0 +1,49 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.dependency_index import DependencyIndex
+
+
+class Dependent(object):
+
+    def __init__(self, cells):
+        self.dependencies = set(cells)
+
+
+class DependencyIndexTest(unittest.TestCase):
+
+    def test_dependents(self):
+
+        index = DependencyIndex()
+        a = Dependent([(0, 0), (1, 0)])
+        b = Dependent([(1, 0), (2, 0)])
+        index.add(a)
+        index.add(b)
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.dependents([(0, 0)]), [a])
+        self.assertEqual(index.dependents([(2, 0), (1, 0)]), [a, b])
+        self.assertEqual(index.dependents([(5, 5)]), [])
+
+    def test_update(self):
+
+        index = DependencyIndex()
+        a = Dependent([(0, 0)])
+        b = Dependent([(0, 0)])
+        index.add(a)
+        index.add(b)
+
+        # updated dependencies, the order of the symbols is kept
+        a.dependencies = {(0, 0), (3, 3)}
+        index.add(a)
+        self.assertEqual(index.dependents([(0, 0)]), [a, b])
+        self.assertEqual(index.dependents([(3, 3)]), [a])
+
+        index.remove(a)
+        self.assertNotIn(a, index)
+        self.assertEqual(index.dependents([(0, 0), (3, 3)]), [b])
+
+        # removing twice is harmless
+        index.remove(a)
+        self.assertEqual(len(index), 1)
@@ -123,3 +123,21 @@ class EditingTest(unittest.TestCase):
 
         filename = 'tmp/test_edit_duplicate.aac'
         self.assertTrue(c.on_write_to_file(filename))
+
+    def test_copy(self):
+
+        c = Controller()
+        c.on_new()
+
+        c.on_component_changed('AND gate')
+        original = c.selected_objects[0].symbol
+        original.startpos = Pos(4, 2)
+
+        copy = original.copy()
+        self.assertIs(copy.grid, original.grid)
+        self.assertEqual(copy.repr, original.repr)
+
+        # moving the copy leaves the original in place
+        copy.startpos += Pos(10, 0)
+        self.assertEqual(original.startpos, Pos(4, 2))
+        self.assertEqual(set(pos - Pos(10, 0) for pos in copy.repr), set(original.repr))
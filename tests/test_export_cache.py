@@ -0,0 +1,96 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import os
+import tempfile
+import unittest
+
+from application import export_cache
+from application.export_cache import ExportCache
+from application.pos import Pos
+from application.symbol import Line
+from application.controller import Controller
+
+
+class ExportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.cache = ExportCache(os.path.join(self.directory, 'cache'), max_bytes=250)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def export(self, name, content):
+        filename = os.path.join(self.directory, name)
+        with open(filename, 'w') as fout:
+            fout.write(content)
+        return filename
+
+    def test_key(self):
+
+        memo = ["lin2:5,5,15,5", "c:10,10,'x'"]
+        settings = {'FONTSIZE': 12}
+        key = export_cache.key('.txt', memo, settings)
+
+        # normalized memo
+        self.assertEqual(export_cache.key('.txt', [" lin2:5,5,15,5\n", "", "c:10,10,'x'\n"], settings), key)
+
+        self.assertNotEqual(export_cache.key('.pdf', memo, settings), key)
+        self.assertNotEqual(export_cache.key('.txt', memo[:1], settings), key)
+        self.assertNotEqual(export_cache.key('.txt', memo, {'FONTSIZE': 14}), key)
+
+    def test_fetch(self):
+
+        target = os.path.join(self.directory, 'target.txt')
+        self.assertFalse(self.cache.fetch('a', target))
+        self.assertFalse(os.path.exists(target))
+
+        self.cache.store('a', self.export('a.txt', 'a' * 100))
+        self.assertTrue(self.cache.fetch('a', target))
+        with open(target) as fin:
+            self.assertEqual(fin.read(), 'a' * 100)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_eviction(self):
+
+        # room for 2 files
+        self.cache.store('a', self.export('a.txt', 'a' * 100))
+        self.cache.store('b', self.export('b.txt', 'b' * 100))
+        # a is older than b, but is used (again) after b
+        os.utime(os.path.join(self.directory, 'cache', 'a'), ns=(1, 1))
+        os.utime(os.path.join(self.directory, 'cache', 'b'), ns=(2, 2))
+        target = os.path.join(self.directory, 'target.txt')
+        self.assertTrue(self.cache.fetch('a', target))
+
+        self.cache.store('c', self.export('c.txt', 'c' * 100))
+        self.assertTrue(self.cache.fetch('a', target))
+        self.assertFalse(self.cache.fetch('b', target))
+        self.assertTrue(self.cache.fetch('c', target))
+
+    def test_export_ascii(self):
+
+        c = Controller()
+        self.cache = c.export_cache = ExportCache(os.path.join(self.directory, 'cache'))
+        c.on_new()
+        c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE2)
+
+        filename = os.path.join(self.directory, 'drawing.txt')
+        c.on_write_to_ascii_file(filename)
+        with open(filename) as fin:
+            content = fin.read()
+        self.assertEqual(self.cache.hits, 0)
+
+        # unchanged drawing
+        os.unlink(filename)
+        c.on_write_to_ascii_file(filename)
+        self.assertEqual(self.cache.hits, 1)
+        with open(filename) as fin:
+            self.assertEqual(fin.read(), content)
+
+        # changed drawing
+        c.on_paste_line(Pos(5, 7), Pos(15, 7), Line.LINE2)
+        c.on_write_to_ascii_file(filename)
+        self.assertEqual(self.cache.hits, 1)
+        with open(filename) as fin:
+            self.assertNotEqual(fin.read(), content)
@@ -18,6 +18,21 @@ class FileTest(unittest.TestCase):
         filename = 'tmp/test_all.aac'
         self.assertTrue(c.on_write_to_file(filename))
 
+    def test_read_write_compressed(self):
+
+        c = Controller()
+
+        filename = 'tests/files/test_all.aac'
+        self.assertTrue(c.on_read_from_file(filename))
+        content = c.grid.content_as_str()
+
+        filename = 'tmp/test_all.aac.gz'
+        self.assertTrue(c.on_write_to_file(filename))
+
+        c = Controller()
+        self.assertTrue(c.on_read_from_file(filename))
+        self.assertEqual(c.grid.content_as_str(), content)
+
     def test_read_aac(self):
 
         c = Controller()
@@ -39,6 +54,32 @@ class FileTest(unittest.TestCase):
         filename = 'tmp/test_ascii.aac'
         self.assertTrue(c.on_write_to_file(filename))
 
+    def test_read_ascii_block(self):
+
+        c = Controller()
+        c.on_new()
+
+        filename = 'tests/files/test_ascii.txt'
+        with open(filename) as fin:
+            lines = fin.read().splitlines()
+        self.assertTrue(c.on_load_ascii_from_file(filename))
+        # the lines are one object
+        self.assertEqual(len(c.selected_objects), 1)
+
+        c.on_paste_objects(Pos(0, 0))
+        content = [line.rstrip() for line in c.grid.content_as_lines()[:len(lines)]]
+        self.assertEqual(content, [line.rstrip() for line in lines])
+
+        # and one memo entry
+        filename = 'tmp/test_ascii_block.aac'
+        self.assertTrue(c.on_write_to_file(filename))
+        with open(filename) as fin:
+            self.assertEqual(len(fin.readlines()), 1)
+
+        r = Controller()
+        self.assertTrue(r.on_read_from_file(filename))
+        self.assertEqual(r.grid.grid, c.grid.grid)
+
     def test_import_aacircuit(self):
 
         c = Controller()
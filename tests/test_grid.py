@@ -2,7 +2,9 @@
 
 import unittest
 
+from application import CELL_ERASE, CELL_ERASE_CHAR
 from application.grid import Grid
+from application.symbol import Block
 from application.grid_view import Pos
 
 
@@ -52,6 +54,62 @@ class GridTest(unittest.TestCase):
         g.fill_rect(Pos(3, 3), c)
         print(g)
 
+    def test_set_block(self):
+
+        lines = ["ab  c", "", " d", "efghijk"]
+
+        # the same result as setting each cell
+        g = Grid(6, 3)
+        ref = Grid(6, 3)
+        for r in (g, ref):
+            r.set_cell(Pos(2, 0), 'x')
+            r.set_cell(Pos(3, 1), 'x')
+            r.clean()
+        g.set_block(1, 0, lines)
+        for j, line in enumerate(lines):
+            for i, char in enumerate(line):
+                ref.set_cell(Pos(1 + i, j), char)
+        self.assertEqual(g.grid, ref.grid)
+        self.assertEqual(g.dirty, (1, 0, 6, 3))
+
+        g.set_block(1, 0, lines, erase=True)
+        self.assertEqual(g.content_as_lines()[:3], ["      ", "   x  ", "      "])
+
+    def test_set_block_erase(self):
+
+        lines = ["a" + CELL_ERASE_CHAR + "b", CELL_ERASE_CHAR * 3]
+
+        # an erase character erases the cell, as CELL_ERASE does in set_cell()
+        g = Grid(4, 3)
+        ref = Grid(4, 3)
+        for r in (g, ref):
+            for j in range(3):
+                r.set_cell(Pos(1, j), 'x')
+        g.set_block(0, 0, lines)
+        for j, line in enumerate(lines):
+            for i, char in enumerate(line):
+                ref.set_cell(Pos(i, j), CELL_ERASE if char == CELL_ERASE_CHAR else char)
+        self.assertEqual(g.grid, ref.grid)
+        self.assertEqual(g.content_as_lines()[:3], ["a b ", "    ", " x  "])
+
+        # a pasted block erases the same cells
+        block = Block(Pos(0, 0), lines)
+        self.assertEqual(block.repr[Pos(1, 0)], CELL_ERASE)
+        g = Grid(4, 3)
+        for j in range(3):
+            g.set_cell(Pos(1, j), 'x')
+        block.paste(g)
+        self.assertEqual(g.grid, ref.grid)
+
+    def test_content_lines(self):
+
+        g = Grid(4, 3)
+        lines = g.content_as_lines()
+        # kept until the grid is changed
+        self.assertIs(g.content_as_lines(), lines)
+        g.set_cell(Pos(1, 1), 'x')
+        self.assertEqual(g.content_as_lines()[:3], ["    ", " x  ", "    "])
+
     def test_erase_rect(self):
 
         g = Grid()
@@ -104,3 +162,54 @@ class GridTest(unittest.TestCase):
         print("insert row 2:")
         g.insert_row(2)
         print(g)
+
+    def test_dirty(self):
+
+        g = Grid()
+        self.assertEqual(g.dirty, (0, 0, 5, 5))
+
+        g.clean()
+        self.assertIsNone(g.dirty)
+
+        g.set_cell(Pos(1, 2), 'x')
+        self.assertEqual(g.dirty, (1, 2, 2, 3))
+
+        g.set_cell(Pos(3, 0), 'y')
+        self.assertEqual(g.dirty, (1, 0, 4, 3))
+
+        g.clean()
+        g.remove_row(3)
+        self.assertEqual(g.dirty[1], 3)
+
+    def test_neighbourhood(self):
+
+        g = Grid()
+
+        i = 0
+        for r in range(g.nr_rows):
+            for c in range(g.nr_cols):
+                pos = Pos(c, r)
+                g.set_cell(pos, str(i))
+                i += 1
+
+        self.assertEqual(g.neighbourhood(Pos(2, 2)), ('6', '7', '8', '11', '12', '13', '16', '17', '18'))
+
+        # the same cells as cell() returns, also outside the grid
+        for pos in (Pos(0, 0), Pos(4, 4), Pos(4, 0), Pos(0, 4)):
+            cells = tuple(g.cell(pos + Pos(i, j)) for j in (-1, 0, 1) for i in (-1, 0, 1))
+            self.assertEqual(g.neighbourhood(pos), cells)
+
+    def test_span(self):
+
+        g = Grid()
+        g.clean()
+
+        g.set_span(1, 1, 1, 0, 'a b')
+        self.assertEqual(g.cell(Pos(1, 1)), 'a')
+        self.assertEqual(g.cell(Pos(2, 1)), ' ')
+        self.assertEqual(g.cell(Pos(3, 1)), 'b')
+        self.assertEqual(g.dirty, (1, 1, 4, 2))
+
+        # cells outside the grid are skipped
+        g.set_span(4, 3, 0, 1, 'cde')
+        self.assertEqual(g.cell(Pos(4, 4)), 'd')
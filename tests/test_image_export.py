@@ -0,0 +1,82 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import os
+import tempfile
+import unittest
+
+from application.export_cache import ExportCache
+from application.image_export import ImageExport, image_format, PNG, SVG
+from application.preferences import Geometry
+
+
+class ImageExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.geometry = Geometry(10, 16, 12, False, "monospace 12")
+        self.rows = [[' '] * 20 for r in range(10)]
+        for c in range(3, 8):
+            self.rows[2][c] = '-'
+        self.rows[5][4] = '+'
+
+    def test_format(self):
+
+        self.assertEqual(image_format('drawing.png'), PNG)
+        self.assertEqual(image_format('drawing.SVG'), SVG)
+        self.assertIsNone(image_format('drawing.pdf'))
+
+    def test_size(self):
+
+        # the content is columns 3..8, rows 2..6, with one cell of padding around it
+        export = ImageExport(self.rows, self.geometry)
+        self.assertEqual(export.size(), (7 * 10, 6 * 16))
+        self.assertEqual(export.size(2), (2 * 7 * 10, 2 * 6 * 16))
+
+        # region of interest
+        export = ImageExport(self.rows, self.geometry, cells=(0, 0, 20, 10), padding=0)
+        self.assertEqual(export.size(0.5), (100, 80))
+
+        # thumbnail
+        zoom = export.fit(50, 50)
+        self.assertEqual(export.size(zoom), (50, 40))
+
+    def test_write(self):
+
+        export = ImageExport(self.rows, self.geometry)
+        with tempfile.TemporaryDirectory() as directory:
+            images = [(os.path.join(directory, 'drawing.png'), 1),
+                      (os.path.join(directory, 'thumbnail.png'), export.fit(32)),
+                      (os.path.join(directory, 'drawing.svg'), 1)]
+            sizes = export.write_batch(images)
+            self.assertEqual(sizes[0], (70, 96))
+            self.assertEqual(sizes[1][0], 32)
+
+            with open(images[0][0], 'rb') as fin:
+                self.assertEqual(fin.read(8), b'\x89PNG\r\n\x1a\n')
+            with open(images[2][0], 'r') as fin:
+                self.assertIn('<svg', fin.read())
+
+            with self.assertRaises(ValueError):
+                export.write(os.path.join(directory, 'drawing.txt'))
+
+    def test_write_cached(self):
+
+        export = ImageExport(self.rows, self.geometry)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ExportCache(os.path.join(directory, 'cache'))
+            images = [(os.path.join(directory, 'drawing.png'), 1),
+                      (os.path.join(directory, 'thumbnail.png'), export.fit(32))]
+            sizes = export.write_batch(images, cache=cache, key='drawing')
+            self.assertEqual(cache.misses, 2)
+
+            # each size is served from the cache
+            with open(images[1][0], 'rb') as fin:
+                thumbnail = fin.read()
+            os.remove(images[1][0])
+            self.assertEqual(export.write_batch(images, cache=cache, key='drawing'), sizes)
+            self.assertEqual(cache.hits, 2)
+            with open(images[1][0], 'rb') as fin:
+                self.assertEqual(fin.read(), thumbnail)
+
+            # another zoom level isn't
+            export.write_batch([(images[0][0], 2)], cache=cache, key='drawing')
+            self.assertEqual(cache.misses, 3)
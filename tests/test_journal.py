@@ -0,0 +1,113 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import os
+import time
+import unittest
+
+from application import journal
+from application.pos import Pos
+from application.symbol import Line, Text
+from application.controller import Controller
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = 'tmp/test_journal.aac'
+        for name in (self.filename, journal.journal_name(self.filename)):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def memo(self, c):
+        return [symbol.memo() for symbol in c.objects]
+
+    def test_recover(self):
+
+        c = Controller()
+        c.on_new()
+        c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE2)
+        self.assertTrue(c.on_write_to_file(self.filename))
+
+        # unsaved changes
+        c.on_paste_rect(Pos(3, 3), Pos(20, 10))
+        c.on_paste_text(Text(Pos(22, 12), "hello"))
+        c.on_grid_row(2, 'insert')
+        c.on_undo()
+        c.on_cut((Pos(0, 0), Pos(10, 10)))
+        self.assertTrue(os.path.exists(journal.journal_name(self.filename)))
+
+        # no clean shutdown, the changes are recovered on opening the file
+        r = Controller()
+        self.assertTrue(r.on_read_from_file(self.filename))
+        self.assertEqual(self.memo(r), self.memo(c))
+        self.assertEqual(r.grid.content_as_str(), c.grid.content_as_str())
+        r.journal.wait()
+
+        # the recovered changes are kept until they are saved
+        r2 = Controller()
+        self.assertTrue(r2.on_read_from_file(self.filename))
+        self.assertEqual(self.memo(r2), self.memo(c))
+
+        self.assertTrue(r2.on_write_to_file(self.filename))
+        self.assertFalse(os.path.exists(journal.journal_name(self.filename)))
+
+    def test_close(self):
+
+        c = Controller()
+        c.on_new()
+        c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE2)
+        self.assertTrue(c.on_write_to_file(self.filename))
+        c.on_paste_rect(Pos(3, 3), Pos(20, 10))
+
+        # closing the application finishes writing the file and removes the journal
+        c.on_closing_application()
+        self.assertIsNone(c.journal)
+        self.assertFalse(os.path.exists(journal.journal_name(self.filename)))
+        r = Controller()
+        self.assertTrue(r.on_read_from_file(self.filename))
+        self.assertEqual(len(r.objects), 1)
+
+    def test_saved_since(self):
+
+        c = Controller()
+        c.on_new()
+        self.assertTrue(c.on_write_to_file(self.filename))
+        c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE2)
+
+        # the journal only applies to the file as it was saved
+        with open(self.filename, 'a') as fout:
+            fout.write("line:1,1,1,1,9\n")
+        self.assertIsNone(journal.recover(self.filename, []))
+
+    def test_compact(self):
+
+        c = Controller()
+        c.on_new()
+        self.assertTrue(c.on_write_to_file(self.filename))
+        c.journal = journal.Journal(self.filename, lambda: c.objects, compact_threshold=10)
+
+        for i in range(25):
+            c.on_paste_line(Pos(i, 5), Pos(i, 15), Line.LINE1)
+            if i % 3 == 0:
+                c.on_undo()
+        c.journal.wait()
+
+        # 25 pastes and 9 undos have been recorded
+        self.assertLess(c.journal.nr_entries, 34)
+        self.assertEqual(journal.recover(self.filename, []), self.memo(c))
+
+    def test_fsync(self):
+
+        c = Controller()
+        c.on_new()
+        self.assertTrue(c.on_write_to_file(self.filename))
+        c.journal = journal.Journal(self.filename, lambda: c.objects, fsync_interval=0.1)
+
+        # the first change is synced at once, the next one within the interval
+        c.on_paste_line(Pos(5, 5), Pos(15, 5), Line.LINE1)
+        self.assertFalse(c.journal.unsynced)
+        c.on_paste_line(Pos(5, 7), Pos(15, 7), Line.LINE1)
+        self.assertTrue(c.journal.unsynced)
+        time.sleep(0.3)
+        self.assertFalse(c.journal.unsynced)
+        c.stop_journal()
@@ -1,10 +1,14 @@
 # NB to be run with nose, this .py should _not_ be executable (chmod -x)
 
+import os
+import tempfile
 import unittest
 
 from application.pos import Pos
 from application.symbol import Line
 from application.controller import Controller
+from application.magic_line_settings import LineMatcher, LineMatchingData, MagicLineSettings
+from application import HORIZONTAL, VERTICAL
 
 
 class LinesTest(unittest.TestCase):
@@ -63,3 +67,59 @@ class LinesTest(unittest.TestCase):
 
         filename = 'tmp/test_magic_line.aac'
         self.assertTrue(c.on_write_to_file(filename))
+
+    def test_magic_line_reevaluate(self):
+
+        # a character next to the start of the line changes its representation
+        c = Controller()
+        c.on_new()
+        c.on_paste_mag_line(Pos(5, 5), Pos(12, 7))
+        c.on_character_changed('o')
+        c.on_paste_objects(Pos(4, 4))
+
+        # the same drawing, the line drawn after the character
+        expected = Controller()
+        expected.on_new()
+        expected.on_character_changed('o')
+        expected.on_paste_objects(Pos(4, 4))
+        expected.on_paste_mag_line(Pos(5, 5), Pos(12, 7))
+
+        # no stale line characters remain in the grid
+        self.assertEqual(c.grid.content_as_lines(), expected.grid.content_as_lines())
+
+    def test_line_matcher(self):
+
+        lmd = [LineMatchingData([['x', 'x', 'x'], ['-', 'x', '-'], ['x', 'x', 'x']], VERTICAL, 'o'),
+               LineMatchingData([['x', 'x', 'x'], ['x', 'x', '-'], ['x', 'x', 'x']], HORIZONTAL, '-'),
+               LineMatchingData([['x', 'x', 'x'], ['x', '|', 'x'], ['x', 'x', 'x']], VERTICAL, '|')]
+        matcher = LineMatcher(lmd)
+        self.assertTrue(matcher.compiled_for(lmd))
+
+        # the first matching pattern
+        cells = (' ', ' ', ' ', '-', ' ', '-', ' ', ' ', ' ')
+        self.assertEqual(matcher.match(cells), (0, VERTICAL, 'o'))
+        self.assertEqual(matcher.match(cells, HORIZONTAL), (1, HORIZONTAL, '-'))
+
+        # pattern with a centre character
+        cells = (' ', ' ', ' ', ' ', '|', ' ', ' ', ' ', ' ')
+        self.assertEqual(matcher.match(cells), (2, VERTICAL, '|'))
+        self.assertIsNone(matcher.match(cells, HORIZONTAL))
+
+        lmd.append(lmd[0])
+        self.assertFalse(matcher.compiled_for(lmd))
+
+    def test_line_matcher_edited(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            settings = MagicLineSettings(filename=os.path.join(directory, 'magic_line.ini'))
+            cells = (' ', ' ', ' ', ' ', ' ', '=', ' ', ' ', ' ')
+            try:
+                settings.on_save_settings()
+                self.assertIsNone(MagicLineSettings.matcher().match(cells, HORIZONTAL))
+
+                # edit a pattern character in place, as the settings dialog does, and save again
+                MagicLineSettings.LMD[3].pattern[1][2] = '='
+                settings.on_save_settings()
+                self.assertEqual(MagicLineSettings.matcher().match(cells, HORIZONTAL), (3, HORIZONTAL, '-'))
+            finally:
+                settings.load_default_settings()
@@ -0,0 +1,58 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import os
+import unittest
+
+from application import memo_file
+
+
+class MemoFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = 'tmp/test_memo_file.aac'
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def temp_files(self):
+        return [name for name in os.listdir('tmp') if name.endswith('.tmp')]
+
+    def test_write(self):
+
+        lines = ["comp:{0},0,0,{0},1".format(i) for i in range(10)]
+        memo_file.write_lines(self.filename, lines, chunk_lines=3)
+
+        with open(self.filename) as fin:
+            self.assertEqual(fin.read(), "\n".join(lines) + "\n")
+        self.assertEqual(self.temp_files(), [])
+
+    def test_failed_write(self):
+
+        memo_file.write_lines(self.filename, ["comp:1,0,0,1,1"])
+
+        def lines():
+            yield "comp:2,0,0,2,2"
+            raise IOError("disk full")
+
+        # the original file is kept when writing fails
+        with self.assertRaises(IOError):
+            memo_file.write_lines(self.filename, lines(), chunk_lines=1)
+
+        with open(self.filename) as fin:
+            self.assertEqual(fin.read(), "comp:1,0,0,1,1\n")
+        self.assertEqual(self.temp_files(), [])
+
+    def test_compressed(self):
+
+        lines = ["comp:{0},0,0,{0},1".format(i) for i in range(100)]
+        for extension in memo_file.EXTENSIONS:
+            if memo_file.EXTENSIONS[extension] == memo_file.ZSTD and memo_file.zstandard is None:
+                continue
+            filename = self.filename + extension
+            memo_file.write_lines(filename, lines, chunk_lines=30)
+
+            # the compression is detected by the content, not by the file name
+            os.replace(filename, self.filename)
+            with open(self.filename, 'rb') as fin:
+                self.assertEqual(memo_file.compression_by_magic(fin.read(8)), memo_file.EXTENSIONS[extension])
+            with memo_file.open_text(self.filename) as fin:
+                self.assertEqual(fin.read(), "\n".join(lines) + "\n")
@@ -0,0 +1,71 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.page_layout import PageLayout, content_bbox
+
+
+class PageLayoutTest(unittest.TestCase):
+
+    def rows(self, nr_cols, nr_rows, content):
+        rows = [[' '] * nr_cols for r in range(nr_rows)]
+        for col, row in content:
+            rows[row][col] = 'x'
+        return rows
+
+    def test_bbox(self):
+
+        self.assertIsNone(content_bbox(self.rows(10, 5, [])))
+
+        rows = self.rows(10, 5, [(3, 1), (7, 3), (5, 2)])
+        self.assertEqual(content_bbox(rows), (3, 1, 8, 4))
+
+    def test_fit(self):
+
+        layout = PageLayout(paper='A4', max_scale=0.5, margin=0)
+
+        # a small drawing is drawn at the maximum scale
+        scale, pages = layout.layout((0, 0, 10, 10), 10, 16)
+        self.assertEqual(scale, 0.5)
+        self.assertEqual(len(pages), 1)
+
+        # a large drawing is scaled down to fit the page
+        scale, pages = layout.layout((0, 0, 500, 300), 10, 16)
+        self.assertLess(scale, 0.5)
+        self.assertEqual(pages[0].cells, (0, 0, 500, 300))
+
+    def test_tiles(self):
+
+        overlap = 2
+        bbox = (5, 3, 1005, 603)
+        layout = PageLayout(paper='A4', landscape=True, pages_wide=3, pages_high=2, max_scale=1, overlap=overlap)
+        scale, pages = layout.layout(bbox, 10, 16)
+        # the height determines the scale, at which the width fits on less than 3 pages
+        self.assertEqual(len(pages), 4)
+
+        # the pages cover the content, with overlap between adjacent pages
+        cols = sorted(set((page.cells[0], page.cells[2]) for page in pages))
+        rows = sorted(set((page.cells[1], page.cells[3]) for page in pages))
+        self.assertEqual(cols[0][0], bbox[0])
+        self.assertEqual(cols[-1][1], bbox[2])
+        self.assertEqual(rows[0][0], bbox[1])
+        self.assertEqual(rows[-1][1], bbox[3])
+        for ranges in (cols, rows):
+            for (start, end), (next_start, next_end) in zip(ranges, ranges[1:]):
+                self.assertEqual(next_start, end - overlap)
+
+        # the cells of a page fit on the paper
+        for page in pages:
+            c_start, r_start, c_end, r_end = page.cells
+            self.assertLessEqual((c_end - c_start) * 10 * scale, layout.paper_width - 2 * layout.margin + 1e-6)
+            self.assertLessEqual((r_end - r_start) * 16 * scale, layout.paper_height - 2 * layout.margin + 1e-6)
+
+    def test_size(self):
+
+        # the printable area of a printer, instead of the paper size
+        layout = PageLayout(paper='A4', size=(500, 700), max_scale=1, margin=0)
+        self.assertEqual((layout.paper_width, layout.paper_height), (500, 700))
+
+        scale, pages = layout.layout((0, 0, 100, 100), 10, 16)
+        self.assertEqual(len(pages), 1)
+        self.assertAlmostEqual(scale, 700 / (100 * 16))
@@ -1,5 +1,6 @@
 # NB to be run with nose, this .py should _not_ be executable (chmod -x)
 
+import copy
 import unittest
 
 from application.pos import Pos
@@ -47,7 +48,7 @@ class PosTest(unittest.TestCase):
         self.assertEquals(tmp.x, 100)
         self.assertEquals(tmp.y, 240)
 
-        a.snap_to_grid()
+        a = a.snap_to_grid()
         self.assertEquals(a.x, 10)
         self.assertEquals(a.y, 0)
 
@@ -61,7 +62,7 @@ class PosTest(unittest.TestCase):
         self.assertEquals(tmp.x, 100)
         self.assertEquals(tmp.y, 256)
 
-        b.snap_to_grid()
+        b = b.snap_to_grid()
         self.assertEquals(b.x, 10)
         self.assertEquals(b.y, 16)
 
@@ -75,6 +76,25 @@ class PosTest(unittest.TestCase):
         self.assertEquals(tmp.x, 110)
         self.assertEquals(tmp.y, 272)
 
-        c.snap_to_grid()
+        c = c.snap_to_grid()
         self.assertEquals(c.x, 10)
         self.assertEquals(c.y, 16)
+
+    def test_immutable(self):
+
+        a = Pos(10, 15)
+        b = a
+        b += Pos(1, 1)
+        self.assertEqual(a, Pos(10, 15))
+        self.assertEqual(b, Pos(11, 16))
+        self.assertEqual(a.offset(1, 1), b)
+        with self.assertRaises(AttributeError):
+            a.x = 1
+
+        # small positions are interned
+        self.assertIs(Pos(3, 4), Pos(3.5, 4))
+        self.assertEqual(Pos(1000, 2000), Pos(1000, 2000))
+        self.assertEqual(hash(Pos(1000, 2000)), hash((1000, 2000)))
+        self.assertIs(copy.deepcopy(a), a)
+        col, row = a
+        self.assertEqual((col, row), a.xy)
@@ -0,0 +1,56 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.pos import Pos
+from application.raster import Raster
+from application.symbol import Line, Rect
+
+
+class RasterTest(unittest.TestCase):
+
+    def test_spans(self):
+
+        r = Raster()
+        r.add(1, 1, 1, 0, 'abc')
+        r.add(1, 2, 0, 1, 'de')
+        self.assertFalse(r.overlapping)
+        self.assertEqual(list(r.cells()), [(1, 1, 'a'), (2, 1, 'b'), (3, 1, 'c'), (1, 2, 'd'), (1, 3, 'e')])
+
+    def test_overlap(self):
+
+        r = Raster()
+        r.add(0, 0, 1, 0, '---')
+        r.add(2, 0, 0, 1, '||')
+        self.assertTrue(r.overlapping)
+        # the last added span wins
+        self.assertEqual(r.as_dict(), {Pos(0, 0): '-', Pos(1, 0): '-', Pos(2, 0): '|', Pos(2, 1): '|'})
+
+    def test_points(self):
+
+        r = Raster()
+        r.add_points([(0, 0), (1, 1), (2, 2), (3, 2), (4, 2)], '\\')
+        self.assertEqual(len(r), 2)
+        self.assertEqual(len(r.as_dict()), 5)
+        self.assertFalse(r.overlapping)
+
+        # the spans of the points are checked against the spans added before
+        r.add_points([(4, 0), (4, 1), (4, 2)], '|')
+        self.assertTrue(r.overlapping)
+        self.assertEqual(r.as_dict()[Pos(4, 2)], '|')
+
+    def test_rect(self):
+
+        # the same representation as the four sides drawn as lines
+        for startpos, endpos in ((Pos(2, 3), Pos(12, 8)), (Pos(12, 8), Pos(2, 3)), (Pos(2, 3), Pos(2, 8))):
+            rect = Rect(startpos, endpos)
+            ul = rect.startpos
+            br = rect.endpos
+            ur = Pos(br.x, ul.y)
+            bl = Pos(ul.x, br.y)
+            repr = dict()
+            repr.update(Line(ul, ur, Line.LINE1).repr)
+            repr.update(Line(bl, br, Line.LINE1).repr)
+            repr.update(Line(ur, br, Line.LINE4).repr)
+            repr.update(Line(ul, bl, Line.LINE4).repr)
+            self.assertEqual(rect.repr, repr)
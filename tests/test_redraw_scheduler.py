@@ -0,0 +1,67 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.redraw_scheduler import RedrawScheduler
+
+
+class Widget(object):
+    """Records the redraws, instead of a Gtk.Widget."""
+
+    def __init__(self):
+        self.callbacks = []
+        self.draws = []
+
+    def add_tick_callback(self, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def tick(self):
+        callbacks = self.callbacks
+        self.callbacks = []
+        for callback in callbacks:
+            callback(self, None)
+
+    def queue_draw(self):
+        self.draws.append(None)
+
+    def queue_draw_area(self, x, y, width, height):
+        self.draws.append((x, y, width, height))
+
+
+class RedrawSchedulerTest(unittest.TestCase):
+
+    def test_coalesce(self):
+
+        widget = Widget()
+        redraw = RedrawScheduler(widget)
+
+        redraw.request((0, 0, 10, 10))
+        redraw.request((20, 0, 10, 10))
+        self.assertTrue(redraw.pending)
+        self.assertEqual(len(widget.callbacks), 1)
+
+        widget.tick()
+        self.assertFalse(redraw.pending)
+        self.assertEqual(widget.draws, [(0, 0, 10, 10), (20, 0, 10, 10)])
+
+        self.assertEqual(redraw.nr_requested, 2)
+        self.assertEqual(redraw.nr_performed, 1)
+
+    def test_full_redraw(self):
+
+        widget = Widget()
+        redraw = RedrawScheduler(widget)
+
+        redraw.request((0, 0, 10, 10))
+        redraw.request()
+        redraw.request((20, 0, 10, 10))
+        widget.tick()
+        self.assertEqual(widget.draws, [None])
+
+        # nothing pending
+        widget.tick()
+        self.assertEqual(widget.draws, [None])
+
+        self.assertEqual(redraw.nr_requested, 3)
+        self.assertEqual(redraw.nr_performed, 1)
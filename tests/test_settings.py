@@ -14,8 +14,9 @@ class PreferencesTest(unittest.TestCase):
 
     def test_nr_settings(self):
         # 2020-05-28 number of settings in the preferences testfile: 18
+        # plus the 7 export and printing settings
         p = Preferences()
-        self.assertEquals(p.nr_values(), 18)
+        self.assertEquals(p.nr_values(), 25)
 
     def test_has_value(self):
         p = Preferences()
@@ -33,3 +34,18 @@ class PreferencesTest(unittest.TestCase):
 
         # test string
         self.assertEquals(p.values['LINE_HOR'], '-')
+
+    def test_geometry(self):
+        geometry = Preferences.update_geometry()
+        self.assertEqual(geometry.cell_width, Preferences.values['GRIDSIZE_W'])
+        self.assertEqual(geometry.cell_height, Preferences.values['GRIDSIZE_H'])
+
+        # a snapshot, which is only rebuilt on request (e.g. when the preferences are saved)
+        width = Preferences.values['GRIDSIZE_W']
+        try:
+            Preferences.values['GRIDSIZE_W'] = width + 1
+            self.assertIs(Preferences.geometry, geometry)
+            self.assertEqual(Preferences.update_geometry().cell_width, width + 1)
+        finally:
+            Preferences.values['GRIDSIZE_W'] = width
+            Preferences.update_geometry()
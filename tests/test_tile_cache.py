@@ -0,0 +1,64 @@
+# NB to be run with nose, this .py should _not_ be executable (chmod -x)
+
+import unittest
+
+from application.tile_cache import TileCache
+
+
+class TileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rects = []
+
+    def draw(self, ctx, rect):
+        self.rects.append(rect)
+
+    def test_draw_on_demand(self):
+
+        cache = TileCache(self.draw, tile_size=16)
+
+        cache.tile(0, 0)
+        cache.tile(2, 1)
+        cache.tile(0, 0)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(self.rects, [(0, 0, 16, 16), (32, 16, 16, 16)])
+
+    def test_eviction(self):
+
+        # room for 2 tiles
+        cache = TileCache(self.draw, tile_size=16, max_bytes=2 * 4 * 16 * 16)
+
+        cache.tile(0, 0)
+        cache.tile(1, 0)
+        cache.tile(0, 0)
+        cache.tile(2, 0)  # evicts (1, 0), the least recently used tile
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nr_bytes, 2 * 4 * 16 * 16)
+
+        self.rects = []
+        cache.tile(0, 0)
+        self.assertEqual(self.rects, [])
+        cache.tile(1, 0)
+        self.assertEqual(self.rects, [(16, 0, 16, 16)])
+
+    def test_invalidate(self):
+
+        cache = TileCache(self.draw, tile_size=16)
+        for row in range(3):
+            for col in range(3):
+                cache.tile(col, row)
+
+        cache.invalidate((20, 20, 4, 4))
+        self.assertEqual(len(cache), 8)
+
+        self.rects = []
+        cache.tile(1, 1)
+        self.assertEqual(self.rects, [(16, 16, 16, 16)])
+
+        cache.invalidate((10, 10, 10, 10))
+        self.assertEqual(len(cache), 5)
+
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)